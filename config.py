@@ -39,6 +39,8 @@ SENTIMENT_DIR = BASE_DIR / "sentiment"
 RAW_DATA_DIR = BASE_DIR / "raw_data"
 COMPANY_DATA_DIR = BASE_DIR / "company_data"
 LOG_FILE = BASE_DIR / "cron.log"
+CACHE_DIR = BASE_DIR / ".cache"
+RESULTS_DIR = BASE_DIR / "results"
 
 # Specific files
 DAILY_SENTIMENT_FILE = SENTIMENT_DIR / "daily_sentiment.csv"
@@ -46,10 +48,61 @@ WEEKLY_SENTIMENT_FILE = SENTIMENT_DIR / "weekly_sentiment.csv"
 MONTHLY_SENTIMENT_FILE = SENTIMENT_DIR / "monthly_sentiment.csv"
 FULL_SENTIMENT_FILE = SENTIMENT_DIR / "full_sentiment.csv"
 
+# Compact article store (numeric scores + externalized article text)
+SCORES_FILE = SENTIMENT_DIR / "scores.parquet"
+ARTICLE_CONTENT_FILE = SENTIMENT_DIR / "article_content.parquet"
+ARTICLE_INDEX_FILE = SENTIMENT_DIR / "article_index.sqlite"
+# Pre-parsed VADER lexicon (built once by scripts/vader_lexicon.py)
+VADER_LEXICON_FILE = CACHE_DIR / "vader_lexicon.pkl"
+# Optional full-article bodies (content-addressed cache, see scripts/article_bodies.py)
+ARTICLE_BODY_DIR = CACHE_DIR / "article_bodies"
+# Default dashboard figures per company and date range, per data version (scripts/chart_specs.py)
+CHART_SPECS_DIR = CACHE_DIR / "chart_specs"
+
 DAX_ARTICLES_FILE = RAW_DATA_DIR / "dax_articles.csv"
 DAX_PRICES_FILE = RAW_DATA_DIR / "dax_stock_prices.csv"
+DAX_INDEX_FILE = RAW_DATA_DIR / "dax_index_prices.csv"
+# Optional: Company,free_float_shares (for free-float cap weights)
+FREE_FLOAT_FILE = RAW_DATA_DIR / "dax_free_float.csv"
+
+# Composite index sentiment (one row/series per weight scheme)
+INDEX_SENTIMENT_FILE = SENTIMENT_DIR / "index_sentiment.csv"
+INDEX_CONTRIBUTIONS_FILE = SENTIMENT_DIR / "index_contributions.parquet"
+
+BACKTEST_RESULTS_FILE = RESULTS_DIR / "backtest_grid.csv"
+# Per-company PDF/PNG reports (scripts/report_renderer.py)
+REPORTS_DIR = RESULTS_DIR / "reports"
+# Walk-forward return models, metrics and predictions per data version (scripts/modeling.py)
+MODELS_DIR = RESULTS_DIR / "models"
+
+# Streaming alerts
+ALERTS_DIR = BASE_DIR / "alerts"
+ALERT_RULES_FILE = BASE_DIR / "alert_rules.json"
+ALERT_STATE_FILE = ALERTS_DIR / "alert_state.json"
+ALERT_LOG_FILE = ALERTS_DIR / "alerts.jsonl"
+
+# Data-quality stage: validated-row state, per-run reports and quarantined rows
+QUALITY_DIR = BASE_DIR / "quality"
+
+# Published data snapshots read by the dashboard, and the pipeline run lock
+SNAPSHOT_DIR = BASE_DIR / "snapshots"
+PIPELINE_LOCK_FILE = BASE_DIR / ".pipeline.lock"
 
 # Load .env variables (optional)
 load_dotenv()
 NEWS_API_KEY = os.getenv("NEWS_API_KEY")
 
+# Company universes (DAX, MDAX, SDAX, watchlists); comma-separate to combine
+UNIVERSES_FILE = BASE_DIR / "universes.json"
+DEFAULT_UNIVERSE = os.getenv("FIEP_UNIVERSE", "DAX")
+
+# Cold tier: yearly compressed archives of rows older than the hot window
+# (scripts/archive.py). The hot window covers the dashboard's "1 Year" range;
+# article text is kept for TEXT_RETENTION_DAYS, scores and prices for good.
+ARCHIVE_DIR = BASE_DIR / "archive"
+HOT_DAYS = int(os.getenv("FIEP_HOT_DAYS", "400"))
+TEXT_RETENTION_DAYS = int(os.getenv("FIEP_TEXT_RETENTION_DAYS", "730"))
+
+# Raw payloads of every fetch (NewsAPI JSON, Google News RSS, yfinance frames),
+# compressed and content-addressed, for offline re-parsing (scripts/raw_responses.py)
+RAW_RESPONSES_DIR = BASE_DIR / "raw_responses"
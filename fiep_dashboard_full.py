@@ -1,34 +1,264 @@
 import streamlit as st
 import pandas as pd
 import os
-import plotly.express as px
-import plotly.io as pio
-from plotly.graph_objs import Figure, Scatter, Candlestick
+import time
+from contextlib import contextmanager
 from pathlib import Path
 import sys
 
 # ---------------- CONFIG ----------------
 sys.path.insert(0, str(Path(__file__).resolve().parent))
-from config import COMPANY_DATA_DIR
+from config import COMPANY_DATA_DIR, SENTIMENT_DIR, DAILY_SENTIMENT_FILE
+from scripts.panel import PanelStore, data_fingerprint
+from scripts import analytics, charts, article_index
+from scripts.backtest_engine import sweep, results_frame, heatmap, METRICS
+from scripts.xcorr_engine import cached_panel_lagged_correlations, lead_lag_summary
+from scripts.market_overview import cached_overview
+from scripts import event_study, index_sentiment, storage, report_renderer, chart_specs
+from scripts.analytics import DATE_RANGES, DEFAULT_ALERT_THRESHOLD, DEFAULT_ZSCORE_THRESHOLD
+from scripts.feature_store import REGRESSORS, REGRESSION_WINDOWS, REGRESSION_STATS, regression_column
 
 DATA_DIR = Path(COMPANY_DATA_DIR)
+PANEL_POLL_SECONDS = 30
 
 st.set_page_config(layout="wide", page_title="📊 Company Insight Dashboard")
+rerun_start = time.perf_counter()
 
 # ------------ Load & List Companies ------------
-@st.cache_data
-def get_company_files():
-    files = sorted([f.name for f in DATA_DIR.glob("*.csv")])
-    return files
+# One all-company panel per server process, keyed on the file fingerprint
+# and reloaded in the background when the pipeline rewrites company_data/.
+@st.cache_resource
+def get_panel_store():
+    store = PanelStore(DATA_DIR, poll_interval=PANEL_POLL_SECONDS)
+    store.refresh()
+    store.start_watcher()
+    return store
 
-@st.cache_data
-def load_company_data(filename):
-    return pd.read_csv(DATA_DIR / filename, parse_dates=["date"])
+panel_store = get_panel_store()
+# Every read in this rerun comes from the snapshot the panel was loaded from,
+# so files the pipeline is rewriting right now are never seen.
+storage.pin(panel_store.snapshot)
+
+# ------------ Cached Sections ------------
+# Every section is cached on exactly the inputs it depends on: the data
+# version plus (company, date range) and, for alerts/backtest, the threshold.
+@st.cache_data(show_spinner=False, max_entries=256)
+def company_view(version, company, date_range):
+    return analytics.filter_date_range(panel_store.company_frame(company), date_range)
+
+CHARTS = {
+    "dual": charts.dual_axis,
+    "candlestick": charts.candlestick,
+    "zscore": charts.zscore,
+    "volatility": charts.volatility,
+    "moving_averages": charts.moving_averages,
+    "histogram": charts.sentiment_histogram,
+}
+
+LINE_CHARTS = {"dual", "zscore", "volatility", "moving_averages"}
+
+def visible_window(df, window):
+    if window is None:
+        return df
+    return df[(df["date"] >= window[0]) & (df["date"] <= window[1])]
+
+@st.cache_data(show_spinner=False, max_entries=512)
+def cached_chart(name, version, company, date_range, window=None, max_points=charts.MAX_POINTS):
+    df = visible_window(company_view(version, company, date_range), window)
+    if name in LINE_CHARTS:
+        return CHARTS[name](df, max_points=max_points)
+    return CHARTS[name](df)
+
+# Default views are served from the figures the pipeline precomputed for
+# this data version (scripts/chart_specs.py); a zoomed window, another
+# resolution or threshold, or a version without specs is built here.
+@st.cache_resource(max_entries=64)
+def precomputed_specs(version, company):
+    return chart_specs.load(version, company)
+
+def default_chart(name, version, company, date_range, window=None, max_points=charts.MAX_POINTS):
+    if window is not None or max_points != charts.MAX_POINTS:
+        return None
+    return chart_specs.figure(precomputed_specs(version, company), date_range, name)
+
+def chart(name, version, company, date_range, window=None, max_points=charts.MAX_POINTS):
+    fig = default_chart(name, version, company, date_range, window, max_points)
+    return fig if fig is not None else cached_chart(name, version, company, date_range, window, max_points)
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def cached_correlation(version, company, date_range):
+    return analytics.correlation_matrix(company_view(version, company, date_range))
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def cached_lag_chart(version, company, date_range):
+    return charts.lagged_correlation(analytics.lagged_correlation(company_view(version, company, date_range)))
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def cached_regression_chart(version, company, date_range, regressor, reg_window, window=None, max_points=charts.MAX_POINTS):
+    df = visible_window(company_view(version, company, date_range), window)
+    beta, tstat, r2 = (regression_column(stat, regressor, reg_window) for stat in REGRESSION_STATS)
+    return charts.rolling_regression(df, beta, tstat, r2, f"Return on {REGRESSORS[regressor]}, {reg_window}-day window",
+                                     max_points)
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def cached_alerts(version, company, date_range, alert_threshold):
+    return analytics.alert_rows(company_view(version, company, date_range), alert_threshold)
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def cached_zscore_alerts(version, company, date_range, z_thresh):
+    return analytics.zscore_alert_rows(company_view(version, company, date_range), z_thresh)
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def cached_backtest_chart(version, company, date_range, alert_threshold, window=None, max_points=charts.MAX_POINTS):
+    bt = analytics.backtest(company_view(version, company, date_range), alert_threshold)
+    return charts.backtest(visible_window(bt, window), max_points=max_points)
+
+@st.cache_resource
+def get_report_renderer():
+    return report_renderer.Renderer()
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def cached_report(version, company, date_range, alert_threshold, fmt):
+    # The batch renderer's file when its inputs match, otherwise drawn here
+    # with the one matplotlib figure this server process keeps (render()
+    # serializes concurrent sessions on its lock).
+    return report_renderer.report_bytes(company, panel_store.company_frame(company), fmt, date_range,
+                                        alert_threshold, get_report_renderer())
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def cached_sweep(version, company, date_range):
+    view = company_view(version, company, date_range)
+    cube = sweep(view["sentiment_change"].to_numpy(dtype="float64")[None],
+                 view["stock_price_return"].to_numpy(dtype="float64")[None])
+    return results_frame([company], cube)
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def payload_report(version, company, date_range, window, max_points):
+    """JSON bytes per chart at full resolution vs. what is actually sent."""
+    rows = []
+    for name in sorted(LINE_CHARTS):
+        full = charts.payload_bytes(cached_chart(name, version, company, date_range, window, None))
+        sent = charts.payload_bytes(cached_chart(name, version, company, date_range, window, max_points))
+        rows.append({"Chart": name, "Full KB": full / 1024, "Sent KB": sent / 1024})
+    return pd.DataFrame(rows)
+
+# ------------ Debug Timing ------------
+@contextmanager
+def timed(section):
+    start = time.perf_counter()
+    yield
+    st.session_state.setdefault("timings", {})[section] = (time.perf_counter() - start) * 1000
+
+def timing_caption(section):
+    if show_debug and section in st.session_state.get("timings", {}):
+        st.caption(f"⏱️ {section}: {st.session_state['timings'][section]:.1f} ms")
+
+# ------------ Cross-Company Pages ------------
+PAGES = ["🏢 Company Insights", "🗺️ Market Overview", "🌐 Lead/Lag Overview", "🧮 Event Study"]
+page = st.sidebar.radio("Page", PAGES, index=0)
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def cached_xcorr(version, max_lag):
+    return cached_panel_lagged_correlations(panel_store.get()[1], version, max_lag)
+
+def lead_lag_page():
+    st.title("🌐 Lead/Lag Overview")
+    max_lag = st.sidebar.slider("Max Lag (days)", 1, 30, value=analytics.MAX_LAG)
+    xcorr = cached_xcorr(panel_store.version, max_lag)
+    st.plotly_chart(charts.lead_lag_heatmap(xcorr), use_container_width=True)
+    st.caption("* outside the 95% band (±1.96/√n) under the no-correlation null")
+    st.subheader("🏁 Peak Lag per Company")
+    st.dataframe(lead_lag_summary(xcorr), hide_index=True)
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def cached_market_overview(version):
+    return cached_overview(panel_store.get()[1], version)
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def cached_market_figures(version):
+    overview = cached_market_overview(version)
+    return {
+        "heatmap": charts.sentiment_panel_heatmap(overview["sentiment_heatmap"]),
+        "Returns": charts.correlation_heatmap(overview["return_corr"], "Cross-Company Return Correlation"),
+        "Sentiment": charts.correlation_heatmap(overview["sentiment_corr"], "Cross-Company Sentiment Correlation"),
+    }
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def cached_index_sentiment(daily_version, scheme, latest_date):
+    # the series the pipeline stored; computed here only if missing or behind the daily file
+    stored = index_sentiment.load_stored(scheme, latest_date)
+    return stored if stored is not None else index_sentiment.compute_index(scheme)
+
+def index_sentiment_section():
+    st.subheader("🧭 Composite Index Sentiment")
+    sentiment, counts = index_sentiment.load_daily()
+    schemes = index_sentiment.available_schemes(sentiment, counts)
+    scheme = st.radio("Weights", schemes, horizontal=True, index=len(schemes) - 1,
+                      format_func=lambda s: s.replace("_", " ").title())
+    # daily file, stored index files and index/price files: the composite changes when any of them does
+    daily_version = data_fingerprint(SENTIMENT_DIR, DAILY_SENTIMENT_FILE.name) + data_fingerprint(
+        SENTIMENT_DIR, "index_*") + data_fingerprint(index_sentiment.FREE_FLOAT_FILE.parent, "dax_*.csv")
+    index, contrib = cached_index_sentiment(daily_version, scheme, sentiment.index.max())
+    st.plotly_chart(charts.index_sentiment(index), use_container_width=True)
+    if index["composite"].notna().any():
+        days = index.dropna(subset=["composite"])["date"].dt.date.tolist()
+        day = st.select_slider("Contributions on", options=days, value=days[-1])
+        st.plotly_chart(charts.contributions(index_sentiment.top_contributors(contrib, day, n=15)),
+                        use_container_width=True)
+
+def market_overview_page():
+    st.title("🗺️ Market Overview")
+    version = panel_store.version
+    overview = cached_market_overview(version)
+    figures = cached_market_figures(version)
+
+    index_sentiment_section()
+
+    st.subheader("🚨 Largest Sentiment Z-Score Moves (latest day per company)")
+    st.dataframe(overview["latest_moves"], hide_index=True)
+
+    st.subheader("🌡️ Sentiment Heatmap")
+    st.plotly_chart(figures["heatmap"], use_container_width=True)
+
+    st.subheader("🔗 Correlation Matrix")
+    kind = st.radio("Correlation of", ["Returns", "Sentiment"], horizontal=True)
+    st.plotly_chart(figures[kind], use_container_width=True)
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def cached_event_study(version, drop_threshold, z_threshold, event_window):
+    event_types = {"sentiment_drop": ("sentiment_change", drop_threshold), "zscore_low": ("sentiment_zscore", z_threshold)}
+    car_windows = [w for w in event_study.CAR_WINDOWS if event_window[0] <= w[0] and w[1] <= event_window[1]]
+    return event_study.cached_event_study(panel_store.get()[1], version, event_types, event_window,
+                                          event_study.ESTIMATION_WINDOW, car_windows)
+
+def event_study_page():
+    st.title("🧮 Event Study")
+    drop_threshold = st.sidebar.slider("Sentiment Drop Event (Δ ≤)", -1.0, 0.0, step=0.05, value=DEFAULT_ALERT_THRESHOLD)
+    z_threshold = st.sidebar.slider("Z-Score Event (Z ≤)", -3.0, 0.0, step=0.1, value=-2.0)
+    event_window = st.sidebar.slider("Event Window (sessions)", -10, 20, value=event_study.EVENT_WINDOW)
+    result = cached_event_study(panel_store.version, drop_threshold, z_threshold, event_window)
+    st.plotly_chart(charts.caar(result["aar"]), use_container_width=True)
+    st.caption("Market-model abnormal returns vs. the DAX (equal-weight universe until index prices are fetched), "
+               f"estimated over sessions {event_study.ESTIMATION_WINDOW[0]}…{event_study.ESTIMATION_WINDOW[1]}")
+    st.subheader("📋 Cumulative Abnormal Returns")
+    st.dataframe(result["summary"], hide_index=True)
+    with st.expander(f"All events ({len(result['events'])})"):
+        st.dataframe(result["events"], hide_index=True)
+
+if page == PAGES[1]:
+    market_overview_page()
+    st.stop()
+if page == PAGES[2]:
+    lead_lag_page()
+    st.stop()
+if page == PAGES[3]:
+    event_study_page()
+    st.stop()
 
 # ------------ Sidebar ------------
 st.sidebar.title("📁 Company Selection")
 
-companies = get_company_files()
+companies = [f"{c}.csv" for c in panel_store.companies()]
 if not companies:
     st.warning(f"⚠️ No .csv files found in {DATA_DIR}")
     st.stop()
@@ -37,121 +267,197 @@ if not companies:
 company_labels = [f.replace(".csv", "").capitalize() for f in companies]
 selected_label = st.sidebar.selectbox("Choose a company", company_labels)
 selected_file = companies[company_labels.index(selected_label)]
+company = selected_file.replace(".csv", "")
 
-date_range = st.sidebar.radio("Select Date Range", ["All", "YTD", "1 Year", "3 Years"], index=0)
+date_range = st.sidebar.radio("Select Date Range", DATE_RANGES, index=0)
 show_zscore = st.sidebar.checkbox("Overlay Sentiment Z-Score", value=True)
 show_alerts = st.sidebar.checkbox("Show Alerts", value=True)
 show_lag_corr = st.sidebar.checkbox("Show Lagged Correlation", value=False)
 show_candlesticks = st.sidebar.checkbox("Show Candlestick Chart", value=False)
-alert_threshold = st.sidebar.slider("Alert Threshold (Sentiment Δ)", -1.0, 0.0, step=0.05, value=-0.3)
+show_sweep = st.sidebar.checkbox("Show Threshold Sweep", value=False)
 export_csv = st.sidebar.button("⬇️ Export to CSV")
 export_pdf = st.sidebar.button("📄 Export PDF Report")
+chart_resolution = st.sidebar.select_slider("Chart Resolution (max points)", options=[500, 1500, 5000, "Full"], value=charts.MAX_POINTS)
+max_points = None if chart_resolution == "Full" else chart_resolution
+show_debug = st.sidebar.checkbox("🐞 Show Rerun Latency", value=False)
 
 # ------------ Load Data ------------
 with st.spinner("Loading company data..."):
-    df = load_company_data(selected_file)
+    version = panel_store.version
+    with timed("load"):
+        df = company_view(version, company, date_range)
     company_name = selected_label
 
-    if date_range != "All":
-        max_date = df["date"].max()
-        if date_range == "YTD":
-            min_date = pd.to_datetime(f"{max_date.year}-01-01")
-        elif date_range == "1 Year":
-            min_date = max_date - pd.DateOffset(years=1)
-        elif date_range == "3 Years":
-            min_date = max_date - pd.DateOffset(years=3)
-        df = df[df["date"] >= min_date]
-
     st.title(f"📈 Insights for {company_name}")
 
+# Zooming in through the visible range re-downsamples only the visible
+# points, so resolution is refined as the window shrinks.
+window = None
+if len(df) > 1:
+    first, last = df["date"].min().to_pydatetime(), df["date"].max().to_pydatetime()
+    picked = st.sidebar.slider("🔍 Visible Range", min_value=first, max_value=last, value=(first, last), format="YYYY-MM-DD")
+    if picked != (first, last):
+        window = (pd.Timestamp(picked[0]), pd.Timestamp(picked[1]))
+
 # ------------ Main Price Chart ------------
 st.subheader("📈 Stock Price vs. Sentiment (Dual Axis)")
-fig_dual = Figure()
-fig_dual.add_trace(Scatter(x=df["date"], y=df["Close"], name="Stock Price", yaxis="y1"))
-fig_dual.add_trace(Scatter(x=df["date"], y=df["avg_sentiment"], name="Avg Sentiment", yaxis="y2"))
-fig_dual.update_layout(
-    xaxis=dict(title="Date"),
-    yaxis=dict(title="Stock Price", side="left"),
-    yaxis2=dict(title="Avg Sentiment", overlaying="y", side="right", range=[-1, 1]),
-    height=500
-)
-st.plotly_chart(fig_dual, use_container_width=True)
+with timed("dual axis"):
+    st.plotly_chart(chart("dual", version, company, date_range, window, max_points), use_container_width=True)
 
 # ------------ Candlestick Chart ------------
 if show_candlesticks and {"Open", "High", "Low", "Close"}.issubset(df.columns):
     st.subheader("📉 Candlestick Chart")
-    fig_candle = Figure(data=[Candlestick(
-        x=df["date"],
-        open=df["Open"],
-        high=df["High"],
-        low=df["Low"],
-        close=df["Close"]
-    )])
-    fig_candle.update_layout(title="Candlestick Price Chart", xaxis_title="Date", yaxis_title="Price")
-    st.plotly_chart(fig_candle, use_container_width=True)
+    with timed("candlestick"):
+        st.plotly_chart(cached_chart("candlestick", version, company, date_range, window), use_container_width=True)
 
 # ------------ Z-Score Overlay ------------
 if show_zscore and "sentiment_zscore" in df.columns:
-    st.plotly_chart(px.line(df, x="date", y="sentiment_zscore", title="Sentiment Z-Score Over Time"), use_container_width=True)
+    with timed("z-score"):
+        st.plotly_chart(chart("zscore", version, company, date_range, window, max_points), use_container_width=True)
+
+# ------------ Alerts & Strategy Backtest ------------
+# Fragment: moving the threshold reruns only this block (alert table + backtest)
+@st.fragment
+def alerts_and_backtest():
+    with timed("alerts + backtest"):
+        alert_threshold = st.slider("Alert Threshold (Sentiment Δ)", -1.0, 0.0, step=0.05,
+                                    value=DEFAULT_ALERT_THRESHOLD, key="alert_threshold")
+        if show_alerts:
+            st.subheader(f"🚨 Alerts (Δ ≤ {alert_threshold})")
+            alerts = cached_alerts(version, company, date_range, alert_threshold)
+            picked = st.dataframe(alerts, on_select="rerun", selection_mode="single-row", key="alert_table")
+            if picked.selection.rows:
+                day = alerts.iloc[picked.selection.rows[0]]["date"]
+                st.markdown(f"**📰 Articles behind {day:%Y-%m-%d}**")
+                st.dataframe(article_index.articles_for(company, day), hide_index=True,
+                             column_config={"url": st.column_config.LinkColumn("url")})
+            else:
+                st.caption("Select an alert row to see the scored articles behind it.")
+
+        st.subheader("📈 Strategy Backtest")
+        fig_bt = None
+        if alert_threshold == DEFAULT_ALERT_THRESHOLD:
+            fig_bt = default_chart("backtest", version, company, date_range, window, max_points)
+        if fig_bt is None:
+            fig_bt = cached_backtest_chart(version, company, date_range, alert_threshold, window, max_points)
+        st.plotly_chart(fig_bt, use_container_width=True)
+        # the PNG is the report's summary page (price/sentiment, alert days, backtest)
+        if st.button("📷 Export Summary as PNG"):
+            st.download_button("Download Summary as PNG", cached_report(version, company, date_range, alert_threshold, "png"),
+                               f"{company_name}_summary.png", "image/png")
+    timing_caption("alerts + backtest")
+
+alerts_and_backtest()
+
+# ------------ Threshold Sweep ------------
+# All thresholds x holding periods in one vectorized pass (scripts/backtest_engine.py)
+@st.fragment
+def threshold_sweep():
+    with timed("threshold sweep"):
+        st.subheader("🧪 Threshold Sweep")
+        metric = st.selectbox("Metric", METRICS, index=METRICS.index("sharpe"), key="sweep_metric")
+        results = cached_sweep(version, company, date_range)
+        st.plotly_chart(charts.sweep_heatmap(heatmap(results, metric, company), metric), use_container_width=True)
+    timing_caption("threshold sweep")
 
-# ------------ Alerts ------------
-df["custom_alert"] = df["sentiment_change"] <= alert_threshold
-if show_alerts:
-    st.subheader(f"🚨 Alerts (Δ ≤ {alert_threshold})")
-    st.dataframe(df[df["custom_alert"]][["date", "avg_sentiment", "sentiment_change", "Close", "stock_price_return"]])
+if show_sweep:
+    threshold_sweep()
 
 # ------------ Z-Score Alerts ------------
+@st.fragment
+def zscore_alerts():
+    with timed("z-score alerts"):
+        st.markdown("#### 🔧 Z-Score Alert Settings")
+        z_thresh = st.slider("Z-Score Alert Threshold", -3.0, 0.0, step=0.1, value=DEFAULT_ZSCORE_THRESHOLD, key="z_thresh")
+        if st.checkbox("Show Z-Score Alerts", key="show_zscore_alerts"):
+            st.subheader(f"🚨 Z-Score Alerts (Z ≤ {z_thresh})")
+            st.dataframe(cached_zscore_alerts(version, company, date_range, z_thresh))
+    timing_caption("z-score alerts")
+
 if "sentiment_zscore" in df.columns:
-    st.sidebar.markdown("### 🔧 Z-Score Alert Settings")
-    z_thresh = st.sidebar.slider("Z-Score Alert Threshold", -3.0, 0.0, step=0.1, value=-1.0)
-    df["zscore_alert"] = df["sentiment_zscore"] <= z_thresh
-    if st.sidebar.checkbox("Show Z-Score Alerts"):
-        st.subheader(f"🚨 Z-Score Alerts (Z ≤ {z_thresh})")
-        st.dataframe(df[df["zscore_alert"]][["date", "sentiment_zscore", "Close", "stock_price_return"]])
+    zscore_alerts()
 
 # ------------ Correlation ------------
 st.subheader("📊 Correlation Matrix")
-cols = ["avg_sentiment", "sentiment_7d", "sentiment_zscore", "Close", "stock_price_return", "return_7d"]
-st.dataframe(df[cols].corr().style.background_gradient(cmap='coolwarm').format("{:.2f}"))
+with timed("correlation"):
+    st.dataframe(cached_correlation(version, company, date_range).style.background_gradient(cmap='coolwarm').format("{:.2f}"))
 
 # ------------ Lagged Correlation ------------
 if show_lag_corr:
     st.subheader("🔁 Lagged Correlation")
-    max_lag = 7
-    lag_data = [(lag, df["stock_price_return"].corr(df["avg_sentiment"].shift(lag))) for lag in range(-max_lag, max_lag+1)]
-    st.plotly_chart(px.bar(pd.DataFrame(lag_data, columns=["Lag", "Correlation"]), x="Lag", y="Correlation", title="Lagged Correlation"), use_container_width=True)
+    with timed("lagged correlation"):
+        st.plotly_chart(cached_lag_chart(version, company, date_range), use_container_width=True)
+
+# ------------ Rolling Sentiment Beta ------------
+# Rolling OLS of returns on (lagged) sentiment, precomputed for every company
+# in the shared panel (scripts/feature_store.py); picking a regressor or
+# window only switches columns.
+@st.fragment
+def rolling_beta():
+    with timed("rolling beta"):
+        st.subheader("📐 Rolling Sentiment Beta")
+        left, right = st.columns(2)
+        regressor = left.selectbox("Regressor", list(REGRESSORS), format_func=REGRESSORS.get, key="beta_regressor")
+        reg_window = right.selectbox("Window (days)", REGRESSION_WINDOWS, key="beta_window")
+        beta = regression_column("beta", regressor, reg_window)
+        if beta in df.columns and df[beta].notna().any():
+            st.plotly_chart(cached_regression_chart(version, company, date_range, regressor, reg_window, window, max_points),
+                            use_container_width=True)
+        else:
+            st.caption(f"Fewer than {reg_window} days of history in this range.")
+    timing_caption("rolling beta")
+
+rolling_beta()
 
 # ------------ Volatility ------------
 st.subheader("📉 7d Rolling Volatility")
-df["price_volatility"] = df["Close"].pct_change().rolling(7).std()
-df["sentiment_volatility"] = df["avg_sentiment"].rolling(7).std()
-st.plotly_chart(px.line(df, x="date", y=["price_volatility", "sentiment_volatility"], title="Rolling Volatility"), use_container_width=True)
+# price_volatility / sentiment_volatility / MA_7 / MA_30 come precomputed from the shared panel
+with timed("volatility"):
+    st.plotly_chart(chart("volatility", version, company, date_range, window, max_points), use_container_width=True)
 
 # ------------ Moving Averages ------------
 st.subheader("📊 Moving Averages")
-df["MA_7"] = df["Close"].rolling(7).mean()
-df["MA_30"] = df["Close"].rolling(30).mean()
-st.plotly_chart(px.line(df, x="date", y=["Close", "MA_7", "MA_30"], title="7 & 30-Day MAs"), use_container_width=True)
+with timed("moving averages"):
+    st.plotly_chart(chart("moving_averages", version, company, date_range, window, max_points), use_container_width=True)
 
 # ------------ Sentiment Histogram ------------
 st.subheader("📊 Sentiment Distribution")
-st.plotly_chart(px.histogram(df, x="avg_sentiment", nbins=30, title="Histogram of Sentiment"), use_container_width=True)
-
-# ------------ Strategy Backtest ------------
-st.subheader("📈 Strategy Backtest")
-df["position"] = df["custom_alert"].replace({True: 1, False: 0}).ffill()
-df["strategy_return"] = df["position"].shift() * df["stock_price_return"]
-df["cumulative_strategy"] = (1 + df["strategy_return"]).cumprod()
-df["cumulative_stock"] = (1 + df["stock_price_return"]).cumprod()
-fig_bt = px.line(df, x="date", y=["cumulative_stock", "cumulative_strategy"], title="Cumulative Strategy vs. Stock")
-fig_bt.update_layout(yaxis_title="Cumulative Return")
-st.plotly_chart(fig_bt, use_container_width=True)
+with timed("histogram"):
+    st.plotly_chart(chart("histogram", version, company, date_range), use_container_width=True)
+
+# ------------ Article Search ------------
+# Keyword search over the full article history via the FTS index (scripts/article_index.py)
+@st.fragment
+def article_search():
+    with timed("article search"):
+        st.subheader("🔎 Article Search")
+        query = st.text_input("Keywords (all must match, `term*` for prefixes)", key="article_query")
+        only_company = st.checkbox(f"Only {company_name}", value=True, key="article_only_company")
+        if query:
+            hits = article_index.search(query, company if only_company else None)
+            st.caption(f"{len(hits)} articles (best {article_index.SEARCH_LIMIT} matches)")
+            st.dataframe(hits, hide_index=True, column_config={"url": st.column_config.LinkColumn("url")})
+    timing_caption("article search")
+
+article_search()
 
 # ------------ Export Section ------------
 if export_csv:
     st.download_button("Download CSV", df.to_csv(index=False).encode("utf-8"), selected_file, "text/csv")
-if st.sidebar.button("📷 Export Chart as PNG"):
-    st.download_button("Download Chart as PNG", pio.to_image(fig_bt, format="png"), f"{company_name}_chart.png", "image/png")
+if export_pdf:
+    report_threshold = st.session_state.get("alert_threshold", DEFAULT_ALERT_THRESHOLD)
+    st.download_button("Download PDF Report", cached_report(version, company, date_range, report_threshold, "pdf"),
+                       f"{company}_report.pdf", "application/pdf")
+
+# ------------ Debug Panel ------------
+if show_debug:
+    timings = st.session_state.get("timings", {})
+    with st.sidebar.expander("🐞 Rerun Latency", expanded=True):
+        st.metric("Full rerun", f"{(time.perf_counter() - rerun_start) * 1000:.1f} ms")
+        st.dataframe(pd.DataFrame(list(timings.items()), columns=["Section", "ms"]).round(1), hide_index=True)
+        st.caption(f"Data version: {version}")
+        st.caption("Default charts: " + ("precomputed specs" if precomputed_specs(version, company) else "built here"))
+        st.dataframe(payload_report(version, company, date_range, window, max_points).round(1), hide_index=True)
 
 # ------------ Footer ------------
 st.markdown("---")
@@ -5,6 +5,8 @@ from pathlib import Path
 # Add the project root to the Python path
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 from config import DAX_ARTICLES_FILE
+from scripts import raw_responses
+from scripts.storage import write_csv
 
 import requests
 import pandas as pd
@@ -26,15 +28,33 @@ COMPANIES = ['Adidas', 'Airbus', 'Allianz', 'BASF', 'Bayer', 'Beiersdorf', 'BMW'
 
 USER_AGENT = {"User-Agent": "Mozilla/5.0"}
 
-# Load existing data
-if DAX_ARTICLES_FILE.exists():
-    df_existing = pd.read_csv(DAX_ARTICLES_FILE, parse_dates=["publishedAt"])
-else:
-    df_existing = pd.DataFrame(columns=["company_name", "title", "description", "url", "publishedAt", "source"])
-
 def clean_html(raw_html):
     return re.sub('<[^<]+?>', '', raw_html)
 
+def parse_google_news(content, company):
+    """Article rows of a Google News RSS response; also used by raw_responses.py replay."""
+    soup = BeautifulSoup(content, features="xml")
+    items = soup.find_all("item")
+    news_data = []
+
+    for item in items:
+        title = clean_html(item.title.text)
+        link = item.link.text
+        pubDate = pd.to_datetime(item.pubDate.text).date() if item.pubDate else None
+        source = re.sub(r'^https?://(www\.)?', '', re.search(r'https?://[^/]+', link).group()).split('.')[0].capitalize()
+
+        news_data.append({
+            "company_name": company,
+            "title": title,
+            "description": "",  # Not available via RSS
+            "url": link,
+            "publishedAt": pubDate,
+            "source": source
+        })
+
+    return news_data
+
+
 def fetch_google_news(company):
     query = f"{company} after:2025-01-01"
     encoded_query = quote(query)
@@ -42,47 +62,52 @@ def fetch_google_news(company):
 
     try:
         response = requests.get(rss_url, headers=USER_AGENT, timeout=10)
-        soup = BeautifulSoup(response.content, features="xml")
-        items = soup.find_all("item")
-        news_data = []
-
-        for item in items:
-            title = clean_html(item.title.text)
-            link = item.link.text
-            pubDate = pd.to_datetime(item.pubDate.text).date() if item.pubDate else None
-            source = re.sub(r'^https?://(www\.)?', '', re.search(r'https?://[^/]+', link).group()).split('.')[0].capitalize()
-
-            news_data.append({
-                "company_name": company,
-                "title": title,
-                "description": "",  # Not available via RSS
-                "url": link,
-                "publishedAt": pubDate,
-                "source": source
-            })
-
-        return news_data
+        raw_responses.record("rss", response.content, {"company": company, "url": rss_url,
+                                                       "status": response.status_code})
+        return parse_google_news(response.content, company)
     except Exception as e:
         print(f"Failed to fetch RSS for {company}: {e}")
         return []
 
-# Collect articles from all companies
-all_articles = []
-for company in COMPANIES:
-    print(f"Fetching Google News for {company}...")
-    articles = fetch_google_news(company)
-    all_articles.extend(articles)
+def merge_google_news(frames):
+    """Merge article frames like a live run: first row per url wins, sorted by company and UTC time.
+
+    Also used by raw_responses.py replay.
+    """
+    frames = [f for f in frames if f is not None and not f.empty]
+    if not frames:
+        return pd.DataFrame(columns=["company_name", "title", "description", "url", "publishedAt", "source"])
+    df_combined = pd.concat(frames, ignore_index=True)
+    df_combined.drop_duplicates(subset=["url"], inplace=True)
+
+    # ✅ Fix: Ensure sorting doesn't fail on mixed types
+    df_combined["company_name"] = df_combined["company_name"].astype(str)
+    df_combined["publishedAt"] = pd.to_datetime(df_combined["publishedAt"], errors="coerce", utc=True)
+    df_combined.sort_values(by=["company_name", "publishedAt"], ascending=[True, True], inplace=True)
+    return df_combined
+
+
+def main():
+    # Load existing data
+    if DAX_ARTICLES_FILE.exists():
+        df_existing = pd.read_csv(DAX_ARTICLES_FILE, parse_dates=["publishedAt"])
+    else:
+        df_existing = pd.DataFrame(columns=["company_name", "title", "description", "url", "publishedAt", "source"])
+
+    # Collect articles from all companies
+    all_articles = []
+    for company in COMPANIES:
+        print(f"Fetching Google News for {company}...")
+        articles = fetch_google_news(company)
+        all_articles.extend(articles)
 
-# Merge and sort
-df_new = pd.DataFrame(all_articles)
-df_combined = pd.concat([df_existing, df_new], ignore_index=True)
-df_combined.drop_duplicates(subset=["url"], inplace=True)
+    # Merge and sort
+    df_new = pd.DataFrame(all_articles)
+    df_combined = merge_google_news([df_existing, df_new])
 
-# ✅ Fix: Ensure sorting doesn't fail on mixed types
-df_combined["company_name"] = df_combined["company_name"].astype(str)
-df_combined["publishedAt"] = pd.to_datetime(df_combined["publishedAt"], errors="coerce", utc=True)
-df_combined.sort_values(by=["company_name", "publishedAt"], ascending=[True, True], inplace=True)
+    write_csv(df_combined, DAX_ARTICLES_FILE, index=False)
+    print(f"✅ Saved {len(df_combined)} articles to {DAX_ARTICLES_FILE}")
 
 
-df_combined.to_csv(DAX_ARTICLES_FILE, index=False)
-print(f"✅ Saved {len(df_combined)} articles to {DAX_ARTICLES_FILE}")
+if __name__ == "__main__":
+    main()
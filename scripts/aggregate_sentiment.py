@@ -2,30 +2,46 @@ import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 from config import (
-    FULL_SENTIMENT_FILE,
     DAILY_SENTIMENT_FILE,
     WEEKLY_SENTIMENT_FILE,
     MONTHLY_SENTIMENT_FILE
 )
+from scripts.sentiment_store import load_scores
+from scripts.trading_calendar import assign_sessions
+from scripts.storage import write_csv
 import pandas as pd
 
 
-# Load full sentiment data
-df = pd.read_csv(FULL_SENTIMENT_FILE, parse_dates=['date'])
+def main():
+    # Load only the numeric score columns (article text lives in the content store)
+    df = load_scores(columns=['company_name', 'publishedAt', 'date', 'sentiment_score'])
+    df['company_name'] = df['company_name'].astype(str)
+    # Scores are stored as float32; VADER compounds have 4 decimals, so this is lossless
+    df['sentiment_score'] = df['sentiment_score'].astype('float64').round(4)
 
-# Daily aggregation
-daily = df.groupby(['company_name', df['date'].dt.date])['sentiment_score'].mean().reset_index()
-daily.rename(columns={'sentiment_score': 'avg_sentiment'}, inplace=True)
-daily.to_csv(DAILY_SENTIMENT_FILE, index=False)
+    # Attribute every article to its effective XETRA session (weekend, holiday and
+    # after-close news counts towards the next session); aggregate by session so
+    # the daily file lines up with the price dates
+    df = assign_sessions(df)
+    df['date'] = df['session']
 
-# Weekly aggregation
-weekly = df.groupby(['company_name', df['date'].dt.to_period('W').apply(lambda r: r.start_time)])['sentiment_score'].mean().reset_index()
-weekly.rename(columns={'sentiment_score': 'avg_sentiment'}, inplace=True)
-weekly.to_csv(WEEKLY_SENTIMENT_FILE, index=False)
+    # Daily aggregation
+    daily = (df.groupby(['company_name', df['date'].dt.date])['sentiment_score']
+             .agg(avg_sentiment='mean', article_count='size').reset_index())
+    write_csv(daily, DAILY_SENTIMENT_FILE, index=False)
 
-# Monthly aggregation
-monthly = df.groupby(['company_name', df['date'].dt.to_period('M').apply(lambda r: r.start_time)])['sentiment_score'].mean().reset_index()
-monthly.rename(columns={'sentiment_score': 'avg_sentiment'}, inplace=True)
-monthly.to_csv(MONTHLY_SENTIMENT_FILE, index=False)
+    # Weekly aggregation
+    weekly = df.groupby(['company_name', df['date'].dt.to_period('W').apply(lambda r: r.start_time)])['sentiment_score'].mean().reset_index()
+    weekly.rename(columns={'sentiment_score': 'avg_sentiment'}, inplace=True)
+    write_csv(weekly, WEEKLY_SENTIMENT_FILE, index=False)
 
-print("📊 Aggregationen (daily, weekly, monthly) gespeichert.")
+    # Monthly aggregation
+    monthly = df.groupby(['company_name', df['date'].dt.to_period('M').apply(lambda r: r.start_time)])['sentiment_score'].mean().reset_index()
+    monthly.rename(columns={'sentiment_score': 'avg_sentiment'}, inplace=True)
+    write_csv(monthly, MONTHLY_SENTIMENT_FILE, index=False)
+
+    print("📊 Aggregationen (daily, weekly, monthly) gespeichert.")
+
+
+if __name__ == "__main__":
+    main()
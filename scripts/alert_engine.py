@@ -0,0 +1,376 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import argparse
+import json
+import logging
+import math
+import urllib.request
+from collections import deque
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from config import COMPANY_DATA_DIR, ALERT_RULES_FILE, ALERT_STATE_FILE, ALERT_LOG_FILE, HOT_DAYS
+from scripts.storage import write_text
+
+# ---------------- LOGGING ----------------
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+# ---------------- RULES ----------------
+# Rule types:
+#   sentiment_change  sentiment - previous sentiment <= threshold
+#   zscore            30-observation sentiment z-score <= threshold
+#   combined          sentiment_change rule AND price return < 0
+# Rules can be overridden with a JSON list in ALERT_RULES_FILE.
+ZSCORE_WINDOW = 30
+DEFAULT_RULES = [
+    {"name": "sentiment_drop", "type": "sentiment_change", "threshold": -0.3, "cooldown_days": 1},
+    {"name": "sentiment_drop_price_down", "type": "combined", "threshold": -0.3, "cooldown_days": 1},
+    {"name": "zscore_low", "type": "zscore", "threshold": -2.0, "cooldown_days": 3},
+]
+
+
+def load_rules(path=ALERT_RULES_FILE):
+    if Path(path).exists():
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    return DEFAULT_RULES
+
+
+class RollingStats:
+    """Welford mean/variance over the last `window` observations, O(1) per update."""
+
+    def __init__(self, window=ZSCORE_WINDOW, values=()):
+        self.window = window
+        self.values = deque()
+        self.mean = 0.0
+        self.m2 = 0.0
+        for v in values:
+            self.push(v)
+
+    def _add(self, x):
+        self.values.append(x)
+        delta = x - self.mean
+        self.mean += delta / len(self.values)
+        self.m2 += delta * (x - self.mean)
+
+    def _remove_oldest(self):
+        x = self.values.popleft()
+        n = len(self.values)
+        if n == 0:
+            self.mean, self.m2 = 0.0, 0.0
+            return
+        delta = x - self.mean
+        self.mean -= delta / n
+        self.m2 -= delta * (x - self.mean)
+
+    def push(self, x):
+        self._add(x)
+        if len(self.values) > self.window:
+            self._remove_oldest()
+        if self.m2 < 0:  # float drift, recompute from the (bounded) window
+            self.mean = sum(self.values) / len(self.values)
+            self.m2 = sum((v - self.mean) ** 2 for v in self.values)
+
+    def replace_last(self, x):
+        """Revise the newest observation (e.g. an intraday update of the same day)."""
+        old = self.values.pop()
+        n = len(self.values)
+        if n == 0:
+            self.mean, self.m2 = 0.0, 0.0
+        else:
+            delta = old - self.mean
+            self.mean -= delta / n
+            self.m2 -= delta * (old - self.mean)
+        self._add(x)
+
+    @property
+    def full(self):
+        return len(self.values) == self.window
+
+    def zscore(self, x):
+        if not self.full or self.m2 <= 0:
+            return math.nan
+        return (x - self.mean) / math.sqrt(self.m2 / (len(self.values) - 1))
+
+
+class CompanyState:
+    """Per-company online state: rolling sentiment stats, last values, last fire dates."""
+
+    def __init__(self):
+        self.stats = RollingStats()
+        self.last_date = None
+        self.last_sentiment = math.nan
+        self.last_close = math.nan
+        # values before the latest observation, used for intraday revisions
+        self.prev_sentiment = math.nan
+        self.prev_close = math.nan
+        self.pushed = False  # whether the latest observation is in the window
+        self.last_fired = {}
+
+    def to_dict(self):
+        return {
+            "window": list(self.stats.values),
+            "last_date": self.last_date,
+            "last_sentiment": self.last_sentiment,
+            "last_close": self.last_close,
+            "prev_sentiment": self.prev_sentiment,
+            "prev_close": self.prev_close,
+            "pushed": self.pushed,
+            "last_fired": self.last_fired,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls()
+        state.stats = RollingStats(values=data["window"])
+        for key in ["last_date", "last_sentiment", "last_close", "prev_sentiment", "prev_close", "pushed", "last_fired"]:
+            setattr(state, key, data[key])
+        return state
+
+
+def _num(value):
+    return math.nan if value is None else float(value)
+
+
+# ---------------- SINKS ----------------
+class FileSink:
+    """Appends fired alerts as JSON lines, each (company, rule, date) at most once."""
+
+    def __init__(self, path=ALERT_LOG_FILE):
+        self.path = Path(path)
+        self._written = None
+
+    def _keys(self):
+        if self._written is None:
+            self._written = set()
+            if self.path.exists():
+                with open(self.path, encoding="utf-8") as f:
+                    for line in filter(str.strip, f):
+                        alert = json.loads(line)
+                        self._written.add((alert["company"], alert["rule"], alert["date"]))
+        return self._written
+
+    def send(self, alert):
+        key = (alert["company"], alert["rule"], alert["date"])
+        if key in self._keys():
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(alert) + "\n")
+        self._written.add(key)
+
+
+class WebhookSink:
+    """POSTs each alert as JSON to a (local) webhook URL."""
+
+    def __init__(self, url, timeout=5):
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, alert):
+        request = urllib.request.Request(self.url, data=json.dumps(alert).encode("utf-8"),
+                                         headers={"Content-Type": "application/json"}, method="POST")
+        try:
+            urllib.request.urlopen(request, timeout=self.timeout).close()
+        except OSError as e:
+            logger.error(f"❌ Webhook delivery failed for {alert['company']}/{alert['rule']}: {e}")
+
+
+class LogSink:
+    def send(self, alert):
+        logger.info(f"🚨 {alert['company']} {alert['date']} {alert['rule']}: {alert['message']}")
+
+
+def build_sink(spec):
+    """'file', 'file:<path>', 'webhook:<url>' or 'log'."""
+    kind, _, target = spec.partition(":")
+    if kind == "file":
+        return FileSink(target) if target else FileSink()
+    if kind == "webhook":
+        return WebhookSink(target)
+    if kind == "log":
+        return LogSink()
+    raise ValueError(f"Unknown alert sink: {spec}")
+
+
+# ---------------- ENGINE ----------------
+# Delivered keys are kept by date, not count, so a --replay never re-sends
+# to webhook/email sinks: keys stay for SENT_KEEP_DAYS (company rows older
+# than the hot window are archived and not replayed), and a day older than
+# the pruned horizon (`sent_before`) counts as delivered.
+SENT_KEEP_DAYS = HOT_DAYS
+
+
+class AlertEngine:
+    def __init__(self, rules=None, sinks=None):
+        self.rules = rules if rules is not None else load_rules()
+        self.sinks = sinks if sinks is not None else [FileSink()]
+        self.companies = {}
+        self.sent = set()  # (company, rule, date) already delivered
+        self.sent_before = None  # every alert dated before this day was delivered (keys pruned)
+
+    # -------- persistence --------
+    def load_state(self, path=ALERT_STATE_FILE):
+        if not Path(path).exists():
+            return
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        self.companies = {c: CompanyState.from_dict(s) for c, s in data["companies"].items()}
+        self.sent = {tuple(k) for k in data["sent"]}
+        self.sent_before = data.get("sent_before")
+
+    def save_state(self, path=ALERT_STATE_FILE, keep_days=SENT_KEEP_DAYS):
+        if self.sent:
+            newest = max(k[2] for k in self.sent)
+            horizon = (date.fromisoformat(newest) - timedelta(days=keep_days)).isoformat()
+            self.sent_before = max(self.sent_before or horizon, horizon)
+            self.sent = {k for k in self.sent if k[2] >= self.sent_before}
+        write_text(path, json.dumps({"companies": {c: s.to_dict() for c, s in self.companies.items()},
+                                     "sent": sorted(self.sent, key=lambda k: k[2]), "sent_before": self.sent_before}))
+
+    def delivered(self, company, rule, day):
+        return (company, rule, day) in self.sent or (self.sent_before is not None and day < self.sent_before)
+
+    # -------- evaluation --------
+    def update(self, company, day, sentiment, close):
+        """Feed one observation; returns the alerts fired. O(1) per call.
+
+        An observation for the company's current day revises that day
+        (intraday updates); a later day appends a new observation.
+        """
+        day = str(day)[:10]
+        sentiment, close = _num(sentiment), _num(close)
+        state = self.companies.setdefault(company, CompanyState())
+        if state.last_date is not None and day < state.last_date:
+            return []
+
+        if day != state.last_date:
+            state.prev_sentiment, state.prev_close = state.last_sentiment, state.last_close
+            state.pushed = False
+        if not math.isnan(sentiment):
+            if state.pushed:
+                state.stats.replace_last(sentiment)
+            else:
+                state.stats.push(sentiment)
+                state.pushed = True
+        state.last_date, state.last_sentiment, state.last_close = day, sentiment, close
+
+        values = {
+            "sentiment": sentiment,
+            "sentiment_change": sentiment - state.prev_sentiment,
+            "price_return": close / state.prev_close - 1 if state.prev_close else math.nan,
+            "zscore": state.stats.zscore(sentiment) if not math.isnan(sentiment) else math.nan,
+        }
+        fired = []
+        for rule in self.rules:
+            if self._matches(rule, values) and self.delivered(company, rule["name"], day):
+                # delivered before (intraday revision, --replay): counts for the cooldown, not sent again
+                state.last_fired[rule["name"]] = day
+                continue
+            if self._matches(rule, values) and self._allowed(company, rule, day, state):
+                alert = self._alert(company, rule, day, values)
+                state.last_fired[rule["name"]] = day
+                self.sent.add((company, rule["name"], day))
+                for sink in self.sinks:
+                    sink.send(alert)
+                fired.append(alert)
+        return fired
+
+    @staticmethod
+    def _matches(rule, v):
+        kind, threshold = rule["type"], rule["threshold"]
+        if kind == "sentiment_change":
+            return v["sentiment_change"] <= threshold
+        if kind == "zscore":
+            return v["zscore"] <= threshold
+        if kind == "combined":
+            return v["sentiment_change"] <= threshold and v["price_return"] < 0
+        raise ValueError(f"Unknown rule type: {kind}")
+
+    def _allowed(self, company, rule, day, state):
+        if self.delivered(company, rule["name"], day):
+            return False  # dedup: intraday revisions of an already fired day
+        last = state.last_fired.get(rule["name"])
+        if last is None:
+            return True
+        gap = (date.fromisoformat(day) - date.fromisoformat(last)).days
+        return gap >= rule.get("cooldown_days", 0)
+
+    @staticmethod
+    def _alert(company, rule, day, v):
+        value = v["zscore"] if rule["type"] == "zscore" else v["sentiment_change"]
+        return {
+            "company": company,
+            "date": day,
+            "rule": rule["name"],
+            "value": round(value, 4),
+            "threshold": rule["threshold"],
+            "sentiment": v["sentiment"],
+            "price_return": None if math.isnan(v["price_return"]) else v["price_return"],
+            "message": f"{rule['type']} {value:.3f} <= {rule['threshold']}",
+            "fired_at": datetime.now().isoformat(timespec="seconds"),
+        }
+
+
+def run_new_rows(engine, directory=COMPANY_DATA_DIR):
+    """Feed every company CSV row newer than the engine's state (daily batch mode)."""
+    import pandas as pd
+
+    fired = []
+    for path in sorted(Path(directory).glob("*.csv")):
+        company = path.stem
+        last = engine.companies[company].last_date if company in engine.companies else None
+        df = pd.read_csv(path, usecols=["date", "avg_sentiment", "Close"], parse_dates=["date"])
+        df = df.sort_values("date")
+        if last is not None:
+            df = df[df["date"] >= pd.Timestamp(last)]
+        for row in df.itertuples(index=False):
+            fired += engine.update(company, row.date.date().isoformat(), row.avg_sentiment, row.Close)
+    return fired
+
+
+# ---------------- LOCAL WEBHOOK STAND-IN ----------------
+class _WebhookHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        alert = json.loads(body)
+        logger.info(f"📬 Webhook received: {alert['company']} {alert['date']} {alert['rule']}")
+        self.send_response(204)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming alert engine")
+    sub = parser.add_subparsers(dest="command")
+    run = sub.add_parser("run", help="feed new company_data rows through the rules")
+    run.add_argument("--sink", action="append", help="file[:path] | webhook:<url> | log (repeatable)")
+    run.add_argument("--replay", action="store_true",
+                     help="rebuild the state from all history (alerts already delivered are not sent again)")
+    serve = sub.add_parser("serve-webhook", help="local webhook receiver for testing")
+    serve.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    if args.command == "serve-webhook":
+        logger.info(f"📡 Webhook stand-in listening on http://127.0.0.1:{args.port}/")
+        HTTPServer(("127.0.0.1", args.port), _WebhookHandler).serve_forever()
+        return
+
+    if args.command is None:
+        args = run.parse_args([])
+    engine = AlertEngine(sinks=[build_sink(s) for s in (args.sink or ["file", "log"])])
+    engine.load_state()
+    if args.replay:
+        # rolling stats start over, the delivered keys are kept
+        engine.companies = {}
+    fired = run_new_rows(engine)
+    engine.save_state()
+    logger.info(f"✅ {len(fired)} alerts fired, state saved to {ALERT_STATE_FILE.name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pandas as pd
+from scripts.xcorr_engine import lagged_correlations
+
+# Computations behind the dashboard sections, shared with batch jobs.
+# All functions are pure: they never modify the frame they are given.
+
+DATE_RANGES = ["All", "YTD", "1 Year", "3 Years"]
+CORR_COLUMNS = ["avg_sentiment", "sentiment_7d", "sentiment_zscore", "Close", "stock_price_return", "return_7d"]
+ALERT_COLUMNS = ["date", "avg_sentiment", "sentiment_change", "Close", "stock_price_return"]
+ZSCORE_ALERT_COLUMNS = ["date", "sentiment_zscore", "Close", "stock_price_return"]
+DEFAULT_ALERT_THRESHOLD = -0.3
+DEFAULT_ZSCORE_THRESHOLD = -1.0
+MAX_LAG = 7
+
+
+def filter_date_range(df, date_range):
+    if date_range == "All" or df.empty:
+        return df
+    max_date = df["date"].max()
+    if date_range == "YTD":
+        min_date = pd.to_datetime(f"{max_date.year}-01-01")
+    elif date_range == "1 Year":
+        min_date = max_date - pd.DateOffset(years=1)
+    elif date_range == "3 Years":
+        min_date = max_date - pd.DateOffset(years=3)
+    else:
+        raise ValueError(f"Unknown date range: {date_range}")
+    return df[df["date"] >= min_date].reset_index(drop=True)
+
+
+def correlation_matrix(df, cols=CORR_COLUMNS):
+    return df[[c for c in cols if c in df.columns]].corr()
+
+
+def lagged_correlation(df, max_lag=MAX_LAG):
+    corr, n = lagged_correlations(df["stock_price_return"].to_numpy(dtype="float64")[None],
+                                  df["avg_sentiment"].to_numpy(dtype="float64")[None], max_lag)
+    return pd.DataFrame({"Lag": range(-max_lag, max_lag + 1), "Correlation": corr[0], "n": n[0].astype(int)})
+
+
+def alert_rows(df, alert_threshold):
+    return df.loc[df["sentiment_change"] <= alert_threshold, ALERT_COLUMNS]
+
+
+def zscore_alert_rows(df, z_thresh):
+    return df.loc[df["sentiment_zscore"] <= z_thresh, ZSCORE_ALERT_COLUMNS]
+
+
+def backtest(df, alert_threshold):
+    """Long the day after every alert day, flat otherwise."""
+    out = df[["date", "stock_price_return"]].copy()
+    out["position"] = (df["sentiment_change"] <= alert_threshold).astype(int)
+    out["strategy_return"] = out["position"].shift() * out["stock_price_return"]
+    out["cumulative_strategy"] = (1 + out["strategy_return"]).cumprod()
+    out["cumulative_stock"] = (1 + out["stock_price_return"]).cumprod()
+    return out
@@ -0,0 +1,432 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import argparse
+import hashlib
+import http.client
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from config import (COMPANY_DATA_DIR, SENTIMENT_DIR, DAILY_SENTIMENT_FILE, WEEKLY_SENTIMENT_FILE,
+                    MONTHLY_SENTIMENT_FILE, INDEX_SENTIMENT_FILE, ARTICLE_INDEX_FILE)
+from scripts import analytics, article_index
+from scripts.panel import PanelStore, company_key, data_fingerprint
+from scripts.storage import pinned, read_path
+
+# ---------------- LOGGING ----------------
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+# Read-only HTTP API over the pipeline outputs (standard library server):
+#
+#     GET /health                              data versions and snapshot
+#     GET /companies                           company keys with row counts and date span
+#     GET /series/<company>                    panel rows (prices, sentiment, features)
+#     GET /aggregates/<daily|weekly|monthly|index>?company=&scheme=
+#     GET /alerts/<company>?threshold=-0.3     or ?zscore=-1.0
+#     GET /articles/<company>?date=YYYY-MM-DD  articles behind one day
+#     GET /articles?q=<keywords>&company=&limit=
+#
+# Every table endpoint takes start=/end= (inclusive dates) and columns=a,b,
+# and answers JSON, or an Arrow IPC stream with format=arrow (or an Accept
+# header of ARROW_MIME). Responses carry an ETag derived from the data
+# version and the request, so If-None-Match revalidation is a 304 without
+# touching the data.
+#
+# Series are served from the PanelStore's memory-mapped Arrow table: a
+# request is a zero-copy slice (binary search on the sorted dates, column
+# projection) and the panel and aggregates are reloaded in the background
+# when a pipeline run publishes new files.
+DEFAULT_PORT = 8502
+POLL_SECONDS = 30
+ARROW_MIME = "application/vnd.apache.arrow.stream"
+AGGREGATE_FILES = {
+    "daily": DAILY_SENTIMENT_FILE,
+    "weekly": WEEKLY_SENTIMENT_FILE,
+    "monthly": MONTHLY_SENTIMENT_FILE,
+    "index": INDEX_SENTIMENT_FILE,
+}
+
+
+class ApiError(Exception):
+    """A request the API answers with an error status and a JSON message."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# ---------------- DATA ----------------
+class ApiData:
+    """In-memory data behind the API, reloaded when the pipeline outputs change."""
+
+    def __init__(self, directory=COMPANY_DATA_DIR, poll_interval=POLL_SECONDS):
+        self.panel = PanelStore(directory)
+        self.poll_interval = poll_interval
+        self._aggregates = (None, {})
+        self.company_listing = (None, None)
+        self._stop = threading.Event()
+        self._watcher = None
+
+    def refresh(self):
+        self.panel.refresh()
+        # aggregates come from the same snapshot as the panel
+        with pinned(self.panel.snapshot):
+            version = data_fingerprint(SENTIMENT_DIR, "*.csv")
+            if version == self._aggregates[0]:
+                return
+            tables = {}
+            for name, path in AGGREGATE_FILES.items():
+                path = read_path(path)
+                if not path.exists():
+                    continue
+                df = pd.read_csv(path, parse_dates=["date"])
+                if "company_name" in df.columns:
+                    df.insert(0, "company", df["company_name"].map(company_key))
+                tables[name] = df.sort_values("date", kind="stable").reset_index(drop=True)
+        self._aggregates = (version, tables)
+        logger.info(f"🔄 Aggregates loaded: {', '.join(tables)} (version {version})")
+
+    def start_watcher(self):
+        if self._watcher is not None:
+            return
+        self._watcher = threading.Thread(target=self._watch, name="api-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watcher(self):
+        self._stop.set()
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.warning(f"⚠️ Refresh failed, keeping the loaded data: {e}")
+
+    # Data versions for ETags, one per source
+    def panel_version(self):
+        return self.panel.version
+
+    def aggregates_version(self):
+        return self._aggregates[0]
+
+    def articles_version(self):
+        if not ARTICLE_INDEX_FILE.exists():
+            return "none"
+        stat = ARTICLE_INDEX_FILE.stat()
+        return f"{stat.st_mtime_ns:x}{stat.st_size:x}"
+
+    def aggregate(self, name):
+        tables = self._aggregates[1]
+        if name not in tables:
+            raise ApiError(404, f"Unknown aggregate {name!r}; available: {', '.join(tables)}")
+        return tables[name]
+
+    def company_table(self, company):
+        if company not in self.panel.offsets():
+            raise ApiError(404, f"Unknown company {company!r}")
+        return self.panel.company_table(company)
+
+
+# ---------------- QUERY PARAMETERS ----------------
+def _timestamp(params, name):
+    value = params.get(name)
+    if value is None:
+        return None
+    try:
+        return pd.Timestamp(value)
+    except ValueError:
+        raise ApiError(400, f"Invalid {name} date {value!r}") from None
+
+
+def _float(params, name, default=None):
+    value = params.get(name)
+    if value is None:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        raise ApiError(400, f"Invalid {name} {value!r}") from None
+
+
+def _columns(params, available, keep=("date",)):
+    """Requested columns (always with the `keep` ones first), or None for all."""
+    if "columns" not in params:
+        return None
+    requested = [c for c in params["columns"].split(",") if c]
+    unknown = [c for c in requested if c not in available]
+    if unknown:
+        raise ApiError(400, f"Unknown columns {', '.join(unknown)}; available: {', '.join(available)}")
+    return [c for c in keep if c in available] + [c for c in requested if c not in keep]
+
+
+def slice_table(table, params):
+    """Date range by binary search on the sorted dates, then column projection (zero-copy)."""
+    start, end = _timestamp(params, "start"), _timestamp(params, "end")
+    if start is not None or end is not None:
+        dates = table.column("date").to_numpy()
+        lo = 0 if start is None else int(np.searchsorted(dates, start.to_datetime64(), "left"))
+        hi = len(dates) if end is None else int(np.searchsorted(dates, end.to_datetime64(), "right"))
+        table = table.slice(lo, max(hi - lo, 0))
+    columns = _columns(params, table.column_names)
+    return table if columns is None else table.select(columns)
+
+
+def filter_frame(df, params):
+    """slice_table for pandas frames (aggregates, alerts, articles)."""
+    start, end = _timestamp(params, "start"), _timestamp(params, "end")
+    if start is not None:
+        df = df[df["date"] >= start]
+    if end is not None:
+        df = df[df["date"] <= end]
+    columns = _columns(params, list(df.columns), keep=("company", "date"))
+    return df if columns is None else df[columns]
+
+
+# ---------------- RESPONSES ----------------
+def etag(version, path, params):
+    digest = hashlib.sha1(f"{version}|{path}|{sorted(params.items())}".encode())
+    return f'"{digest.hexdigest()[:20]}"'
+
+
+def arrow_bytes(table):
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def json_bytes(df, version):
+    rows = df.to_json(orient="records", date_format="iso", date_unit="s")
+    return f'{{"version": "{version}", "count": {len(df)}, "rows": {rows}}}'.encode("utf-8")
+
+
+def encode(result, version, wants_arrow):
+    """(content type, body) for a pandas frame or Arrow table."""
+    if wants_arrow:
+        if isinstance(result, pd.DataFrame):
+            result = pa.Table.from_pandas(result, preserve_index=False)
+        return ARROW_MIME, arrow_bytes(result)
+    if isinstance(result, pa.Table):
+        result = result.to_pandas()
+    return "application/json", json_bytes(result, version)
+
+
+# ---------------- ROUTES ----------------
+def route(data, parts, params):
+    """(version, compute) for a request path; compute() builds the table or a dict."""
+    head, rest = (parts[0], parts[1:]) if parts else ("", [])
+    if head == "health" and not rest:
+        return "health", lambda: {"panel_version": data.panel_version(), "aggregates_version": data.aggregates_version(),
+                                  "articles_version": data.articles_version(), "snapshot": data.panel.snapshot,
+                                  "companies": len(data.panel.offsets())}
+    if head == "companies" and not rest:
+        return data.panel_version(), lambda: _companies(data)
+    if head == "series" and len(rest) == 1:
+        return data.panel_version(), lambda: slice_table(data.company_table(rest[0]), params)
+    if head == "aggregates" and len(rest) == 1:
+        return data.aggregates_version(), lambda: _aggregate(data, rest[0], params)
+    if head == "alerts" and len(rest) == 1:
+        return data.panel_version(), lambda: _alerts(data, rest[0], params)
+    if head == "articles" and len(rest) <= 1:
+        return data.articles_version(), lambda: _articles(rest[0] if rest else None, params)
+    raise ApiError(404, f"Unknown endpoint /{'/'.join(parts)}")
+
+
+def _companies(data):
+    version, listing = data.company_listing
+    if version == data.panel_version():
+        return listing
+    rows = []
+    for company in data.panel.companies():
+        dates = data.panel.company_table(company).column("date")
+        rows.append({"company": company, "rows": len(dates),
+                     "first_date": dates[0].as_py() if len(dates) else None,
+                     "last_date": dates[-1].as_py() if len(dates) else None})
+    listing = pd.DataFrame(rows, columns=["company", "rows", "first_date", "last_date"])
+    data.company_listing = (data.panel_version(), listing)
+    return listing
+
+
+def _aggregate(data, name, params):
+    df = data.aggregate(name)
+    if "company" in params and "company" in df.columns:
+        df = df[df["company"] == company_key(params["company"])]
+    if "scheme" in params and "scheme" in df.columns:
+        df = df[df["scheme"] == params["scheme"]]
+    return filter_frame(df, params)
+
+
+def _alerts(data, company, params):
+    frame = data.company_table(company).to_pandas()
+    if "zscore" in params:
+        alerts = analytics.zscore_alert_rows(frame, _float(params, "zscore"))
+    else:
+        alerts = analytics.alert_rows(frame, _float(params, "threshold", analytics.DEFAULT_ALERT_THRESHOLD))
+    return filter_frame(alerts.reset_index(drop=True), params)
+
+
+def _articles(company, params):
+    if company is not None:
+        day = _timestamp(params, "date")
+        if day is None:
+            raise ApiError(400, "/articles/<company> needs date=YYYY-MM-DD")
+        df = article_index.articles_for(company, day)
+    elif params.get("q"):
+        df = article_index.search(params["q"], params.get("company"), params.get("start"), params.get("end"),
+                                  int(_float(params, "limit", article_index.SEARCH_LIMIT)))
+    else:
+        raise ApiError(400, "/articles needs q=<keywords> (or use /articles/<company>?date=)")
+    df = df.assign(date=pd.to_datetime(df["date"]))
+    return filter_frame(df, params)
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive for bulk and benchmark clients
+    # headers and body go out as two writes; without TCP_NODELAY every
+    # keep-alive response waits ~40 ms for the client's delayed ACK
+    disable_nagle_algorithm = True
+    data = None
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        parts = [unquote(p) for p in url.path.split("/") if p]
+        wants_arrow = params.pop("format", None) == "arrow" or ARROW_MIME in self.headers.get("Accept", "")
+        try:
+            version, compute = route(self.data, parts, params)
+            tag = etag(version, url.path, {**params, "format": "arrow" if wants_arrow else "json"})
+            if self.headers.get("If-None-Match") == tag:
+                self._send(304, headers={"ETag": tag})
+                return
+            result = compute()
+            if isinstance(result, dict):
+                body = json.dumps(result, default=str).encode("utf-8")
+                self._send(200, "application/json", body, {"Cache-Control": "no-cache"})
+                return
+            content_type, body = encode(result, version, wants_arrow)
+            self._send(200, content_type, body, {"ETag": tag, "Cache-Control": "no-cache"})
+        except ApiError as e:
+            self._send(e.status, "application/json", json.dumps({"error": str(e)}).encode("utf-8"))
+        except Exception as e:
+            logger.exception(f"❌ {self.path}")
+            self._send(500, "application/json", json.dumps({"error": str(e)}).encode("utf-8"))
+
+    def _send(self, status, content_type=None, body=b"", headers=None):
+        self.send_response(status)
+        if content_type:
+            self.send_header("Content-Type", content_type)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+
+def make_server(data, host="127.0.0.1", port=DEFAULT_PORT):
+    handler = type("BoundApiHandler", (ApiHandler,), {"data": data})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+# ---------------- LOAD TEST ----------------
+def _bench_paths(data):
+    companies = [quote(c) for c in data.panel.companies()]
+    last = data.company_table(data.panel.companies()[0]).column("date")[-1].as_py()
+    start = (pd.Timestamp(last) - pd.Timedelta(days=14)).strftime("%Y-%m-%d")
+    return {
+        "series (json)": [f"/series/{c}" for c in companies],
+        "series (arrow)": [f"/series/{c}?format=arrow" for c in companies],
+        "series range+columns": [f"/series/{c}?start={start}&columns=Close,avg_sentiment" for c in companies],
+        "aggregates daily": [f"/aggregates/daily?company={c}" for c in companies],
+        "alerts": [f"/alerts/{c}?threshold=-0.3" for c in companies],
+        "companies": ["/companies"],
+    }
+
+
+def benchmark(clients=8, requests=2000, data=None):
+    """p50/p99 latency per endpoint under `clients` concurrent keep-alive clients."""
+    data = data or ApiData()
+    data.refresh()
+    server = make_server(data, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+    paths = _bench_paths(data)
+    # every endpoint twice: a full response, and a revalidation with its ETag
+    jobs = [(name, paths[name][i % len(paths[name])], revalidate)
+            for i in range(requests // (2 * len(paths)))
+            for name in paths for revalidate in (False, True)]
+
+    def client(chunk):
+        conn = http.client.HTTPConnection("127.0.0.1", port)
+        tags, samples = {}, []
+        for name, path, revalidate in chunk:
+            headers = {"If-None-Match": tags[path]} if revalidate and path in tags else {}
+            start = time.perf_counter()
+            conn.request("GET", path, headers=headers)
+            response = conn.getresponse()
+            body = response.read()
+            samples.append((name + (" 304" if response.status == 304 else ""), (time.perf_counter() - start) * 1000, len(body)))
+            tags[path] = response.getheader("ETag")
+        conn.close()
+        return samples
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(clients) as pool:
+        samples = [s for chunk in pool.map(client, [jobs[i::clients] for i in range(clients)]) for s in chunk]
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+    server.server_close()
+
+    df = pd.DataFrame(samples, columns=["endpoint", "ms", "bytes"])
+    result = df.groupby("endpoint").agg(requests=("ms", "size"), p50_ms=("ms", "median"),
+                                        p99_ms=("ms", lambda s: s.quantile(0.99)), bytes=("bytes", "median"))
+    return result, len(df) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Read API over company series, aggregates, alerts and articles")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve = sub.add_parser("serve", help="serve the API")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve.add_argument("--poll", type=float, default=POLL_SECONDS, help="seconds between data version checks")
+    bench = sub.add_parser("bench", help="load test: p50/p99 latency per endpoint")
+    bench.add_argument("--clients", type=int, default=8)
+    bench.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    if args.command == "bench":
+        result, throughput = benchmark(args.clients, args.requests)
+        print(result.round(2).to_string())
+        print(f"\n{throughput:.0f} requests/s with {args.clients} clients")
+        return
+
+    data = ApiData(poll_interval=args.poll)
+    data.refresh()
+    data.start_watcher()
+    server = make_server(data, args.host, args.port)
+    logger.info(f"🚀 API serving {len(data.panel.companies())} companies on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        data.stop_watcher()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,476 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import argparse
+import json
+import logging
+import time
+import pandas as pd
+from config import (ARCHIVE_DIR, DAX_ARTICLES_FILE, SCORES_FILE, ARTICLE_CONTENT_FILE, COMPANY_DATA_DIR,
+                    HOT_DAYS, TEXT_RETENTION_DAYS)
+from scripts.storage import write_csv, write_parquet, write_text, read_path, current_snapshot
+
+# ---------------- LOGGING ----------------
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+# Two storage tiers. The hot tier is the files the pipeline has always
+# written (raw_data/, sentiment/, company_data/) and keeps only the last
+# HOT_DAYS. Older rows are compacted into one zstd Parquet file per
+# dataset and year, archive/<dataset>/<year>.parquet, next to a manifest
+# with the row count, file size, the CSV size the rows had in the hot tier
+# and per-column min/max/null counts.
+#
+# The cutoff is counted back from the newest row of each dataset, not from
+# today, so a pipeline that stopped fetching does not archive everything.
+# Readers that need history (load_scores/load_content, load_panel, the
+# feature context in company_csvs) read both tiers through read(), which
+# skips archive years whose date range lies outside the requested window.
+# Stages that only look at recent rows (fetch de-duplication, quality
+# checks) keep reading the hot files alone.
+#
+# Article text (title/description) older than TEXT_RETENTION_DAYS is
+# dropped from the archived raw articles and article content; scores,
+# urls and ids are kept, so aggregates and the backtest do not change.
+DATASETS = {
+    "articles": {"date": "publishedAt", "keys": ["company_name", "publishedAt", "title"],
+                 "text": ["title", "description"]},
+    "scores": {"date": "date", "keys": ["article_id"]},
+    # article text follows its score row into the same archive year
+    "content": {"date": None, "keys": ["article_id"], "text": ["title", "description"]},
+    "company_data": {"date": "date", "keys": ["company", "date"]},
+}
+COMPRESSION = "zstd"
+
+
+def dataset_dir(dataset, directory=ARCHIVE_DIR):
+    return Path(directory) / dataset
+
+
+def manifest_path(dataset, directory=ARCHIVE_DIR):
+    return dataset_dir(dataset, directory) / "manifest.json"
+
+
+def load_manifest(dataset, directory=ARCHIVE_DIR):
+    path = read_path(manifest_path(dataset, directory))
+    if not path.exists():
+        return {"years": {}}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _naive(ts):
+    """Timestamp without timezone (archive dates are stored as naive UTC)."""
+    if ts is None or pd.isna(ts):
+        return None
+    ts = pd.Timestamp(ts)
+    return ts.tz_convert(None) if ts.tzinfo is not None else ts
+
+
+def _dates(values):
+    """Naive UTC datetimes for a column of mixed strings/timestamps."""
+    dates = pd.to_datetime(values, errors="coerce", utc=True, format="ISO8601")
+    return dates.dt.tz_localize(None)
+
+
+def column_stats(df, date_column=None):
+    """Per-column null count, plus min/max for numeric and date columns."""
+    stats = {}
+    for col in df.columns:
+        s = df[col]
+        if col == date_column and not pd.api.types.is_datetime64_any_dtype(s):
+            s = _dates(s)  # raw articles keep their timestamp strings
+        entry = {"nulls": int(s.isna().sum())}
+        if s.notna().any():
+            if pd.api.types.is_datetime64_any_dtype(s):
+                entry["min"], entry["max"] = str(_naive(s.min())), str(_naive(s.max()))
+            elif pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s):
+                entry["min"], entry["max"] = float(s.min()), float(s.max())
+        stats[col] = entry
+    return stats
+
+
+def _year_range(entry, date_column):
+    stats = entry["columns"].get(date_column, {}) if date_column else {}
+    if "min" not in stats:
+        return None, None
+    return pd.Timestamp(stats["min"]), pd.Timestamp(stats["max"])
+
+
+# ---------------- READERS ----------------
+def read(dataset, columns=None, start=None, end=None, filters=None, directory=ARCHIVE_DIR):
+    """Archived rows of `dataset` (None if nothing is archived).
+
+    Years whose date range ends before `start` or begins after `end` are
+    not opened; `filters` are passed to the Parquet reader (pyarrow DNF).
+    The years are concatenated as Arrow tables and converted to pandas once.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    years = load_manifest(dataset, directory)["years"]
+    date_column = DATASETS[dataset]["date"]
+    start, end = _naive(start), _naive(end)
+    tables = []
+    for year in sorted(years):
+        entry = years[year]
+        low, high = _year_range(entry, date_column)
+        if low is not None and ((start is not None and high < start) or (end is not None and low > end)):
+            continue
+        table = pq.read_table(read_path(dataset_dir(dataset, directory) / entry["file"]),
+                              columns=columns, filters=filters)
+        if table.num_rows:
+            tables.append(table)
+    if not tables:
+        return None
+    frame = pa.concat_tables(tables, promote_options="permissive").to_pandas()
+    if date_column in frame.columns and pd.api.types.is_datetime64_any_dtype(frame[date_column]):
+        dates = frame[date_column]
+        if isinstance(dates.dtype, pd.DatetimeTZDtype):
+            dates = dates.dt.tz_localize(None)
+        keep = pd.Series(True, index=frame.index)
+        if start is not None:
+            keep &= dates >= start
+        if end is not None:
+            keep &= dates <= end
+        if not keep.all():
+            frame = frame[keep].reset_index(drop=True)
+    return frame if len(frame) else None
+
+
+def newest(dataset, directory=ARCHIVE_DIR):
+    """Latest archived date of `dataset` (from the manifest), None if nothing is archived."""
+    ranges = [_year_range(entry, DATASETS[dataset]["date"]) for entry in load_manifest(dataset, directory)["years"].values()]
+    highs = [high for _, high in ranges if high is not None]
+    return max(highs) if highs else None
+
+
+def version(dataset, directory=ARCHIVE_DIR):
+    """Manifest path for data fingerprints (rewritten on every compaction)."""
+    return read_path(manifest_path(dataset, directory))
+
+
+# ---------------- COMPACTION ----------------
+def _csv_bytes(df):
+    return len(df.to_csv(index=False).encode("utf-8"))
+
+
+def _merge_year(dataset, year, part, manifest, directory, source_bytes=0):
+    """Add `part` to the dataset's archive file for `year`, returns the new row count."""
+    path = dataset_dir(dataset, directory) / f"{year}.parquet"
+    if path.exists():
+        part = pd.concat([pd.read_parquet(path), part], ignore_index=True)
+    part = part.drop_duplicates(subset=DATASETS[dataset]["keys"], keep="last").reset_index(drop=True)
+    entry = manifest["years"].setdefault(str(year), {"source_bytes": 0})
+    entry["source_bytes"] += source_bytes
+    _write_year(dataset, path, part, entry)
+    return len(part)
+
+
+def _write_year(dataset, path, frame, entry):
+    write_parquet(frame, path, index=False, compression=COMPRESSION)
+    entry.update({
+        "file": path.name,
+        "rows": len(frame),
+        "bytes": path.stat().st_size,
+        "columns": column_stats(frame, DATASETS[dataset]["date"]),
+    })
+
+
+def _apply_retention(dataset, cutoff, manifest, directory, dates_of=None, purged_ids=None):
+    """Null the text of archived rows older than `cutoff`; returns the years checked.
+
+    Years already purged up to `cutoff` are not opened again. `dates_of`
+    gives the row dates for datasets without a date column of their own;
+    the article ids of purged rows are appended to `purged_ids` if given.
+    """
+    purged = checked = 0
+    for year, entry in sorted(manifest["years"].items()):
+        if int(year) > cutoff.year or entry.get("text_dropped_before", "") >= str(cutoff):
+            continue
+        path = dataset_dir(dataset, directory) / entry["file"]
+        frame = pd.read_parquet(path)
+        dates = dates_of(year, frame) if dates_of else _dates(frame[DATASETS[dataset]["date"]])
+        old = (dates < cutoff).fillna(False).to_numpy() & frame[DATASETS[dataset]["text"]].notna().any(axis=1).to_numpy()
+        if old.any():
+            if purged_ids is not None and "article_id" in frame.columns:
+                purged_ids.extend(frame.loc[old, "article_id"].tolist())
+            frame.loc[old, DATASETS[dataset]["text"]] = None
+            _write_year(dataset, path, frame, entry)
+            purged += int(old.sum())
+        entry["text_dropped_before"] = str(cutoff)
+        checked += 1
+    if purged:
+        logger.info(f"🗑️ {dataset}: text of {purged} archived rows older than {cutoff:%Y-%m-%d} dropped")
+    return checked
+
+
+def _save_manifest(dataset, manifest, directory):
+    manifest["updated"] = pd.Timestamp.now().isoformat(timespec="seconds")
+    write_text(manifest_path(dataset, directory), json.dumps(manifest, indent=2, sort_keys=True))
+
+
+def _cutoffs(dates, hot_days, retention_days):
+    newest = dates.max()
+    if pd.isna(newest):
+        return None, None
+    return newest.normalize() - pd.Timedelta(days=hot_days), newest.normalize() - pd.Timedelta(days=retention_days)
+
+
+def _log_move(dataset, moved, kept, dry_run):
+    verb = "would move" if dry_run else "moved"
+    logger.info(f"🧊 {dataset}: {verb} {moved} rows to the archive, {kept} stay hot")
+
+
+def compact_articles(hot_days, retention_days, directory, dry_run=False):
+    path = DAX_ARTICLES_FILE
+    if not path.exists():
+        return 0
+    articles = pd.read_csv(path)
+    dates = _dates(articles["publishedAt"])
+    hot_cutoff, text_cutoff = _cutoffs(dates, hot_days, retention_days)
+    if hot_cutoff is None:
+        return 0
+    # rows with an unparseable date stay hot, the quality stage reports them
+    cold = (dates < hot_cutoff).fillna(False).to_numpy()
+    _log_move("articles", int(cold.sum()), int((~cold).sum()), dry_run)
+    if dry_run:
+        return int(cold.sum())
+
+    manifest = load_manifest("articles", directory)
+    moved = articles[cold]
+    for year, part in moved.groupby(dates[cold].dt.year.to_numpy()):
+        _merge_year("articles", int(year), part, manifest, directory, source_bytes=_csv_bytes(part))
+    if _apply_retention("articles", text_cutoff, manifest, directory) or cold.any():
+        _save_manifest("articles", manifest, directory)
+    if cold.any():
+        write_csv(articles[~cold], path, index=False)
+    return int(cold.sum())
+
+
+def compact_scores(hot_days, retention_days, directory, dry_run=False):
+    from scripts.sentiment_store import store_exists, load_scores, SCORE_COLUMNS, CONTENT_COLUMNS
+
+    if not store_exists():
+        load_scores(columns=["article_id"])  # migrates the legacy CSV once
+        if not store_exists():
+            return 0
+    scores = pd.read_parquet(SCORES_FILE)
+    content = pd.read_parquet(ARTICLE_CONTENT_FILE)
+    hot_cutoff, text_cutoff = _cutoffs(scores["date"], hot_days, retention_days)
+    if hot_cutoff is None:
+        return 0
+    cold = (scores["date"] < hot_cutoff).to_numpy()
+    _log_move("scores", int(cold.sum()), int((~cold).sum()), dry_run)
+    if dry_run:
+        return int(cold.sum())
+
+    score_manifest = load_manifest("scores", directory)
+    content_manifest = load_manifest("content", directory)
+    moved = scores[cold]
+    # an id scored for several companies stays hot while any of its rows does
+    hot_ids = scores.loc[~cold, "article_id"]
+    for year, part in moved.groupby(moved["date"].dt.year.to_numpy()):
+        text = content[content["article_id"].isin(part["article_id"]) & ~content["article_id"].isin(hot_ids)]
+        _merge_year("scores", int(year), part[SCORE_COLUMNS], score_manifest, directory, source_bytes=_csv_bytes(part))
+        _merge_year("content", int(year), text[CONTENT_COLUMNS], content_manifest, directory,
+                    source_bytes=_csv_bytes(text))
+
+    def score_dates(year, frame):
+        # content has no date: retention goes by the date of its score row
+        year_scores = pd.read_parquet(dataset_dir("scores", directory) / f"{year}.parquet", columns=["article_id", "date"])
+        return frame["article_id"].map(year_scores.groupby("article_id")["date"].max())
+
+    purged_ids = []
+    checked = _apply_retention("content", text_cutoff, content_manifest, directory, dates_of=score_dates,
+                               purged_ids=purged_ids)
+    if purged_ids:
+        # the full-text index holds its own copy of the text
+        from scripts.article_index import drop_text
+
+        logger.info(f"🗑️ article index: text of {drop_text(purged_ids)} articles dropped")
+    if cold.any():
+        _save_manifest("scores", score_manifest, directory)
+    if cold.any() or checked:
+        _save_manifest("content", content_manifest, directory)
+
+    if cold.any():
+        hot_scores = scores[~cold]
+        write_parquet(hot_scores, SCORES_FILE, index=False)
+        write_parquet(content[content["article_id"].isin(hot_scores["article_id"])], ARTICLE_CONTENT_FILE, index=False)
+    return int(cold.sum())
+
+
+def compact_company_data(hot_days, retention_days, directory, dry_run=False):
+    files = sorted(COMPANY_DATA_DIR.glob("*.csv"))
+    frames = {path: pd.read_csv(path, parse_dates=["date"]) for path in files}
+    newest = max((df["date"].max() for df in frames.values() if len(df)), default=None)
+    if newest is None:
+        return 0
+    hot_cutoff = newest.normalize() - pd.Timedelta(days=hot_days)
+    moved = []
+    for path, df in frames.items():
+        cold = (df["date"] < hot_cutoff).to_numpy()
+        if cold.any():
+            part = df[cold].copy()
+            part.insert(0, "company", path.stem)
+            moved.append((path, part, df[~cold]))
+    total = sum(len(part) for _, part, _ in moved)
+    _log_move("company_data", total, sum(len(df) for df in frames.values()) - total, dry_run)
+    if dry_run or not moved:
+        return total
+
+    manifest = load_manifest("company_data", directory)
+    cold_rows = pd.concat([part for _, part, _ in moved], ignore_index=True)
+    for year, part in cold_rows.groupby(cold_rows["date"].dt.year.to_numpy()):
+        _merge_year("company_data", int(year), part, manifest, directory,
+                    source_bytes=_csv_bytes(part.drop(columns="company")))
+    _save_manifest("company_data", manifest, directory)
+    # a company whose rows are all archived keeps an empty file (header only)
+    for path, _, hot in moved:
+        write_csv(hot, path, index=False)
+    return total
+
+
+def rename_companies(aliases, directory=ARCHIVE_DIR):
+    """Rename old company names (universe.aliases) in archived articles and scores; returns score rows renamed."""
+    from scripts.sentiment_store import rename_companies as rename_scores
+
+    manifest = load_manifest("articles", directory)
+    changed = False
+    for year, entry in sorted(manifest["years"].items()):
+        path = dataset_dir("articles", directory) / entry["file"]
+        frame = pd.read_parquet(path)
+        names = frame["company_name"].astype(str).str.strip().str.lower()
+        if names.isin(list(aliases)).any():
+            frame["company_name"] = names.replace(aliases)
+            frame = frame.drop_duplicates(subset=DATASETS["articles"]["keys"], keep="first").reset_index(drop=True)
+            _write_year("articles", path, frame, entry)
+            changed = True
+    if changed:
+        _save_manifest("articles", manifest, directory)
+
+    score_manifest = load_manifest("scores", directory)
+    content_manifest = load_manifest("content", directory)
+    renamed = 0
+    for year, entry in sorted(score_manifest["years"].items()):
+        path = dataset_dir("scores", directory) / entry["file"]
+        content_entry = content_manifest["years"].get(year)
+        content_path = dataset_dir("content", directory) / f"{year}.parquet"
+        content = pd.read_parquet(content_path) if content_entry else pd.DataFrame(columns=["article_id", "url"])
+        scores, content, n = rename_scores(pd.read_parquet(path), content, aliases)
+        if n:
+            _write_year("scores", path, scores, entry)
+            if content_entry:
+                _write_year("content", content_path, content, content_entry)
+            renamed += n
+    if renamed:
+        _save_manifest("scores", score_manifest, directory)
+        _save_manifest("content", content_manifest, directory)
+    return renamed
+
+
+def compact(hot_days=HOT_DAYS, retention_days=TEXT_RETENTION_DAYS, directory=ARCHIVE_DIR, dry_run=False):
+    """Move rows older than `hot_days` into the yearly archives; {dataset: rows moved}."""
+    if retention_days < hot_days:
+        raise ValueError(f"text retention ({retention_days} days) must cover the hot window ({hot_days} days)")
+    return {
+        "articles": compact_articles(hot_days, retention_days, directory, dry_run),
+        "scores": compact_scores(hot_days, retention_days, directory, dry_run),
+        "company_data": compact_company_data(hot_days, retention_days, directory, dry_run),
+    }
+
+
+# ---------------- REPORTS ----------------
+def _hot_files(dataset):
+    if dataset == "articles":
+        return [DAX_ARTICLES_FILE]
+    if dataset == "scores":
+        return [SCORES_FILE]
+    if dataset == "content":
+        return [ARTICLE_CONTENT_FILE]
+    return sorted(COMPANY_DATA_DIR.glob("*.csv"))
+
+
+def status(directory=ARCHIVE_DIR):
+    """Rows and bytes per tier, and what the archive saves over the hot-tier format."""
+    rows = []
+    for dataset in DATASETS:
+        years = load_manifest(dataset, directory)["years"]
+        hot_bytes = sum(p.stat().st_size for p in _hot_files(dataset) if p.exists())
+        archived = sum(e["bytes"] for e in years.values())
+        source = sum(e["source_bytes"] for e in years.values())
+        rows.append({
+            "dataset": dataset,
+            "years": ",".join(sorted(years)) or "-",
+            "archived_rows": sum(e["rows"] for e in years.values()),
+            "archive_mb": archived / 1024 ** 2,
+            "as_hot_mb": source / 1024 ** 2,
+            "saved_mb": (source - archived) / 1024 ** 2,
+            "hot_mb": hot_bytes / 1024 ** 2,
+        })
+    return pd.DataFrame(rows)
+
+
+def _best_ms(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+
+def bench(repeat=5):
+    """Read latency of the common queries, across both tiers and hot-only."""
+    from scripts.sentiment_store import load_scores
+    from scripts.panel import load_panel
+
+    columns = ["company_name", "publishedAt", "date", "sentiment_score"]
+    recent = pd.Timestamp.now().normalize() - pd.Timedelta(days=HOT_DAYS)
+    newest = load_scores(columns=["date"], archived=False)["date"].max()
+    if pd.notna(newest):
+        recent = newest - pd.Timedelta(days=90)
+    cases = {
+        "scores, full history": lambda: load_scores(columns=columns),
+        "scores, last 90 days": lambda: load_scores(columns=columns, since=recent),
+        "scores, hot tier only": lambda: load_scores(columns=columns, archived=False),
+        "panel, full history": lambda: load_panel(),
+        "panel, hot tier only": lambda: load_panel(archived=False),
+    }
+    return pd.DataFrame([{"query": name, "best_ms": _best_ms(fn, repeat)} for name, fn in cases.items()])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hot/cold tiering: compact old rows into yearly archives")
+    parser.add_argument("command", choices=["compact", "status", "bench"])
+    parser.add_argument("--hot-days", type=int, default=HOT_DAYS, help="rows newer than this stay in the hot files")
+    parser.add_argument("--retention-days", type=int, default=TEXT_RETENTION_DAYS,
+                        help="article text older than this is dropped from the archive")
+    parser.add_argument("--dry-run", action="store_true", help="only report what would be moved")
+    parser.add_argument("--wait", action="store_true", help="wait for a running pipeline instead of exiting")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.command == "compact":
+        from scripts.storage import pipeline_lock, publish_snapshot, PipelineLocked
+
+        # compaction rewrites the hot files, so it runs like a pipeline stage
+        try:
+            with pipeline_lock(wait=args.wait):
+                moved = compact(args.hot_days, args.retention_days, dry_run=args.dry_run)
+                if not args.dry_run and any(moved.values()) and current_snapshot() is not None:
+                    publish_snapshot()
+        except PipelineLocked as e:
+            logger.error(f"⛔ {e}")
+            sys.exit(75)
+        logger.info(f"✅ Compaction {'planned' if args.dry_run else 'done'}: {moved}")
+    elif args.command == "status":
+        print(status().to_string(index=False, float_format=lambda v: f"{v:,.2f}"))
+    else:
+        print(bench(args.repeat).to_string(index=False, float_format=lambda v: f"{v:,.1f}"))
+
+
+if __name__ == "__main__":
+    main()
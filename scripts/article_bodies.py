@@ -0,0 +1,468 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import argparse
+import asyncio
+import base64
+import gzip
+import hashlib
+import json
+import logging
+import random
+import re
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime
+from html.parser import HTMLParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urldefrag, urlsplit
+from config import ARTICLE_BODY_DIR, DAX_ARTICLES_FILE
+from scripts.storage import write_bytes
+
+# ---------------- LOGGING ----------------
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+# Optional enrichment stage: full article bodies for new URLs.
+#
+# Cache layout under ARTICLE_BODY_DIR:
+#   urls/<ab>/<sha256(url)>.json       {url, status, content, paragraphs, fetched_at}
+#   objects/<ab>/<sha256(text)>.txt.gz extracted paragraphs, one per line
+# Bodies are content-addressed, so syndicated copies of the same story are
+# stored once. Every answered URL (200 or a 4xx) gets a record and is never
+# requested again; timeouts and 5xx are not recorded and retried next run.
+# Files are written atomically (storage.write_bytes), so concurrent runs can
+# share the cache.
+#
+# Google News RSS links (news.google.com/rss/articles/<id>) do not redirect
+# over HTTP; they serve a JavaScript interstitial. Older ids embed the
+# publisher URL (base64 protobuf) and are fetched from the publisher; the
+# current opaque ids ("AU_yqL...") can only be resolved by Google's web app,
+# so those articles are skipped and keep their headline score. Pages that
+# end on a consent wall or interstitial are cached without a body.
+CONCURRENCY = 8
+PER_DOMAIN = 2
+DOMAIN_INTERVAL = 1.0  # seconds between request starts on one domain
+TIMEOUT = 15
+MAX_BYTES = 2_000_000
+MIN_PARAGRAPH_CHARS = 60
+USER_AGENT = "FIEP-research-bot/1.0 (+educational project; article text for sentiment)"
+SKIP_TAGS = {"script", "style", "noscript", "nav", "header", "footer", "aside", "form", "figure", "button"}
+GOOGLE_NEWS_HOST = "news.google.com"
+INTERSTITIAL_HOSTS = {GOOGLE_NEWS_HOST, "consent.google.com", "consent.youtube.com", "consent.yahoo.com",
+                      "guce.yahoo.com"}
+INTERSTITIAL_MARKERS = ("before you continue", "enable javascript", "we value your privacy", "cookie consent",
+                        "consent to cookies", "are you a robot", "verify you are human", "access denied",
+                        "subscribe to continue reading")
+# a page with at most this much text and one of the markers is a wall, not an article
+INTERSTITIAL_MAX_CHARS = 1500
+
+
+# ---------------- EXTRACTION ----------------
+class _ParagraphParser(HTMLParser):
+    """Text of <p> elements outside navigation/boilerplate, split by <article> membership."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.skip = 0
+        self.article = 0
+        self.current = None
+        self.in_article, self.outside = [], []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self.skip += 1
+        elif tag == "article":
+            self.article += 1
+        elif tag == "p" and not self.skip:
+            self._close()
+            self.current = []
+        elif tag == "br" and self.current is not None:
+            self.current.append(" ")
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS:
+            self.skip = max(self.skip - 1, 0)
+        elif tag == "article":
+            self._close()
+            self.article = max(self.article - 1, 0)
+        elif tag == "p":
+            self._close()
+
+    def handle_data(self, data):
+        if self.current is not None and not self.skip:
+            self.current.append(data)
+
+    def _close(self):
+        if self.current is not None:
+            text = " ".join("".join(self.current).split())
+            (self.in_article if self.article else self.outside).append(text)
+            self.current = None
+
+
+def is_interstitial(html, paragraphs):
+    """Consent walls, bot checks and JavaScript interstitials: little text and a telltale phrase."""
+    if sum(len(p) for p in paragraphs) > INTERSTITIAL_MAX_CHARS:
+        return False
+    title = re.search(r"<title[^>]*>(.*?)</title>", html, re.IGNORECASE | re.DOTALL)
+    text = " ".join([title.group(1) if title else ""] + paragraphs).lower()
+    return any(marker in text for marker in INTERSTITIAL_MARKERS)
+
+
+def extract_paragraphs(html, min_chars=MIN_PARAGRAPH_CHARS):
+    """Main-text paragraphs of an HTML page ([] for an interstitial or consent page).
+
+    Paragraphs inside <article> win if there are any; short fragments
+    (captions, bylines, share prompts) are dropped.
+    """
+    parser = _ParagraphParser()
+    parser.feed(html)
+    parser.close()
+    parser._close()
+    paragraphs = parser.in_article or parser.outside
+    if is_interstitial(html, parser.in_article + parser.outside):
+        return []
+    return [p for p in paragraphs if len(p) >= min_chars]
+
+
+def publisher_url(url):
+    """URL to fetch for an article: Google News links decoded to the publisher, None if opaque."""
+    parts = urlsplit(url)
+    if parts.netloc.lower() != GOOGLE_NEWS_HOST:
+        return url
+    token = parts.path.rstrip("/").rsplit("/", 1)[-1]
+    try:
+        data = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+    except (ValueError, TypeError):
+        return None
+    # legacy ids: protobuf whose first string field is the publisher URL
+    match = re.search(rb"https?://[\x21-\x7e]+", data)
+    return match.group().decode("ascii") if match else None
+
+
+# ---------------- CACHE ----------------
+def url_key(url):
+    return hashlib.sha256(urldefrag(url.strip())[0].encode("utf-8")).hexdigest()
+
+
+class BodyCache:
+    """URL records pointing at content-addressed, gzipped paragraph files."""
+
+    def __init__(self, root=ARTICLE_BODY_DIR):
+        self.root = Path(root)
+
+    def _record_path(self, url):
+        key = url_key(url)
+        return self.root / "urls" / key[:2] / f"{key}.json"
+
+    def _object_path(self, digest):
+        return self.root / "objects" / digest[:2] / f"{digest}.txt.gz"
+
+    def get(self, url):
+        path = self._record_path(url)
+        if not path.exists():
+            return None
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def put(self, url, status, paragraphs=()):
+        content = None
+        if paragraphs:
+            data = "\n".join(paragraphs).encode("utf-8")
+            content = hashlib.sha256(data).hexdigest()
+            obj = self._object_path(content)
+            if not obj.exists():
+                write_bytes(obj, gzip.compress(data))
+        record = {"url": url, "status": status, "content": content, "paragraphs": len(paragraphs),
+                  "fetched_at": datetime.now().isoformat(timespec="seconds")}
+        write_bytes(self._record_path(url), json.dumps(record).encode("utf-8"))
+        return record
+
+    def paragraphs(self, url):
+        """Cached paragraphs of a URL ([] if unknown, failed or empty)."""
+        record = self.get(url)
+        if not record or not record["content"]:
+            return []
+        with gzip.open(self._object_path(record["content"]), "rt", encoding="utf-8") as f:
+            return f.read().split("\n")
+
+    def stats(self):
+        records = sum(1 for _ in (self.root / "urls").glob("*/*.json"))
+        objects = list((self.root / "objects").glob("*/*.txt.gz"))
+        return {"urls": records, "bodies": len(objects), "bytes": sum(p.stat().st_size for p in objects)}
+
+
+# ---------------- FETCHING ----------------
+class DomainLimiter:
+    """At most `per_domain` requests in flight per host, starts spaced by `interval` seconds."""
+
+    def __init__(self, per_domain=PER_DOMAIN, interval=DOMAIN_INTERVAL):
+        self.per_domain, self.interval = per_domain, interval
+        self.slots, self.next_start = {}, {}
+
+    def _slot(self, domain):
+        if domain not in self.slots:
+            self.slots[domain] = asyncio.Semaphore(self.per_domain)
+        return self.slots[domain]
+
+    async def acquire(self, domain):
+        await self._slot(domain).acquire()
+        # reserve the next start time before sleeping so waiters queue up in order
+        now = time.monotonic()
+        start = max(now, self.next_start.get(domain, now))
+        self.next_start[domain] = start + self.interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    def release(self, domain):
+        self.slots[domain].release()
+
+
+def _download(url, timeout=TIMEOUT):
+    """(status, html) via a blocking request; runs in a worker thread.
+
+    A redirect onto a consent or interstitial host counts as a page without a body.
+    """
+    request = urllib.request.Request(url, headers={"User-Agent": USER_AGENT, "Accept": "text/html"})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as resp:
+            if "html" not in resp.headers.get("Content-Type", "text/html"):
+                return 415, ""
+            if urlsplit(resp.geturl()).netloc.lower() in INTERSTITIAL_HOSTS:
+                return resp.status, ""
+            charset = resp.headers.get_content_charset() or "utf-8"
+            return resp.status, resp.read(MAX_BYTES).decode(charset, errors="replace")
+    except urllib.error.HTTPError as e:
+        return e.code, ""
+
+
+async def fetch_bodies(urls, cache=None, concurrency=CONCURRENCY, per_domain=PER_DOMAIN,
+                       interval=DOMAIN_INTERVAL, timeout=TIMEOUT, retry_failed=False):
+    """Fetch and cache the bodies of all URLs not cached yet; returns run statistics."""
+    cache = cache or BodyCache()
+    limiter = DomainLimiter(per_domain, interval)
+    overall = asyncio.Semaphore(concurrency)
+    stats = {"urls": 0, "cache_hits": 0, "fetched": 0, "with_body": 0, "http_errors": 0,
+             "network_errors": 0, "unresolvable": 0, "bytes": 0}
+
+    async def one(url):
+        record = cache.get(url)
+        if record and (record["status"] == 200 or not retry_failed):
+            stats["cache_hits"] += 1
+            return
+        target = publisher_url(url)
+        if target is None:
+            stats["unresolvable"] += 1
+            return
+        # cached under the article's own URL, which is what the scores are joined on
+        domain = urlsplit(target).netloc.lower()
+        async with overall:
+            await limiter.acquire(domain)
+            try:
+                status, html = await asyncio.to_thread(_download, target, timeout)
+            except Exception as e:
+                stats["network_errors"] += 1
+                logger.debug(f"⚠️ {url}: {e}")
+                return
+            finally:
+                limiter.release(domain)
+        if status >= 500:
+            stats["network_errors"] += 1
+            return
+        stats["fetched"] += 1
+        stats["bytes"] += len(html)
+        if status != 200:
+            stats["http_errors"] += 1
+            cache.put(url, status)
+            return
+        paragraphs = await asyncio.to_thread(extract_paragraphs, html)
+        stats["with_body"] += bool(paragraphs)
+        cache.put(url, status, paragraphs)
+
+    unique = list(dict.fromkeys(u for u in urls if isinstance(u, str) and u.startswith("http")))
+    stats["urls"] = len(unique)
+    start = time.perf_counter()
+    await asyncio.gather(*(one(u) for u in unique))
+    stats["seconds"] = time.perf_counter() - start
+    stats["fetched_per_s"] = stats["fetched"] / stats["seconds"] if stats["seconds"] else 0.0
+    stats["hit_rate"] = stats["cache_hits"] / len(unique) if unique else 0.0
+    return stats
+
+
+def new_article_urls(path=DAX_ARTICLES_FILE, cache=None):
+    """Article URLs from the raw news file that have no cache record yet and can be fetched."""
+    import pandas as pd
+
+    cache = cache or BodyCache()
+    urls = pd.read_csv(path, usecols=["url"])["url"].dropna().drop_duplicates()
+    return [u for u in urls if publisher_url(u) is not None and cache.get(u) is None]
+
+
+# ---------------- SCORING ----------------
+def paragraph_scores(paragraphs, sia):
+    """VADER compound score per paragraph."""
+    return [sia.polarity_scores(p)["compound"] for p in paragraphs]
+
+
+def body_score(paragraphs, sia):
+    """Length-weighted mean paragraph score, or None without a body.
+
+    Weighting by length keeps one-line paragraphs (quotes, teasers) from
+    dominating a long report.
+    """
+    if not paragraphs:
+        return None
+    scores = paragraph_scores(paragraphs, sia)
+    weights = [len(p) for p in paragraphs]
+    return sum(s * w for s, w in zip(scores, weights)) / sum(weights)
+
+
+def body_scores(urls, sia, cache=None):
+    """{url: body score} for the cached URLs among `urls` (never fetches)."""
+    cache = cache or BodyCache()
+    if not (cache.root / "urls").exists():
+        return {}
+    out = {}
+    for url in dict.fromkeys(urls):
+        if isinstance(url, str):
+            score = body_score(cache.paragraphs(url), sia)
+            if score is not None:
+                out[url] = score
+    return out
+
+
+# ---------------- FIXTURE SERVER ----------------
+WORDS = ("shares profit growth strong record loss warning weak strike lawsuit guidance market "
+         "investors quarter revenue outlook demand costs margin analysts expect").split()
+
+
+def fixture_page(n):
+    """Deterministic article page with boilerplate around an <article> body."""
+    rng = random.Random(n)
+    body = "".join(f"<p>{' '.join(rng.choice(WORDS) for _ in range(rng.randint(15, 60))).capitalize()}.</p>"
+                   for _ in range(rng.randint(3, 12)))
+    return (f"<html><head><title>Story {n}</title><script>var x = '<p>not text</p>';</script></head>"
+            f"<body><nav><p>Home | Markets | Companies | Opinion | Subscribe to our newsletter today</p></nav>"
+            f"<article><h1>Story {n}</h1><p>By Staff</p>{body}</article>"
+            f"<footer><p>© Fixture News. All rights reserved. Terms, privacy and cookie settings.</p></footer>"
+            f"</body></html>")
+
+
+class FixtureServer:
+    """Local article server for tests and benchmarks: /article/<n>, /missing -> 404.
+
+    Each response is delayed by `latency` seconds, and the peak number of
+    concurrent requests is recorded to check the per-domain limit.
+    """
+
+    def __init__(self, latency=0.05):
+        self.latency = latency
+        self.active = self.peak = self.requests = 0
+        self.lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with server.lock:
+                    server.active += 1
+                    server.requests += 1
+                    server.peak = max(server.peak, server.active)
+                try:
+                    time.sleep(server.latency)
+                    if not self.path.startswith("/article/"):
+                        self.send_error(404)
+                        return
+                    data = fixture_page(int(self.path.rsplit("/", 1)[1])).encode("utf-8")
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/html; charset=utf-8")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                finally:
+                    with server.lock:
+                        server.active -= 1
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def benchmark(n_urls=200, domains=4, latency=0.05, concurrency=CONCURRENCY, per_domain=PER_DOMAIN):
+    """Throughput and hit rate against local fixture servers (one per 'domain').
+
+    Runs sequential (concurrency 1) and concurrent cold fetches into fresh
+    caches, then a warm re-run that must be served entirely from cache.
+    """
+    import pandas as pd
+
+    servers = [FixtureServer(latency) for _ in range(domains)]
+    urls = [f"{servers[i % domains].url}/article/{i}" for i in range(n_urls)]
+    urls += [f"{servers[0].url}/missing"]
+    rows = []
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            for label, conc, root in [("sequential cold", 1, "seq"), ("concurrent cold", concurrency, "conc"),
+                                      ("concurrent warm", concurrency, "conc")]:
+                for s in servers:
+                    s.peak = s.requests = 0
+                stats = asyncio.run(fetch_bodies(urls, BodyCache(Path(tmp) / root), concurrency=conc,
+                                                 per_domain=per_domain, interval=0.0))
+                rows.append({"run": label, **stats, "requests": sum(s.requests for s in servers),
+                             "peak_per_domain": max(s.peak for s in servers)})
+    finally:
+        for s in servers:
+            s.close()
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fetch and cache full article bodies for sentiment scoring")
+    sub = parser.add_subparsers(dest="command", required=True)
+    fetch = sub.add_parser("fetch", help="fetch bodies for article URLs not cached yet")
+    fetch.add_argument("--limit", type=int, help="at most this many new URLs")
+    fetch.add_argument("--concurrency", type=int, default=CONCURRENCY)
+    fetch.add_argument("--per-domain", type=int, default=PER_DOMAIN)
+    fetch.add_argument("--interval", type=float, default=DOMAIN_INTERVAL, help="seconds between requests per domain")
+    show = sub.add_parser("show", help="print the cached paragraphs of a URL")
+    show.add_argument("url")
+    sub.add_parser("stats", help="cache size")
+    bench = sub.add_parser("bench", help="throughput/hit rate against a local fixture server")
+    bench.add_argument("--urls", type=int, default=200)
+    bench.add_argument("--domains", type=int, default=4)
+    bench.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    if args.command == "fetch":
+        urls = new_article_urls()[:args.limit]
+        logger.info(f"🌐 Fetching {len(urls)} new article bodies...")
+        stats = asyncio.run(fetch_bodies(urls, concurrency=args.concurrency, per_domain=args.per_domain,
+                                         interval=args.interval))
+        logger.info(f"✅ {stats['with_body']} bodies extracted, {stats['http_errors']} HTTP errors, "
+                    f"{stats['unresolvable']} unresolvable Google News links, "
+                    f"{stats['network_errors']} retryable errors in {stats['seconds']:.1f}s "
+                    f"({stats['fetched_per_s']:.1f} URLs/s)")
+    elif args.command == "show":
+        print("\n\n".join(BodyCache().paragraphs(args.url)) or "(not cached)")
+    elif args.command == "stats":
+        print(BodyCache().stats())
+    else:
+        result = benchmark(args.urls, args.domains, args.latency)
+        cols = ["run", "urls", "requests", "cache_hits", "with_body", "http_errors", "seconds",
+                "fetched_per_s", "hit_rate", "peak_per_domain"]
+        print(result[cols].to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import argparse
+import logging
+import sqlite3
+import time
+import pandas as pd
+from config import ARTICLE_INDEX_FILE, CACHE_DIR
+from scripts.panel import company_key
+from scripts.trading_calendar import assign_sessions
+from scripts.sentiment_store import to_compact, load_scores, load_content, load_full_sentiment, _scaled
+
+# ---------------- LOGGING ----------------
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+# ---------------- SCHEMA ----------------
+# `articles` holds one row per scored article keyed by article_id and indexed
+# on (company, session date) for alert drill-down; `article_fts` is an
+# external-content FTS5 index over its title/description for keyword search.
+# `company` is the company_data file key (see panel.company_key), so dashboard
+# selections map directly onto it.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    article_id INTEGER PRIMARY KEY,
+    company TEXT NOT NULL,
+    date TEXT NOT NULL,
+    published_at TEXT,
+    source TEXT,
+    sentiment_score REAL,
+    sentiment_label TEXT,
+    title TEXT,
+    description TEXT,
+    url TEXT
+);
+CREATE INDEX IF NOT EXISTS articles_company_date ON articles (company, date);
+CREATE VIRTUAL TABLE IF NOT EXISTS article_fts USING fts5(
+    title, description, content='articles', content_rowid='article_id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+"""
+INDEX_COLUMNS = ["article_id", "company", "date", "published_at", "source", "sentiment_score",
+                 "sentiment_label", "title", "description", "url"]
+RESULT_COLUMNS = ["date", "company", "sentiment_score", "sentiment_label", "source", "title", "url"]
+SEARCH_LIMIT = 50
+
+
+def connect(path=ARTICLE_INDEX_FILE, readonly=False):
+    if readonly:
+        return sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def index_exists(path=ARTICLE_INDEX_FILE):
+    return Path(path).exists()
+
+
+def _index_rows(scores, content):
+    """Join compact scores with their text into rows in INDEX_COLUMNS order.
+
+    `date` is the article's trading session, the date its alert row carries.
+    """
+    df = assign_sessions(scores).merge(content, on="article_id", how="left")
+    return pd.DataFrame({
+        "article_id": df["article_id"].astype("int64"),
+        "company": df["company_name"].astype(str).map(company_key),
+        "date": df["session"].dt.strftime("%Y-%m-%d"),
+        "published_at": df["publishedAt"].astype(str),
+        "source": df["source"].astype(str),
+        "sentiment_score": df["sentiment_score"].astype("float64").round(4),
+        "sentiment_label": df["sentiment_label"].astype(str),
+        "title": df["title"].fillna(""),
+        "description": df["description"].fillna(""),
+        "url": df["url"],
+    })
+
+
+def index_articles(df, path=ARTICLE_INDEX_FILE):
+    """Add newly scored articles (wide frame, as the sentiment stage produces it).
+
+    Articles already in the index are skipped, so re-running over the same
+    batch is a no-op. Returns the number of articles added.
+    """
+    scores, content = to_compact(df)
+    return _insert(_index_rows(scores, content), path)
+
+
+def _insert(rows, path=ARTICLE_INDEX_FILE):
+    if rows.empty:
+        return 0
+    with connect(path) as conn:
+        conn.execute("CREATE TEMP TABLE staging AS SELECT * FROM articles WHERE 0")
+        conn.executemany(f"INSERT INTO staging VALUES ({', '.join('?' * len(INDEX_COLUMNS))})",
+                         rows[INDEX_COLUMNS].itertuples(index=False, name=None))
+        new = "SELECT * FROM staging WHERE article_id NOT IN (SELECT article_id FROM articles) GROUP BY article_id"
+        added = conn.execute(f"SELECT COUNT(*) FROM ({new})").fetchone()[0]
+        # External-content FTS: index the new rows, then add them to the content table
+        conn.execute(f"INSERT INTO article_fts (rowid, title, description) SELECT article_id, title, description FROM ({new})")
+        conn.execute(f"INSERT INTO articles SELECT * FROM ({new})")
+        conn.execute("DROP TABLE staging")
+    conn.close()
+    return added
+
+
+def build_index(path=ARTICLE_INDEX_FILE):
+    """(Re)build the whole index from the compact article store."""
+    Path(path).unlink(missing_ok=True)
+    added = _insert(_index_rows(load_scores(), load_content()), path)
+    with connect(path) as conn:
+        conn.execute("INSERT INTO article_fts (article_fts) VALUES ('optimize')")
+    conn.close()
+    return added
+
+
+def drop_text(article_ids, path=ARTICLE_INDEX_FILE):
+    """Clear the title and description of these articles (text retention, see archive.py).
+
+    The rows keep their scores and URL for the drill-down but no longer match
+    a search. Returns the number of articles cleared.
+    """
+    if not index_exists(path) or not len(article_ids):
+        return 0
+    with connect(path) as conn:
+        conn.execute("CREATE TEMP TABLE purge (article_id INTEGER PRIMARY KEY)")
+        conn.executemany("INSERT OR IGNORE INTO purge VALUES (?)", ((int(i),) for i in article_ids))
+        where = ("article_id IN (SELECT article_id FROM purge) AND (title != '' OR description != '')")
+        cleared = conn.execute(f"SELECT COUNT(*) FROM articles WHERE {where}").fetchone()[0]
+        # External-content FTS: remove the old terms first, then the text itself
+        conn.execute(f"INSERT INTO article_fts (article_fts, rowid, title, description) "
+                     f"SELECT 'delete', article_id, title, description FROM articles WHERE {where}")
+        conn.execute(f"UPDATE articles SET title = '', description = '' WHERE {where}")
+        conn.execute("DROP TABLE purge")
+    conn.close()
+    return cleared
+
+
+def match_query(text):
+    """Plain keywords to an FTS5 query: every term must match, `term*` is a prefix."""
+    terms = []
+    for word in text.split():
+        prefix = word.endswith("*")
+        word = word.rstrip("*").replace('"', '""')
+        if word:
+            terms.append(f'"{word}"' + ("*" if prefix else ""))
+    return " ".join(terms)
+
+
+def _query(sql, params, path):
+    if not index_exists(path):
+        return pd.DataFrame(columns=RESULT_COLUMNS)
+    conn = connect(path, readonly=True)
+    try:
+        return pd.read_sql_query(sql, conn, params=params)
+    finally:
+        conn.close()
+
+
+def articles_for(company, day, path=ARTICLE_INDEX_FILE):
+    """Scored articles behind one (company, date), most negative first."""
+    sql = (f"SELECT {', '.join(RESULT_COLUMNS)} FROM articles "
+           "WHERE company = ? AND date = ? ORDER BY sentiment_score")
+    return _query(sql, (company_key(company), pd.Timestamp(day).strftime("%Y-%m-%d")), path)
+
+
+def search(text, company=None, start=None, end=None, limit=SEARCH_LIMIT, path=ARTICLE_INDEX_FILE):
+    """Keyword search across the full history, best matches first."""
+    query = match_query(text)
+    if not query:
+        return pd.DataFrame(columns=RESULT_COLUMNS)
+    where, params = ["article_fts MATCH ?"], [query]
+    if company is not None:
+        where.append("a.company = ?")
+        params.append(company_key(company))
+    if start is not None:
+        where.append("a.date >= ?")
+        params.append(pd.Timestamp(start).strftime("%Y-%m-%d"))
+    if end is not None:
+        where.append("a.date <= ?")
+        params.append(pd.Timestamp(end).strftime("%Y-%m-%d"))
+    sql = (f"SELECT {', '.join('a.' + c for c in RESULT_COLUMNS)} FROM article_fts "
+           f"JOIN articles a ON a.article_id = article_fts.rowid "
+           f"WHERE {' AND '.join(where)} ORDER BY bm25(article_fts) LIMIT ?")
+    return _query(sql, params + [limit], path)
+
+
+def benchmark(words=("tariff*", "profit warning", "ceo", "strike*"), scale=1):
+    """Index search vs. the str.contains scan over the text column, at `scale` x history.
+
+    The scan matches substrings, the index whole tokens (or prefixes with `*`),
+    so hit counts differ slightly.
+    """
+    full = _scaled(load_full_sentiment(), scale)
+    path = ARTICLE_INDEX_FILE
+    if scale > 1:
+        path = CACHE_DIR / f"article_index_x{scale}.sqlite"
+        path.unlink(missing_ok=True)
+        _insert(_index_rows(*to_compact(full)), path)
+    rows = []
+    for word in words:
+        start = time.perf_counter()
+        scan = full[full["text"].str.contains(word.rstrip("*"), case=False, regex=False)]
+        scan_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        search(word, path=path)
+        index_ms = (time.perf_counter() - start) * 1000
+        matches = _query("SELECT COUNT(*) AS n FROM article_fts WHERE article_fts MATCH ?", [match_query(word)], path)
+        rows.append({"query": word, "articles": len(full), "scan_hits": len(scan), "scan_ms": scan_ms,
+                     "index_hits": int(matches["n"].iloc[0]), f"index_top{SEARCH_LIMIT}_ms": index_ms})
+    if scale > 1:
+        path.unlink()
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Full-text article index for alert drill-down and search")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("build", help="rebuild the index from the article store")
+    find = sub.add_parser("search", help="keyword search across history")
+    find.add_argument("query")
+    find.add_argument("--company")
+    find.add_argument("--limit", type=int, default=SEARCH_LIMIT)
+    day = sub.add_parser("day", help="articles behind one company/date")
+    day.add_argument("company")
+    day.add_argument("date")
+    bench = sub.add_parser("bench", help="index search vs. str.contains scan")
+    bench.add_argument("--scale", type=int, default=1, help="repeat the history N times")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        start = time.perf_counter()
+        added = build_index()
+        logger.info(f"✅ {added} articles indexed in {time.perf_counter() - start:.2f}s -> {ARTICLE_INDEX_FILE.name}")
+        return
+    if args.command == "search":
+        result = search(args.query, args.company, limit=args.limit)
+    elif args.command == "day":
+        result = articles_for(args.company, args.date)
+    else:
+        result = benchmark(scale=args.scale)
+    print(result.to_string(index=False, float_format=lambda v: f"{v:.3f}", max_colwidth=80))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import argparse
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from config import COMPANY_DATA_DIR, BACKTEST_RESULTS_FILE
+from scripts.panel import load_panel, company_offsets, padded_arrays
+from scripts.storage import write_csv
+
+# ---------------- LOGGING ----------------
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+# Same strategy as the dashboard backtest, swept over a parameter grid:
+# go long the day after sentiment_change <= threshold and stay long for
+# `hold` days (hold=1 is exactly the dashboard strategy).
+DEFAULT_THRESHOLDS = np.round(np.arange(-1.0, 0.0001, 0.05), 2)
+DEFAULT_HOLDS = (1, 3, 5, 10)
+METRICS = ["total_return", "sharpe", "max_drawdown", "hit_rate", "exposure"]
+TRADING_DAYS = 252
+# sweep() holds a handful of (C, H, T, K) arrays at once (position, held,
+# strat, equity, drawdown and temporaries), ~48 bytes per cell; companies
+# are swept in chunks so the cube of one chunk stays within the budget.
+MEMORY_BUDGET_MB = 256
+BYTES_PER_CELL = 48
+
+
+def sweep(change, returns, thresholds=DEFAULT_THRESHOLDS, holds=DEFAULT_HOLDS):
+    """Evaluate every (company, hold, threshold) in one broadcast pass.
+
+    change, returns: (C, T). Returns a dict of metric -> (C, H, K) arrays.
+    """
+    thresholds = np.asarray(thresholds, dtype="float64")
+    holds = np.asarray(holds, dtype=int)
+    C, T = change.shape
+
+    # (C, T, K) alert flags -> running alert counts for the hold windows
+    alerts = (change[:, :, None] <= thresholds[None, None, :]).astype(np.int32)
+    counts = np.concatenate([np.zeros((C, 1, len(thresholds)), np.int32), np.cumsum(alerts, axis=1)], axis=1)
+    t_idx = np.arange(1, T + 1)
+    lagged = np.maximum(t_idx[None, :] - holds[:, None], 0)                        # (H, T)
+    position = (counts[:, t_idx][:, None] - counts[:, lagged]) > 0                  # (C, H, T, K)
+
+    # Trade the day after the signal: position[t-1] * return[t]
+    held = np.zeros_like(position)
+    held[:, :, 1:] = position[:, :, :-1]
+    r = returns[:, None, :, None]
+    r_valid = ~np.isnan(r)
+    strat = np.where(held & r_valid, r, 0.0)                                          # (C, H, T, K)
+
+    n_valid = r_valid.sum(axis=2)
+    equity = np.cumprod(1 + strat, axis=2)
+    total_return = equity[:, :, -1] - 1 if T else np.zeros((C, len(holds), len(thresholds)))
+    mean = strat.sum(axis=2) / np.maximum(n_valid, 1)
+    var = (np.where(r_valid, strat - mean[:, :, None], 0.0) ** 2).sum(axis=2) / np.maximum(n_valid - 1, 1)
+    std = np.sqrt(var)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe = np.where(std > 0, mean / std * np.sqrt(TRADING_DAYS), np.nan)
+    drawdown = 1 - equity / np.maximum.accumulate(equity, axis=2)
+    days_in = (held & r_valid).sum(axis=2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        hit_rate = np.where(days_in > 0, ((strat > 0) & held).sum(axis=2) / days_in, np.nan)
+        exposure = days_in / np.maximum(n_valid, 1)
+
+    return {
+        "total_return": total_return,
+        "sharpe": sharpe,
+        "max_drawdown": drawdown.max(axis=2) if T else total_return * 0,
+        "hit_rate": hit_rate,
+        "exposure": exposure,
+    }
+
+
+def results_frame(companies, cube, thresholds=DEFAULT_THRESHOLDS, holds=DEFAULT_HOLDS):
+    """Flatten the (C, H, K) cube to a long frame indexed by (company, hold, threshold)."""
+    index = pd.MultiIndex.from_product([companies, list(holds), list(np.round(thresholds, 4))],
+                                       names=["company", "hold", "threshold"])
+    return pd.DataFrame({m: cube[m].reshape(-1) for m in METRICS}, index=index)
+
+
+def companies_per_chunk(T, thresholds, holds, memory_mb=MEMORY_BUDGET_MB):
+    """How many companies one sweep() call can take within `memory_mb` (at least one)."""
+    per_company = max(len(holds) * T * len(thresholds) * BYTES_PER_CELL, 1)
+    return max(int(memory_mb * 1024 ** 2 // per_company), 1)
+
+
+def run_grid(panel, thresholds=DEFAULT_THRESHOLDS, holds=DEFAULT_HOLDS, memory_mb=MEMORY_BUDGET_MB):
+    companies, arrays = padded_arrays(panel, ["sentiment_change", "stock_price_return"])
+    change, returns = arrays["sentiment_change"], arrays["stock_price_return"]
+    step = companies_per_chunk(change.shape[1], thresholds, holds, memory_mb)
+    parts = [sweep(change[i:i + step], returns[i:i + step], thresholds, holds)
+             for i in range(0, max(len(change), 1), step)]
+    cube = {m: np.concatenate([p[m] for p in parts]) for m in METRICS}
+    return results_frame(companies, cube, thresholds, holds)
+
+
+def heatmap(results, metric="sharpe", company=None):
+    """hold x threshold matrix for one company, or the cross-company mean."""
+    data = results[metric]
+    if company is not None:
+        data = data.xs(company, level="company")
+    else:
+        data = data.groupby(level=["hold", "threshold"]).mean()
+    return data.unstack("threshold")
+
+
+# ---------------- BATCH MODE ----------------
+def _run_chunk(args):
+    panel, thresholds, holds, memory_mb = args
+    return run_grid(panel, thresholds, holds, memory_mb)
+
+
+def run_parallel(panel, thresholds=DEFAULT_THRESHOLDS, holds=DEFAULT_HOLDS, workers=4, memory_mb=MEMORY_BUDGET_MB):
+    """Split the companies over worker processes; output order is deterministic.
+
+    `memory_mb` is the cube budget of each process.
+    """
+    companies = list(company_offsets(panel))
+    chunks = [c for c in np.array_split(np.array(companies, dtype=object), max(workers, 1)) if len(c)]
+    jobs = [(panel[panel["company"].isin(list(c))].reset_index(drop=True), thresholds, holds, memory_mb)
+            for c in chunks]
+    for job in jobs:
+        job[0]["company"] = job[0]["company"].cat.remove_unused_categories()
+    if workers <= 1:
+        parts = [_run_chunk(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_run_chunk, jobs))
+    return pd.concat(parts).sort_index()
+
+
+def _parse_range(text):
+    start, stop, step = map(float, text.split(":"))
+    return np.round(np.arange(start, stop + step / 2, step), 4)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vectorized threshold x hold x company backtest sweep")
+    parser.add_argument("--thresholds", default="-1:0:0.05", help="start:stop:step (inclusive)")
+    parser.add_argument("--holds", default=",".join(map(str, DEFAULT_HOLDS)))
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--memory-mb", type=float, default=MEMORY_BUDGET_MB,
+                        help="cube memory budget per worker; companies are swept in chunks that fit")
+    parser.add_argument("--out", default=str(BACKTEST_RESULTS_FILE))
+    args = parser.parse_args()
+
+    thresholds = _parse_range(args.thresholds)
+    holds = [int(h) for h in args.holds.split(",")]
+    panel = load_panel(COMPANY_DATA_DIR)
+
+    start = time.perf_counter()
+    results = run_parallel(panel, thresholds, holds, args.workers, args.memory_mb)
+    elapsed = time.perf_counter() - start
+
+    out = Path(args.out)
+    write_csv(results.reset_index(), out, index=False)
+    logger.info(f"✅ {len(results)} combinations ({results.index.get_level_values('company').nunique()} companies "
+                f"x {len(holds)} holds x {len(thresholds)} thresholds) in {elapsed:.2f}s -> {out}")
+
+    best = heatmap(results, "sharpe").stack().idxmax()
+    logger.info(f"🏆 Best mean Sharpe across companies: hold={best[0]}, threshold={best[1]}")
+
+
+if __name__ == "__main__":
+    main()
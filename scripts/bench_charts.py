@@ -0,0 +1,84 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from scripts import analytics, charts
+from scripts.panel import PanelStore
+
+# Measures the JSON payload of every line chart at full resolution vs.
+# downsampled, on the real company series and on synthetic long histories
+# (years of daily bars, intraday bars).
+
+LINE_CHARTS = {
+    "dual axis": charts.dual_axis,
+    "z-score": charts.zscore,
+    "volatility": charts.volatility,
+    "moving averages": charts.moving_averages,
+}
+
+
+def synthetic_series(rows, freq, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2015-01-01", periods=rows, freq=freq)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, rows)))
+    sentiment = np.clip(np.convolve(rng.normal(0, 0.3, rows), np.ones(5) / 5, mode="same"), -1, 1)
+    df = pd.DataFrame({"date": dates, "Close": close, "avg_sentiment": sentiment})
+    df["stock_price_return"] = df["Close"].pct_change()
+    df["sentiment_change"] = df["avg_sentiment"].diff()
+    df["sentiment_zscore"] = (df["avg_sentiment"] - df["avg_sentiment"].rolling(30).mean()) / df["avg_sentiment"].rolling(30).std()
+    df["price_volatility"] = df["stock_price_return"].rolling(7).std()
+    df["sentiment_volatility"] = df["avg_sentiment"].rolling(7).std()
+    df["MA_7"] = df["Close"].rolling(7).mean()
+    df["MA_30"] = df["Close"].rolling(30).mean()
+    return df
+
+
+def measure(label, df, max_points):
+    builders = dict(LINE_CHARTS)
+    builders["backtest"] = lambda d, max_points: charts.backtest(
+        analytics.backtest(d, analytics.DEFAULT_ALERT_THRESHOLD), max_points=max_points)
+    rows = []
+    for name, build in builders.items():
+        start = time.perf_counter()
+        fig = build(df, max_points=max_points)
+        build_ms = (time.perf_counter() - start) * 1000
+        full_fig = build(df, max_points=None)
+        full = charts.payload_bytes(full_fig)
+        sent = charts.payload_bytes(fig)
+        rows.append({
+            "series": label,
+            "rows": len(df),
+            "chart": name,
+            "full_trace": type(full_fig.data[0]).__name__,
+            "sent_trace": type(fig.data[0]).__name__,
+            "full_kb": full / 1024,
+            "sent_kb": sent / 1024,
+            "reduction": full / sent,
+            "build_ms": build_ms,
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chart payload benchmark")
+    parser.add_argument("--max-points", type=int, default=charts.MAX_POINTS)
+    args = parser.parse_args()
+
+    store = PanelStore()
+    store.refresh()
+    company = store.companies()[0]
+
+    rows = measure(f"{company} (real)", store.company_frame(company), args.max_points)
+    rows += measure("10y daily", synthetic_series(2520, "B"), args.max_points)
+    rows += measure("1y 5-min bars", synthetic_series(26000, "5min"), args.max_points)
+    rows += measure("intraday 1-min x 1y", synthetic_series(130000, "min"), args.max_points)
+
+    print(pd.DataFrame(rows).to_string(index=False, float_format=lambda v: f"{v:,.1f}"))
+
+
+if __name__ == "__main__":
+    main()
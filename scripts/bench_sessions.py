@@ -0,0 +1,105 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import argparse
+import multiprocessing as mp
+import pickle
+import random
+import resource
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from config import COMPANY_DATA_DIR
+
+# Simulates N concurrent dashboard sessions, each rerunning the script R times
+# with a random company and alert threshold, and compares:
+#   legacy - st.cache_data semantics: cached frame is unpickled per access,
+#            every derived column is recomputed per rerun
+#   shared - one memory-mapped Arrow panel per process, sessions slice it and
+#            only compute their parameter-dependent columns
+
+
+def _session_columns(df, alert_threshold):
+    df["custom_alert"] = df["sentiment_change"] <= alert_threshold
+    df["position"] = df["custom_alert"].astype(int)
+    df["strategy_return"] = df["position"].shift() * df["stock_price_return"]
+    df["cumulative_strategy"] = (1 + df["strategy_return"]).cumprod()
+    df["cumulative_stock"] = (1 + df["stock_price_return"]).cumprod()
+    return df
+
+
+def _legacy_rerun(cache, company, alert_threshold):
+    df = pickle.loads(cache[company])
+    df["price_volatility"] = df["Close"].pct_change().rolling(7).std()
+    df["sentiment_volatility"] = df["avg_sentiment"].rolling(7).std()
+    df["MA_7"] = df["Close"].rolling(7).mean()
+    df["MA_30"] = df["Close"].rolling(30).mean()
+    return _session_columns(df, alert_threshold)
+
+
+def _shared_rerun(store, company, alert_threshold):
+    return _session_columns(store.company_frame(company), alert_threshold)
+
+
+def _run_mode(mode, sessions, reruns, seed, queue):
+    if mode == "legacy":
+        paths = sorted(Path(COMPANY_DATA_DIR).glob("*.csv"))
+        state = {p.stem: pickle.dumps(pd.read_csv(p, parse_dates=["date"])) for p in paths}
+        companies = list(state)
+        rerun = _legacy_rerun
+    else:
+        from scripts.panel import PanelStore
+        state = PanelStore(COMPANY_DATA_DIR)
+        state.refresh()
+        companies = state.companies()
+        rerun = _shared_rerun
+
+    def session(i):
+        rng = random.Random(seed + i)
+        timings, held = [], None
+        for _ in range(reruns):
+            start = time.perf_counter()
+            held = rerun(state, rng.choice(companies), rng.choice(np.arange(-1.0, 0.0, 0.05)))
+            timings.append(time.perf_counter() - start)
+        return timings, held
+
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        results = list(pool.map(session, range(sessions)))
+    held_bytes = sum(df.memory_usage(deep=True).sum() for _, df in results)
+
+    timings = np.concatenate([np.array(t) for t, _ in results]) * 1000
+    queue.put({
+        "mode": mode,
+        "sessions": sessions,
+        "reruns": len(timings),
+        "p50_ms": np.percentile(timings, 50),
+        "p95_ms": np.percentile(timings, 95),
+        "session_held_kb": held_bytes / 1024,
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent dashboard session load test")
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--reruns", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    # Each mode runs in a fresh process so RSS numbers don't bleed into each other
+    ctx = mp.get_context("spawn")
+    rows = []
+    for mode in ["legacy", "shared"]:
+        queue = ctx.Queue()
+        proc = ctx.Process(target=_run_mode, args=(mode, args.sessions, args.reruns, args.seed, queue))
+        proc.start()
+        rows.append(queue.get())
+        proc.join()
+
+    print(pd.DataFrame(rows).to_string(index=False, float_format=lambda v: f"{v:,.2f}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import argparse
+import os
+import subprocess
+import time
+from config import BASE_DIR
+
+# Cold-start cost of every entry point: `python -X importtime -c "import <module>"`
+# in a fresh interpreter, so only module-level work is measured (entry points
+# do their real work under `if __name__ == "__main__"`). The dashboard runs
+# its first page on import, so for it only the imports are counted.
+ENTRY_POINTS = [
+    "scripts.get_news_data_daily",
+    "scripts.get_daily_stock_price",
+    "scripts.article_bodies",
+    "scripts.sentiment_pipeline",
+    "scripts.aggregate_sentiment",
+    "scripts.company_csvs",
+    "scripts.index_sentiment",
+    "scripts.run_pipeline",
+    "scripts.storage",
+    "scripts.universe",
+    "scripts.alert_engine",
+    "scripts.article_index",
+    "scripts.trading_calendar",
+    "scripts.event_study",
+    "scripts.sentiment_store",
+    "scripts.backtest_engine",
+    "scripts.xcorr_engine",
+    "scripts.report_renderer",
+    "scripts.api_server",
+    "scripts.data_quality",
+    "scripts.archive",
+    "scripts.modeling",
+    "scripts.raw_responses",
+    "scripts.chart_specs",
+    "fiep_dashboard_full",
+]
+# Cold-start budget per pipeline entry point (imports only)
+BUDGET_MS = 1000
+HEAVY = ["pandas", "numpy", "pyarrow", "plotly", "streamlit", "nltk", "sklearn", "scipy",
+         "yfinance", "newsapi", "tqdm", "requests", "bs4", "matplotlib"]
+
+
+def parse_importtime(stderr):
+    """[(self_us, cumulative_us, depth, module)] from -X importtime output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative, name = line[len("import time:"):].split("|", 2)
+        name = name.rstrip()[1:]  # one separator space, then two spaces per nesting level
+        stripped = name.lstrip(" ")
+        rows.append((int(self_us), int(cumulative), (len(name) - len(stripped)) // 2, stripped))
+    return rows
+
+
+def measure(module, repeat=3):
+    """Best-of-`repeat` import time (ms) and the heavy packages it pulled in."""
+    env = dict(os.environ, PYTHONWARNINGS="ignore")
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                              cwd=BASE_DIR, env=env, capture_output=True, text=True)
+        wall = (time.perf_counter() - start) * 1000
+        rows = parse_importtime(proc.stderr)
+        # module-level work of the entry point itself is not import cost
+        imports_ms = sum(s for s, _, _, name in rows if name != module) / 1000
+        if best is None or imports_ms < best["imports_ms"]:
+            loaded = {name.split(".")[0] for _, _, _, name in rows}
+            top = {name: c / 1000 for _, c, _, name in rows if name in HEAVY}
+            best = {"entry_point": module, "imports_ms": imports_ms, "wall_ms": wall, "ok": proc.returncode == 0,
+                    "heavy": ", ".join(f"{n} {top.get(n, 0):.0f}" for n in HEAVY if n in loaded) or "-"}
+    return best
+
+
+def main():
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description="Import-time benchmark for every entry point")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--budget-ms", type=float, default=BUDGET_MS)
+    parser.add_argument("modules", nargs="*", help="entry points to measure (default: all)")
+    args = parser.parse_args()
+
+    result = pd.DataFrame([measure(m, args.repeat) for m in args.modules or ENTRY_POINTS])
+    result["within_budget"] = (result["imports_ms"] <= args.budget_ms) | (result["entry_point"] == "fiep_dashboard_full")
+    with pd.option_context("display.max_colwidth", 120, "display.width", 200):
+        print(result.to_string(index=False, float_format=lambda v: f"{v:.0f}"))
+    print("\nheavy = packages loaded, with their cumulative import ms where imported top-level")
+    if not result["within_budget"].all():
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from config import CHART_SPECS_DIR
+from scripts.analytics import DATE_RANGES, DEFAULT_ALERT_THRESHOLD
+from scripts.storage import write_text
+
+# ---------------- LOGGING ----------------
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+# The dashboard's default figures (dual axis, z-score, volatility, moving
+# averages, histogram, backtest at the default threshold) only change when
+# the data does, so the pipeline builds them once per data version for every
+# company and date range and stores their Plotly JSON:
+#   CHART_SPECS_DIR/<panel version>_v<SPEC_VERSION>/<company>.json
+#     {"template": <layout template>, "charts": {date_range: {chart: spec}}}
+# The layout template is ~7 KB of every spec and identical across charts,
+# so it is stored once per file.
+#
+# The dashboard serves these for the default parameters and only builds
+# figures itself for a zoomed window, another resolution or threshold, or
+# a data version that has no specs (yet). Specs were validated when they
+# were built, so they are loaded without Plotly's validation pass, which
+# costs more than building the figure.
+SPEC_VERSION = 1  # bump when a chart builder changes, so every spec is rebuilt
+SPEC_CHARTS = ["dual", "zscore", "volatility", "moving_averages", "histogram", "backtest"]
+KEEP_VERSIONS = 2
+
+
+def _builders():
+    from scripts import analytics, charts
+
+    return {
+        "dual": charts.dual_axis,
+        "zscore": charts.zscore,
+        "volatility": charts.volatility,
+        "moving_averages": charts.moving_averages,
+        "histogram": charts.sentiment_histogram,
+        "backtest": lambda df: charts.backtest(analytics.backtest(df, DEFAULT_ALERT_THRESHOLD)),
+    }
+
+
+def spec_dir(version, root=CHART_SPECS_DIR):
+    return Path(root) / f"{version}_v{SPEC_VERSION}"
+
+
+def spec_path(version, company, root=CHART_SPECS_DIR):
+    return spec_dir(version, root) / f"{company}.json"
+
+
+def company_specs(frame, builders=None):
+    """{"template", "charts": {date_range: {chart: spec}}} for one company's panel rows."""
+    import plotly.io as pio
+    from scripts.analytics import filter_date_range
+
+    builders = builders or _builders()
+    template, out = None, {}
+    for date_range in DATE_RANGES:
+        view = filter_date_range(frame, date_range)
+        out[date_range] = {}
+        if view.empty:
+            continue
+        for name in SPEC_CHARTS:
+            if name == "zscore" and "sentiment_zscore" not in view.columns:
+                continue
+            spec = json.loads(pio.to_json(builders[name](view), validate=False))
+            template = spec["layout"].pop("template", template)
+            out[date_range][name] = spec
+    return {"template": template, "charts": out}
+
+
+def load(version, company, root=CHART_SPECS_DIR):
+    """A company's stored specs for this data version, None if not materialized."""
+    path = spec_path(version, company, root)
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def figure(specs, date_range, name):
+    """Plotly figure from loaded specs, None if the chart was not precomputed."""
+    from plotly.graph_objs import Figure
+
+    spec = ((specs or {}).get("charts", {}).get(date_range) or {}).get(name)
+    if spec is None:
+        return None
+    layout = dict(spec.get("layout", {}))
+    if specs.get("template") is not None:
+        layout["template"] = specs["template"]
+    return Figure({"data": spec.get("data", []), "layout": layout}, _validate=False)
+
+
+# ---------------- WORKERS ----------------
+_worker = {}
+
+
+def _init_worker(arrow_file, offsets):
+    from scripts.feature_store import open_panel_arrow
+
+    _worker["builders"] = _builders()
+    _worker["table"] = open_panel_arrow(arrow_file)
+    _worker["offsets"] = offsets
+
+
+def _build_one(company, version, root, force):
+    start = time.perf_counter()
+    path = spec_path(version, company, root)
+    if not force and path.exists():
+        return company, "skipped", 0, 0.0
+    lo, hi = _worker["offsets"][company]
+    frame = _worker["table"].slice(lo, hi - lo).drop_columns(["company"]).to_pandas()
+    data = json.dumps(company_specs(frame, _worker["builders"]), separators=(",", ":"))
+    write_text(path, data)
+    return company, "built", len(data), (time.perf_counter() - start) * 1000
+
+
+def prune(keep_version, keep=KEEP_VERSIONS, root=CHART_SPECS_DIR):
+    """Delete spec directories of older data versions (the current one is always kept)."""
+    dirs = sorted((p for p in Path(root).glob("*_v*") if p.is_dir()), key=lambda p: p.stat().st_mtime)
+    current = spec_dir(keep_version, root)
+    for path in [p for p in dirs if p != current][:-(keep - 1) or None]:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def build_all(companies=None, workers=None, force=False, root=CHART_SPECS_DIR):
+    """Materialize every (or the given) company's default specs for the current panel version."""
+    import pandas as pd
+    from scripts.panel import PanelStore
+    from scripts.feature_store import arrow_path
+
+    store = PanelStore()
+    store.refresh()
+    offsets = store.offsets()
+    companies = [c for c in (companies or list(offsets)) if c in offsets]
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(companies) or 1))
+    args = [(c, store.version, root, force) for c in companies]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(str(arrow_path(store.version)), offsets)) as pool:
+        results = list(pool.map(_build_one, *zip(*args))) if args else []
+    prune(store.version, root=root)
+    return store.version, pd.DataFrame(results, columns=["company", "status", "bytes", "ms"])
+
+
+# ---------------- BENCHMARK ----------------
+def bench(companies=None, root=CHART_SPECS_DIR):
+    """Time to first chart (dual axis) and to all default charts per company:
+    building from the panel rows vs. serving the stored specs. Both paths end
+    in the JSON Streamlit sends, and neither reuses anything across companies.
+    """
+    import pandas as pd
+    import plotly.io as pio
+    from scripts.panel import PanelStore
+    from scripts.analytics import filter_date_range
+
+    store = PanelStore()
+    store.refresh()
+    builders = _builders()
+    rows = []
+    for company in companies or store.companies():
+        for date_range in DATE_RANGES:
+            start = time.perf_counter()
+            view = filter_date_range(store.company_frame(company), date_range)
+            if view.empty:
+                continue
+            timings = {}
+            for name in SPEC_CHARTS:
+                if name != "zscore" or "sentiment_zscore" in view.columns:
+                    pio.to_json(builders[name](view), validate=False)
+                timings.setdefault("build_first_ms", (time.perf_counter() - start) * 1000)
+            timings["build_all_ms"] = (time.perf_counter() - start) * 1000
+
+            start = time.perf_counter()
+            specs = load(store.version, company, root)
+            if specs is None:
+                continue
+            for name in SPEC_CHARTS:
+                fig = figure(specs, date_range, name)
+                if fig is not None:
+                    pio.to_json(fig, validate=False)
+                timings.setdefault("spec_first_ms", (time.perf_counter() - start) * 1000)
+            timings["spec_all_ms"] = (time.perf_counter() - start) * 1000
+            rows.append({"company": company, "date_range": date_range, **timings})
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precomputed dashboard chart specs per company and date range")
+    parser.add_argument("command", nargs="?", default="build", choices=["build", "bench"])
+    parser.add_argument("--companies", type=lambda s: [c.strip() for c in s.split(",")], help="company keys (default: all)")
+    parser.add_argument("--workers", type=int, help="worker processes (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="rebuild specs that already exist for this version")
+    args = parser.parse_args()
+
+    if args.command == "bench":
+        result = bench(args.companies)
+        if result.empty:
+            logger.error("❌ No chart specs for the current data version, run `chart_specs.py build` first")
+            sys.exit(1)
+        summary = result.drop(columns=["company", "date_range"]).quantile([0.5, 0.95]).T
+        summary.columns = ["p50", "p95"]
+        print(summary.round(2).to_string())
+        logger.info(f"⏱️ Time to first chart (p50): {summary.loc['build_first_ms', 'p50']:.1f} ms built, "
+                    f"{summary.loc['spec_first_ms', 'p50']:.1f} ms from specs ({len(result)} company/range pairs)")
+        return
+
+    start = time.perf_counter()
+    version, result = build_all(args.companies, args.workers, args.force)
+    built = result[result["status"] == "built"]
+    logger.info(f"✅ {len(built)} companies' chart specs built, {len(result) - len(built)} unchanged, "
+                f"in {time.perf_counter() - start:.1f}s ({built['bytes'].sum() / 1024:.0f} KB) "
+                f"-> {spec_dir(version)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+import plotly.express as px
+from plotly.graph_objs import Figure, Scatter, Scattergl, Candlestick, Heatmap
+from scripts.downsample import downsample
+
+# Plotly figure builders for the dashboard charts, shared with batch jobs.
+# Line charts are downsampled server-side to at most `max_points` points per
+# trace (None = full resolution) and switch to WebGL traces once the points
+# actually sent exceed WEBGL_THRESHOLD, which sits between the dashboard's
+# default resolution and its 5000-point option, so that one uses WebGL too.
+MAX_POINTS = 1500
+WEBGL_THRESHOLD = 2000
+DOWNSAMPLE_METHOD = "lttb"
+
+
+def _line_trace(df, column, max_points=MAX_POINTS, **kwargs):
+    if max_points and len(df) > max_points:
+        x, y = downsample(df["date"].to_numpy(), df[column].to_numpy(dtype="float64"), max_points, DOWNSAMPLE_METHOD)
+    else:
+        x, y = df["date"], df[column]
+    trace = Scattergl if len(x) > WEBGL_THRESHOLD else Scatter
+    return trace(x=x, y=y, mode="lines", **kwargs)
+
+
+def _lines(df, columns, title, max_points=MAX_POINTS, yaxis_title="value"):
+    """Multi-series line chart laid out like px.line in wide form."""
+    fig = Figure()
+    for column in columns:
+        fig.add_trace(_line_trace(df, column, max_points, name=column))
+    fig.update_layout(title=title, xaxis_title="date", yaxis_title=yaxis_title, legend_title_text="variable")
+    return fig
+
+
+def dual_axis(df, max_points=MAX_POINTS):
+    fig = Figure()
+    fig.add_trace(_line_trace(df, "Close", max_points, name="Stock Price", yaxis="y1"))
+    fig.add_trace(_line_trace(df, "avg_sentiment", max_points, name="Avg Sentiment", yaxis="y2"))
+    fig.update_layout(
+        xaxis=dict(title="Date"),
+        yaxis=dict(title="Stock Price", side="left"),
+        yaxis2=dict(title="Avg Sentiment", overlaying="y", side="right", range=[-1, 1]),
+        height=500
+    )
+    return fig
+
+
+def candlestick(df):
+    fig = Figure(data=[Candlestick(
+        x=df["date"],
+        open=df["Open"],
+        high=df["High"],
+        low=df["Low"],
+        close=df["Close"]
+    )])
+    fig.update_layout(title="Candlestick Price Chart", xaxis_title="Date", yaxis_title="Price")
+    return fig
+
+
+def zscore(df, max_points=MAX_POINTS):
+    fig = _lines(df, ["sentiment_zscore"], "Sentiment Z-Score Over Time", max_points, yaxis_title="sentiment_zscore")
+    fig.update_layout(showlegend=False)
+    return fig
+
+
+def lagged_correlation(lag_df):
+    fig = px.bar(lag_df, x="Lag", y="Correlation", title="Lagged Correlation")
+    if "n" in lag_df.columns:
+        # 95% band under the no-correlation null
+        band = 1.96 / np.sqrt(lag_df["n"].clip(lower=1))
+        fig.add_trace(Scatter(x=lag_df["Lag"], y=band, mode="lines", line=dict(dash="dash", color="grey"), name="95% band"))
+        fig.add_trace(Scatter(x=lag_df["Lag"], y=-band, mode="lines", line=dict(dash="dash", color="grey"), showlegend=False))
+    return fig
+
+
+def lead_lag_heatmap(xcorr):
+    """company x lag correlation heatmap, cells outside the 95% band marked with *."""
+    corr = xcorr.pivot(index="company", columns="lag", values="correlation")
+    significant = xcorr.assign(sig=xcorr["correlation"].abs() > xcorr["band"]).pivot(index="company", columns="lag", values="sig")
+    text = np.where(significant.to_numpy(dtype=bool), "*", "")
+    fig = Figure(Heatmap(z=corr.to_numpy(), x=corr.columns, y=corr.index, text=text, texttemplate="%{text}",
+                         colorscale="RdBu", zmin=-1, zmax=1, colorbar=dict(title="corr")))
+    fig.update_layout(title="Return vs. Sentiment Correlation by Lag (lag > 0: sentiment leads)",
+                      xaxis_title="Lag (days)", height=max(400, 18 * len(corr)))
+    return fig
+
+
+def volatility(df, max_points=MAX_POINTS):
+    return _lines(df, ["price_volatility", "sentiment_volatility"], "Rolling Volatility", max_points)
+
+
+def moving_averages(df, max_points=MAX_POINTS):
+    return _lines(df, ["Close", "MA_7", "MA_30"], "7 & 30-Day MAs", max_points)
+
+
+def rolling_regression(df, beta, tstat, r2, title, max_points=MAX_POINTS):
+    """Rolling beta, t-stat (with the ±1.96 band) and R² stacked on one date axis."""
+    from plotly.subplots import make_subplots
+
+    fig = make_subplots(rows=3, cols=1, shared_xaxes=True, vertical_spacing=0.04, row_heights=[0.4, 0.35, 0.25])
+    fig.add_trace(_line_trace(df, beta, max_points, name="beta"), row=1, col=1)
+    fig.add_trace(_line_trace(df, tstat, max_points, name="t-stat"), row=2, col=1)
+    fig.add_trace(_line_trace(df, r2, max_points, name="R²"), row=3, col=1)
+    for level in (-1.96, 1.96):
+        fig.add_hline(y=level, line_dash="dot", line_color="grey", row=2, col=1)
+    fig.update_yaxes(title_text="beta", row=1, col=1)
+    fig.update_yaxes(title_text="t-stat", row=2, col=1)
+    fig.update_yaxes(title_text="R²", range=[0, 1], row=3, col=1)
+    fig.update_layout(title=title, height=600, showlegend=False)
+    return fig
+
+
+def sentiment_histogram(df):
+    return px.histogram(df, x="avg_sentiment", nbins=30, title="Histogram of Sentiment")
+
+
+def backtest(bt, max_points=MAX_POINTS):
+    return _lines(bt, ["cumulative_stock", "cumulative_strategy"], "Cumulative Strategy vs. Stock", max_points,
+                  yaxis_title="Cumulative Return")
+
+
+def payload_bytes(fig):
+    """Size of the JSON spec sent to the browser for this figure."""
+    return len(fig.to_json().encode("utf-8"))
+
+
+def sweep_heatmap(matrix, metric):
+    """hold x threshold heatmap from backtest_engine.heatmap()."""
+    fig = px.imshow(matrix, text_auto=".2f", aspect="auto", color_continuous_scale="RdYlGn",
+                    labels=dict(x="Alert Threshold", y="Hold (days)", color=metric),
+                    title=f"Threshold Sweep – {metric}")
+    fig.update_yaxes(type="category")
+    return fig
+
+
+def sentiment_panel_heatmap(matrix):
+    """company x date average-sentiment heatmap (one WebGL-free trace, fine for hundreds of rows)."""
+    fig = Figure(Heatmap(z=matrix.to_numpy(), x=matrix.columns, y=matrix.index, colorscale="RdYlGn",
+                         zmin=-1, zmax=1, colorbar=dict(title="sentiment"), hoverongaps=False))
+    fig.update_layout(title="Daily Sentiment by Company", xaxis_title="Date", height=max(400, 14 * len(matrix)))
+    return fig
+
+
+def correlation_heatmap(corr, title):
+    fig = Figure(Heatmap(z=corr.to_numpy(), x=corr.columns, y=corr.index, colorscale="RdBu", zmin=-1, zmax=1,
+                         colorbar=dict(title="corr"), hoverongaps=False))
+    fig.update_layout(title=title, height=max(500, 14 * len(corr)), yaxis=dict(autorange="reversed"))
+    return fig
+
+
+def caar(aar):
+    """Cumulative average abnormal return around events, one line per event type."""
+    fig = px.line(aar, x="day", y="CAAR", color="type", markers=True,
+                  title="Cumulative Average Abnormal Return around Sentiment Events")
+    fig.add_vline(x=0, line_dash="dash", line_color="grey")
+    fig.update_layout(xaxis_title="Sessions relative to event", yaxis_title="CAAR", yaxis_tickformat=".2%")
+    return fig
+
+
+def index_sentiment(index, max_points=MAX_POINTS):
+    """Composite index sentiment vs. index level (when index prices exist)."""
+    fig = Figure()
+    fig.add_trace(_line_trace(index, "composite", max_points, name="Composite Sentiment", yaxis="y2"))
+    if index["index_close"].notna().any():
+        fig.add_trace(_line_trace(index.dropna(subset=["index_close"]), "index_close", max_points,
+                                  name="DAX", yaxis="y1"))
+    fig.update_layout(
+        xaxis=dict(title="Date"),
+        yaxis=dict(title="Index Level", side="left"),
+        yaxis2=dict(title="Composite Sentiment", overlaying="y", side="right", range=[-1, 1]),
+        height=500
+    )
+    return fig
+
+
+def contributions(day):
+    """Constituent contributions to one day's composite, largest first."""
+    fig = px.bar(day, x="contribution", y="company", orientation="h", color="sentiment",
+                 color_continuous_scale="RdYlGn", range_color=[-1, 1], hover_data=["weight"])
+    fig.update_layout(yaxis=dict(autorange="reversed"), height=max(300, 22 * len(day)))
+    return fig
@@ -0,0 +1,95 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import argparse
+import logging
+import numpy as np
+import pandas as pd
+from scripts.feature_store import rolling_regression, REGRESSION_MIN_SHARE
+
+# ---------------- LOGGING ----------------
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+# Checks feature_store.rolling_regression (sliding-window sums) against
+# scipy's linregress fitted window by window, on a synthetic panel with
+# companies of different lengths back to back (windows must not reach
+# into the previous company), scattered NaN gaps, a run of NaNs longer
+# than the window and a company with a constant regressor. Exits 1 on a
+# mismatch. Needs scipy (not a runtime dependency).
+
+
+def synthetic_panel(lengths=(90, 45, 130, 12), seed=0):
+    """(company, date)-sorted y/x columns with a known beta per company."""
+    rng = np.random.default_rng(seed)
+    frames = []
+    for i, rows in enumerate(lengths):
+        x = rng.normal(0, 0.3, rows)
+        if i == 1:
+            x[:] = 0.25  # constant regressor: no slope anywhere
+        y = 0.02 * (i + 1) * x + rng.normal(0, 0.01, rows) + 100.0 * i  # level jumps at company boundaries
+        x[rng.random(rows) < 0.1] = np.nan
+        y[rng.random(rows) < 0.1] = np.nan
+        if rows > 80:
+            y[40:70] = np.nan  # longer than the short window
+        frames.append(pd.DataFrame({"company": f"c{i}", "y": y, "x": x}))
+    panel = pd.concat(frames, ignore_index=True)
+    panel["position"] = panel.groupby("company").cumcount()
+    return panel
+
+
+def reference(y, x, position, window, min_obs):
+    """(beta, tstat, r2) per row from linregress over each complete window of one company."""
+    from scipy.stats import linregress
+
+    out = np.full((3, len(y)), np.nan)
+    for i in range(len(y)):
+        if position[i] < window - 1:
+            continue
+        wy, wx = y[i - window + 1:i + 1], x[i - window + 1:i + 1]
+        keep = ~(np.isnan(wx) | np.isnan(wy))
+        wy, wx = wy[keep], wx[keep]
+        if len(wy) < min_obs or np.ptp(wx) == 0 or np.ptp(wy) == 0:
+            continue
+        fit = linregress(wx, wy)
+        out[:, i] = fit.slope, fit.slope / fit.stderr if fit.stderr > 0 else np.nan, fit.rvalue ** 2
+    return out
+
+
+def check(panel, window, rtol=1e-6, atol=1e-9):
+    """Number of mismatching (row, stat) cells for one window length."""
+    y, x = panel["y"].to_numpy(dtype="float64"), panel["x"].to_numpy(dtype="float64")
+    position = panel["position"].to_numpy()
+    min_obs = max(3, int(np.ceil(window * REGRESSION_MIN_SHARE)))
+    got = np.vstack(rolling_regression(y, x, position, window))
+    want = reference(y, x, position, window, min_obs)
+
+    bad = 0
+    for name, g, w in zip(["beta", "tstat", "r2"], got, want):
+        mismatch = (np.isnan(g) != np.isnan(w)) | ~np.isclose(g, w, rtol=rtol, atol=atol, equal_nan=True)
+        if mismatch.any():
+            rows = np.flatnonzero(mismatch)
+            logger.error(f"❌ window {window} {name}: {len(rows)} rows differ, first at row {rows[0]} "
+                         f"({panel['company'].iloc[rows[0]]}, position {position[rows[0]]}): "
+                         f"got {g[rows[0]]}, linregress {w[rows[0]]}")
+        bad += int(mismatch.sum())
+    logger.info(f"{'✅' if not bad else '❌'} window {window}: {np.isfinite(want[0]).sum()} fitted windows, "
+                f"{bad} mismatches")
+    return bad
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check rolling_regression against scipy linregress")
+    parser.add_argument("--windows", default="5,20,60", help="comma-separated window lengths")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    panel = synthetic_panel(seed=args.seed)
+    bad = sum(check(panel, int(w)) for w in args.windows.split(","))
+    if bad:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -73,54 +73,77 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 import pandas as pd
+import argparse
 import logging
 from config import DAILY_SENTIMENT_FILE, DAX_PRICES_FILE, COMPANY_DATA_DIR
+from scripts import archive, universe
+from scripts.panel import company_key
+from scripts.storage import write_csv
 
 # ---------------- LOGGING SETUP ----------------
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
-# --------------- SETUP -------------------------
-COMPANY_DATA_DIR.mkdir(parents=True, exist_ok=True)
+# Joined input columns; everything else in a company file is derived from them
+BASE_COLUMNS = ["date", "avg_sentiment", "Close"]
+# Archived rows prepended as context for the rolling features (longest window is 30)
+FEATURE_CONTEXT_ROWS = 30
 
-# Load data
-sentiment_df = pd.read_csv(DAILY_SENTIMENT_FILE, parse_dates=["date"])
-price_df = pd.read_csv(DAX_PRICES_FILE, parse_dates=["Date"])
-price_df.rename(columns={"Date": "date"}, inplace=True)
 
-# Normalize company names
-sentiment_df["company_name"] = sentiment_df["company_name"].str.strip().str.title()
-price_df["Company"] = price_df["Company"].str.strip().str.title()
+def archived_context(key, frozen):
+    """The company's last archived rows (up to `frozen`, the newest archived date)."""
+    old = archive.read("company_data", start=frozen - pd.Timedelta(days=3 * FEATURE_CONTEXT_ROWS),
+                       filters=[("company", "==", key)])
+    if old is None:
+        return None
+    return old.drop(columns="company").sort_values("date").tail(FEATURE_CONTEXT_ROWS).reset_index(drop=True)
 
-# Get intersection of companies
-companies = sorted(set(sentiment_df["company_name"]).intersection(price_df["Company"]))
 
-# --------------- PROCESS EACH COMPANY ----------------
-for company in companies:
+def load_inputs():
+    sentiment_df = pd.read_csv(DAILY_SENTIMENT_FILE, parse_dates=["date"])
+    price_df = pd.read_csv(DAX_PRICES_FILE, parse_dates=["Date"])
+    price_df.rename(columns={"Date": "date"}, inplace=True)
+
+    # Normalize company names
+    sentiment_df["company_name"] = sentiment_df["company_name"].str.strip().str.title()
+    price_df["Company"] = price_df["Company"].str.strip().str.title()
+    return sentiment_df, price_df
+
+
+def update_company(company, sentiment_df, price_df):
+    """Merge one company's new rows into its CSV and recompute its features."""
     sentiment = sentiment_df[sentiment_df["company_name"] == company][["date", "avg_sentiment"]].copy()
     price = price_df[price_df["Company"] == company][["date", "Close"]].copy()
 
     df_new = pd.merge(sentiment, price, on="date", how="inner")
+    # archived days are frozen: only days after the archive go to the hot file
+    frozen = archive.newest("company_data")
+    context = None
+    if frozen is not None:
+        df_new = df_new[df_new["date"] > frozen]
+        context = archived_context(company_key(company), frozen)
     if df_new.empty:
         logger.warning(f"⚠️ No data for {company}, skipping.")
-        continue
+        return
 
-    filename = f"{company.replace(' ', '_')}.csv"
-    filepath = COMPANY_DATA_DIR / filename
+    filepath = COMPANY_DATA_DIR / f"{company_key(company)}.csv"
 
     if filepath.exists():
         df_existing = pd.read_csv(filepath, parse_dates=["date"])
+        if context is not None:
+            df_existing = pd.concat([context, df_existing], ignore_index=True)
         df_combined = pd.concat([df_existing, df_new], ignore_index=True)
-        df_combined.drop_duplicates(subset=["date"], inplace=True)
+        # A re-delivered day replaces the stored one (restated price, more articles)
+        df_combined.drop_duplicates(subset=["date"], keep="last", inplace=True)
+        df_combined.sort_values("date", inplace=True)
+        df_combined.reset_index(drop=True, inplace=True)
 
         # Only continue if new data exists
-        if df_combined.equals(df_existing):
+        if df_combined[BASE_COLUMNS].equals(df_existing[BASE_COLUMNS]):
             logger.info(f"⏩ No changes for {company}, skipping write.")
-            continue
+            return
     else:
-        df_combined = df_new
-
-    df_combined.sort_values("date", inplace=True)
+        df_combined = df_new.sort_values("date")
 
     # Feature Engineering
     df_combined["sentiment_7d"] = df_combined["avg_sentiment"].rolling(7).mean()
@@ -142,7 +165,37 @@ for company in companies:
     df_combined["weekday"] = df_combined["date"].dt.day_name()
     df_combined["month"] = df_combined["date"].dt.month
 
-    df_combined.to_csv(filepath, index=False)
+    # archived context rows are inputs only, the archive keeps its own copy
+    if frozen is not None:
+        df_combined = df_combined[df_combined["date"] > frozen]
+    write_csv(df_combined, filepath, index=False)
     logger.info(f"✅ Updated CSV for {company}")
 
-logger.info("🏁 All company CSVs updated with advanced features.")
+
+def update_companies(companies):
+    """Shard worker: every company writes only its own file, so shards never collide."""
+    sentiment_df, price_df = load_inputs()
+    for company in companies:
+        update_company(company, sentiment_df, price_df)
+    return len(companies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-company sentiment/price CSVs with features")
+    universe.add_arguments(parser)
+    args = parser.parse_args()
+
+    COMPANY_DATA_DIR.mkdir(parents=True, exist_ok=True)
+    sentiment_df, price_df = load_inputs()
+
+    # Companies available in both datasets, restricted to the selected universe members
+    wanted = {m["key"] for m in universe.selected(args)}
+    companies = sorted(c for c in set(sentiment_df["company_name"]).intersection(price_df["Company"])
+                       if company_key(c) in wanted)
+
+    updated = sum(universe.run_sharded(update_companies, companies, args.workers))
+    logger.info(f"🏁 {updated} company CSVs processed with advanced features.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import argparse
+import io
+import json
+import logging
+import time
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from config import DAX_PRICES_FILE, DAILY_SENTIMENT_FILE, QUALITY_DIR
+from scripts.panel import company_key
+from scripts.storage import write_bytes, write_csv, write_text
+from scripts.trading_calendar import trading_sessions
+from scripts.universe import load_universes
+
+# ---------------- LOGGING ----------------
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+# Data-quality stage, run after aggregation and before the company files
+# are built. Only newly ingested rows are validated: every row is hashed on
+# its raw CSV text, and a row is new if its hash is not in the set of rows
+# that passed an earlier run (state/<dataset>.known.npy). A restated price
+# or a sentiment day that gained articles hashes differently, so it is
+# checked again; unchanged history never is.
+#
+# Checks are whole-column operations over the new rows. History is only
+# parsed for the companies that have new rows, back to CONTEXT_DAYS before
+# the oldest one, to give each new row its previous date and close
+# (session-gap and price-jump checks).
+#
+# Rows failing an "error" check (and "warn" checks with --strict) are
+# removed from the input file and appended to quarantine/<dataset>.csv with
+# the failed checks, so downstream stages never see them. A quarantined row
+# that is fetched or aggregated again is removed again, but logged only
+# once. Every run writes a compact JSON report to reports/<run>.json.
+DATASETS = {
+    "prices": {
+        "path": DAX_PRICES_FILE, "company": "Company", "date": "Date",
+        "required": ["Date", "Close", "Company"], "ranges": {"Close": (0.0, None)}, "gaps": True,
+    },
+    "daily_sentiment": {
+        "path": DAILY_SENTIMENT_FILE, "company": "company_name", "date": "date",
+        "required": ["company_name", "date", "avg_sentiment"],
+        "ranges": {"avg_sentiment": (-1.0, 1.0), "article_count": (1, None)}, "gaps": False,
+    },
+}
+# error: quarantined; warn: reported (quarantined with --strict); info: reported only
+RULES = {
+    "unparseable": "error",
+    "out_of_range": "error",
+    "duplicate_key": "error",
+    "unknown_company": "error",
+    "non_session_date": "warn",
+    "price_jump": "warn",
+    "few_articles": "warn",
+    "missing_sessions": "info",
+}
+PRICE_JUMP = 0.25  # |close / previous close - 1| above this is an outlier
+# How far before the oldest new row to look for previous rows (gap/jump context)
+CONTEXT_DAYS = 366
+MIN_ARTICLES = 2
+EXAMPLES = 5
+KEEP_REPORTS = 50
+STATE_DIR = QUALITY_DIR / "state"
+REPORTS_DIR = QUALITY_DIR / "reports"
+QUARANTINE_DIR = QUALITY_DIR / "quarantine"
+
+
+class SchemaError(ValueError):
+    """An input file is missing required columns; the run must not go on."""
+
+
+# ---------------- STATE ----------------
+def _state_path(dataset, kind):
+    return STATE_DIR / f"{dataset}.{kind}.npy"
+
+
+def load_hashes(dataset, kind):
+    path = _state_path(dataset, kind)
+    return np.load(path) if path.exists() else np.empty(0, dtype="uint64")
+
+
+def save_hashes(dataset, kind, hashes):
+    # kept sorted, so membership is a binary search (see member_of)
+    buf = io.BytesIO()
+    np.save(buf, np.sort(hashes))
+    write_bytes(_state_path(dataset, kind), buf.getvalue())
+
+
+def row_hashes(raw):
+    return pd.util.hash_pandas_object(raw, index=False).to_numpy()
+
+
+def member_of(values, sorted_values):
+    """np.isin for a sorted right-hand side, without re-sorting it."""
+    if len(sorted_values) == 0:
+        return np.zeros(len(values), dtype=bool)
+    pos = np.searchsorted(sorted_values, values).clip(max=len(sorted_values) - 1)
+    return sorted_values[pos] == values
+
+
+def known_companies():
+    """Company keys of every member of every universe."""
+    return {company_key(m["name"]) for spec in load_universes().values()
+            for m in spec["members"] if isinstance(m, dict)}
+
+
+# ---------------- CHECKS ----------------
+def previous_rows(company, dates, close):
+    """Previous (date, close) of every row within its company, by date."""
+    frame = pd.DataFrame({"company": company, "date": dates, "close": close})
+    frame = frame.sort_values(["company", "date"], kind="stable")
+    grouped = frame.groupby("company", sort=False)
+    prev = pd.DataFrame({"date": grouped["date"].shift(), "close": grouped["close"].shift()}).reindex(
+        range(len(company)))
+    return prev["date"], prev["close"].to_numpy()
+
+
+def run_checks(raw, spec, new, companies):
+    """{check: mask over all rows}, plus the missing-session count of each flagged row."""
+    n = len(raw)
+    rows = np.flatnonzero(new)
+    sub = raw.iloc[rows]
+    checks = {}
+
+    def on_new(mask):
+        out = np.zeros(n, dtype=bool)
+        out[rows] = np.asarray(mask, dtype=bool)
+        return out
+
+    new_dates = pd.to_datetime(sub[spec["date"]], format="ISO8601", errors="coerce")
+    bad = new_dates.isna().to_numpy().copy()
+    out_of_range = np.zeros(len(rows), dtype=bool)
+    values = {}
+    for column, (lo, hi) in spec["ranges"].items():
+        if column not in raw.columns:
+            continue
+        v = values[column] = pd.to_numeric(sub[column], errors="coerce")
+        required = column in spec["required"]
+        bad |= (v.isna() & ((sub[column] != "") | required)).to_numpy()
+        out_of_range |= (((v < lo) if lo is not None else False) | ((v > hi) if hi is not None else False)).to_numpy()
+    checks["unparseable"] = on_new(bad)
+    checks["out_of_range"] = on_new(out_of_range)
+
+    # Earlier rows of a key that appears again later; the last one wins (as in the fetchers' merges).
+    # Only rows sharing a key with a new row are looked at.
+    company_codes, _ = pd.factorize(raw[spec["company"]])
+    date_codes, _ = pd.factorize(raw[spec["date"]])
+    key = company_codes.astype("int64") * (date_codes.max() + 1) + date_codes
+    related = np.flatnonzero(member_of(key, np.sort(key[rows])))
+    duplicate = np.zeros(n, dtype=bool)
+    duplicate[related] = pd.Series(key[related]).duplicated(keep="last").to_numpy()
+    checks["duplicate_key"] = duplicate
+
+    names = sub[spec["company"]].str.strip()
+    keys = names.map({name: company_key(name) for name in names.unique()})
+    checks["unknown_company"] = on_new(~keys.isin(companies))
+
+    valid = new_dates.dropna()
+    missing = np.zeros(n, dtype="int64")
+    if valid.empty:
+        return checks, missing
+    first = valid.min()
+    if spec["gaps"]:
+        # History of the companies with new rows, minus rows about to be
+        # quarantined, gives every new row its previous date and close
+        error = np.logical_or.reduce([checks[c] for c in checks if RULES[c] == "error"])
+        cutoff = (first - pd.Timedelta(days=CONTEXT_DAYS)).strftime("%Y-%m-%d")
+        recent = (raw[spec["date"]] >= cutoff).to_numpy()  # ISO dates compare as strings
+        context = np.flatnonzero(member_of(company_codes, np.unique(company_codes[rows])) & recent & ~error)
+        ctx = raw.iloc[context]
+        prev_date, prev_close = previous_rows(company_codes[context],
+                                              pd.to_datetime(ctx[spec["date"]], format="ISO8601", errors="coerce").to_numpy(),
+                                              pd.to_numeric(ctx["Close"], errors="coerce").to_numpy())
+        # context positions of the new rows that are not errors
+        at = np.searchsorted(context, rows).clip(max=max(len(context) - 1, 0))
+        usable = (context[at] == rows) if len(context) else np.zeros(len(rows), dtype=bool)
+        prev_date = pd.Series(np.where(usable, prev_date.to_numpy()[at], np.datetime64("NaT")), index=sub.index)
+        prev_close = np.where(usable, prev_close[at], np.nan)
+        if prev_date.notna().any():
+            first = min(first, prev_date.min())
+    sessions = trading_sessions(first, valid.max())
+    checks["non_session_date"] = on_new(new_dates.notna() & ~new_dates.isin(sessions))
+
+    if spec["gaps"]:
+        has_prev = (prev_date.notna() & new_dates.notna()).to_numpy()
+        gap = (np.searchsorted(sessions, new_dates.fillna(valid.max()), "left")
+               - np.searchsorted(sessions, prev_date.fillna(valid.max()), "right"))
+        gap = np.where(has_prev, gap, 0)
+        missing[rows] = gap
+        checks["missing_sessions"] = on_new(gap > 0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            jump = np.abs(values["Close"].to_numpy() / prev_close - 1)
+        checks["price_jump"] = on_new(has_prev & (jump > PRICE_JUMP))
+    if "article_count" in values:
+        checks["few_articles"] = on_new((values["article_count"] < MIN_ARTICLES).to_numpy())
+    return checks, missing
+
+
+# ---------------- STAGE ----------------
+def validate(dataset, strict=False, full=False, dry_run=False, run=None):
+    """Validate the new rows of one dataset, quarantine failing rows; returns its report entry."""
+    spec = DATASETS[dataset]
+    path = Path(spec["path"])
+    if not path.exists():
+        return {"rows": 0, "new_rows": 0, "skipped": "file missing"}
+    start = time.perf_counter()
+    raw = pd.read_csv(path, dtype=str, keep_default_na=False)
+    missing_columns = [c for c in spec["required"] if c not in raw.columns]
+    if missing_columns:
+        raise SchemaError(f"{path.name} is missing required columns: {', '.join(missing_columns)}")
+
+    hashes = row_hashes(raw)
+    known = load_hashes(dataset, "known")
+    new = np.ones(len(raw), dtype=bool) if full else ~member_of(hashes, known)
+    checks, missing = run_checks(raw, spec, new, known_companies())
+
+    quarantine_levels = {"error", "warn"} if strict else {"error"}
+    quarantined = np.zeros(len(raw), dtype=bool)
+    for check, mask in checks.items():
+        if RULES[check] in quarantine_levels:
+            quarantined |= mask
+
+    report = {"rows": len(raw), "new_rows": int(new.sum()), "quarantined": int(quarantined.sum()), "checks": {}}
+    for check, mask in checks.items():
+        if not mask.any():
+            continue
+        hits = raw.loc[mask, [spec["company"], spec["date"]]]
+        entry = {"severity": RULES[check], "rows": int(mask.sum()),
+                 "examples": [f"{c} {d}" for c, d in hits.head(EXAMPLES).itertuples(index=False)]}
+        if check == "missing_sessions":
+            entry["sessions"] = int(missing[mask].sum())
+        report["checks"][check] = entry
+
+    if not dry_run:
+        if quarantined.any():
+            already = load_hashes(dataset, "quarantined")
+            fresh = quarantined & ~member_of(hashes, already)
+            if fresh.any():
+                failed = pd.Series("", index=raw.index)
+                for check, mask in checks.items():
+                    if RULES[check] in quarantine_levels:
+                        failed[mask & fresh] += check + ";"
+                logged = raw[fresh].assign(failed_checks=failed[fresh].str.rstrip(";"), run=run)
+                log_path = QUARANTINE_DIR / f"{dataset}.csv"
+                if log_path.exists():
+                    logged = pd.concat([pd.read_csv(log_path, dtype=str, keep_default_na=False), logged],
+                                       ignore_index=True)
+                write_csv(logged, log_path, index=False)
+            save_hashes(dataset, "quarantined", np.concatenate([already, hashes[quarantined]]))
+            write_csv(raw[~quarantined], path, index=False)
+        if new.any() or quarantined.any() or len(known) != len(raw):
+            save_hashes(dataset, "known", hashes[~quarantined])
+    report["seconds"] = round(time.perf_counter() - start, 3)
+    return report
+
+
+def prune_reports(keep=KEEP_REPORTS):
+    for path in sorted(REPORTS_DIR.glob("*.json"))[:-keep or None]:
+        path.unlink(missing_ok=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate newly ingested rows and quarantine bad ones")
+    parser.add_argument("--datasets", default=",".join(DATASETS), help="comma-separated: " + ", ".join(DATASETS))
+    parser.add_argument("--strict", action="store_true", help="also quarantine rows failing 'warn' checks")
+    parser.add_argument("--full", action="store_true", help="validate every row, not only new ones")
+    parser.add_argument("--dry-run", action="store_true", help="report only: no quarantine, no state update")
+    args = parser.parse_args()
+
+    run = datetime.now().strftime("%Y%m%dT%H%M%S")
+    report = {"run": run, "strict": args.strict, "full": args.full, "datasets": {}}
+    try:
+        for dataset in args.datasets.split(","):
+            entry = validate(dataset, args.strict, args.full, args.dry_run, run)
+            report["datasets"][dataset] = entry
+            issues = ", ".join(f"{c} {e['rows']}" for c, e in entry.get("checks", {}).items()) or "no issues"
+            logger.info(f"{'⚠️' if entry.get('quarantined') else '✅'} {dataset}: {entry['new_rows']} new of "
+                        f"{entry['rows']} rows, {entry.get('quarantined', 0)} quarantined ({issues})")
+    except SchemaError as e:
+        logger.error(f"❌ {e}")
+        sys.exit(1)
+    if not args.dry_run:
+        write_text(REPORTS_DIR / f"{run}.json", json.dumps(report, indent=1))
+        prune_reports()
+        logger.info(f"📝 Quality report: {REPORTS_DIR / f'{run}.json'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import numpy as np
+
+# Point-reduction for line charts. Both methods keep the first and last
+# point and return indices into the (NaN-free) input, so any column of the
+# original frame can be gathered with the result.
+
+
+def _as_float(x):
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype("datetime64[ns]").astype("int64").astype("float64")
+    return x.astype("float64")
+
+
+def lttb(x, y, n_out):
+    """Largest-Triangle-Three-Buckets: indices of n_out visually representative points."""
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = _as_float(x)
+    y = np.asarray(y, dtype="float64")
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    selected = np.empty(n_out, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    prev = 0
+    for i in range(n_out - 2):
+        start, stop = edges[i], edges[i + 1]
+        next_start, next_stop = stop, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_start:next_stop].mean()
+        avg_y = y[next_start:next_stop].mean()
+        area = np.abs((x[prev] - avg_x) * (y[start:stop] - y[prev])
+                      - (x[prev] - x[start:stop]) * (avg_y - y[prev]))
+        prev = start + int(np.argmax(area))
+        selected[i + 1] = prev
+    return selected
+
+
+def minmax(x, y, n_out):
+    """Min and max of each bucket, preserves spikes exactly."""
+    n = len(y)
+    if n_out >= n or n_out < 4:
+        return np.arange(n)
+    y = np.asarray(y, dtype="float64")
+    edges = np.linspace(0, n, n_out // 2 + 1).astype(int)
+    picks = [0, n - 1]
+    for start, stop in zip(edges[:-1], edges[1:]):
+        if stop > start:
+            bucket = y[start:stop]
+            picks.extend((start + int(np.argmin(bucket)), start + int(np.argmax(bucket))))
+    return np.unique(picks)
+
+
+METHODS = {"lttb": lttb, "minmax": minmax}
+
+
+def downsample(x, y, n_out, method="lttb"):
+    """Drop NaNs, then reduce (x, y) to about n_out points."""
+    x = np.asarray(x)
+    y = np.asarray(y, dtype="float64")
+    valid = ~np.isnan(y)
+    x, y = x[valid], y[valid]
+    idx = METHODS[method](x, y, n_out)
+    return x[idx], y[idx]
@@ -0,0 +1,211 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import argparse
+import hashlib
+import math
+import pickle
+import numpy as np
+import pandas as pd
+from config import CACHE_DIR, DAX_PRICES_FILE
+from scripts.panel import PanelStore, data_fingerprint, price_matrix, index_close
+from scripts.storage import write_bytes
+
+# Market-model event study around sentiment shocks, all events at once.
+#
+# Daily returns come from the raw price file (company_data rows only exist
+# on days with news, so their returns can span several sessions). The market
+# is the index (^GDAXI) once its prices have been fetched, otherwise the
+# equal-weight mean return of the universe. For every event (company c, session t) the estimation and
+# event windows are gathered as (E, W) blocks with one fancy index
+# returns[t + offsets, c]; the OLS fit, abnormal returns and CARs are then
+# plain array reductions over the window axis.
+EVENT_TYPES = {
+    "sentiment_drop": ("sentiment_change", -0.3),
+    "zscore_low": ("sentiment_zscore", -2.0),
+}
+EVENT_WINDOW = (-5, 10)
+ESTIMATION_WINDOW = (-70, -11)
+CAR_WINDOWS = [(-1, 1), (0, 1), (0, 5), (1, 10)]
+MIN_ESTIMATION_OBS = 30
+
+
+def daily_returns(path=DAX_PRICES_FILE):
+    """session x company matrix of close-to-close returns, companies as company_data keys."""
+    return price_matrix(path).pct_change(fill_method=None)
+
+
+def market_returns(returns, index_returns=None):
+    """Index returns aligned to the return grid, or the equal-weight universe mean."""
+    if index_returns is not None:
+        return pd.Series(index_returns).reindex(returns.index)
+    return returns.mean(axis=1)
+
+
+def detect_events(panel, event_types=EVENT_TYPES):
+    """Long frame (type, company, date, value) of every threshold crossing."""
+    frames = []
+    for name, (column, threshold) in event_types.items():
+        hit = panel[panel[column] <= threshold]
+        frames.append(pd.DataFrame({"type": name, "company": hit["company"].astype(str),
+                                    "date": hit["date"], "value": hit[column]}))
+    events = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=["type", "company", "date", "value"])
+    return events.sort_values(["type", "company", "date"], kind="stable").reset_index(drop=True)
+
+
+def _gather(matrix, rows, cols):
+    """matrix[rows, cols] for (E, W) row indices and (E, 1) columns, NaN outside the grid."""
+    rows = np.asarray(rows)
+    cols = np.broadcast_to(cols, rows.shape)
+    valid = (rows >= 0) & (rows < matrix.shape[0])
+    out = np.full(rows.shape, np.nan)
+    out[valid] = matrix[rows[valid], cols[valid]]
+    return out
+
+
+def _window_offsets(window):
+    start, stop = window
+    return np.arange(start, stop + 1)
+
+
+def abnormal_returns(returns, market, events, event_window=EVENT_WINDOW, estimation_window=ESTIMATION_WINDOW,
+                     min_obs=MIN_ESTIMATION_OBS):
+    """Market-model abnormal returns for every event in one vectorized pass.
+
+    returns: session x company frame, market: Series on the same index,
+    events: frame with company and date. Returns (events with alpha, beta and
+    n_est, (E, W) abnormal return array, event-window offsets).
+    """
+    if estimation_window[1] >= event_window[0]:
+        raise ValueError("The estimation window must end before the event window starts")
+    grid = returns.index
+    # events on non-session days count from the next session
+    t = grid.searchsorted(pd.DatetimeIndex(events["date"]), side="left")
+    c = returns.columns.get_indexer(events["company"])
+    keep = (t < len(grid)) & (c >= 0)
+    events = events[keep].reset_index(drop=True)
+    t, c = t[keep][:, None], c[keep][:, None]
+
+    R = returns.to_numpy(dtype="float64")
+    M = np.broadcast_to(market.to_numpy(dtype="float64")[:, None], R.shape)
+    offsets = _window_offsets(event_window)
+
+    # OLS of R on M over each event's estimation window via NaN-masked sums
+    est_rows = t + _window_offsets(estimation_window)[None, :]
+    y, x = _gather(R, est_rows, c), _gather(M, est_rows, c)
+    mask = ~(np.isnan(y) | np.isnan(x))
+    y, x = np.where(mask, y, 0.0), np.where(mask, x, 0.0)
+    n = mask.sum(axis=1)
+    sx, sy, sxx, sxy = x.sum(axis=1), y.sum(axis=1), (x * x).sum(axis=1), (x * y).sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        beta = (n * sxy - sx * sy) / (n * sxx - sx ** 2)
+        alpha = (sy - beta * sx) / n
+    fitted = n >= min_obs
+    alpha, beta = np.where(fitted, alpha, np.nan), np.where(fitted, beta, np.nan)
+
+    ev_rows = t + offsets[None, :]
+    ar = _gather(R, ev_rows, c) - (alpha[:, None] + beta[:, None] * _gather(M, ev_rows, c))
+
+    events = events.assign(session=grid[t[:, 0]], alpha=alpha, beta=beta, n_est=n)
+    return events, ar, offsets
+
+
+def _t_stat(values):
+    """Cross-sectional t statistic of the mean per column, NaN-aware."""
+    n = (~np.isnan(values)).sum(axis=0)
+    mean = np.nanmean(values, axis=0) if values.size else np.full(values.shape[1:], np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        std = np.nanstd(values, axis=0, ddof=1) if values.size else mean
+        t = mean / (std / np.sqrt(n))
+    return mean, t, n
+
+
+def _p_value(t):
+    """Two-sided normal p-value (large-sample approximation)."""
+    return np.array([math.erfc(abs(v) / math.sqrt(2)) if np.isfinite(v) else np.nan for v in np.atleast_1d(t)])
+
+
+def run_event_study(panel, returns, market, event_types=EVENT_TYPES, event_window=EVENT_WINDOW,
+                    estimation_window=ESTIMATION_WINDOW, car_windows=CAR_WINDOWS):
+    """Events with per-window CARs, average abnormal returns by day, and a CAR summary."""
+    events, ar, offsets = abnormal_returns(returns, market, detect_events(panel, event_types),
+                                           event_window, estimation_window)
+    valid = ~np.isnan(events["beta"].to_numpy())
+    events, ar = events[valid].reset_index(drop=True), ar[valid]
+
+    # CAR per event and window from running sums; NaN unless the window is complete
+    pad = np.zeros((len(ar), 1))
+    cum = np.hstack([pad, np.cumsum(np.nan_to_num(ar, nan=0.0), axis=1)])
+    count = np.hstack([pad, np.cumsum(~np.isnan(ar), axis=1)])
+    for start, stop in car_windows:
+        i0, i1 = np.searchsorted(offsets, [start, stop])
+        car = cum[:, i1 + 1] - cum[:, i0]
+        events[f"CAR[{start},{stop}]"] = np.where(count[:, i1 + 1] - count[:, i0] == i1 - i0 + 1, car, np.nan)
+
+    aar_frames, summary_rows = [], []
+    types = events["type"].to_numpy()
+    for name in event_types:
+        block = ar[types == name]
+        mean, t, n = _t_stat(block)
+        caar = np.nancumsum(mean)
+        aar_frames.append(pd.DataFrame({"type": name, "day": offsets, "AAR": mean, "CAAR": caar,
+                                        "t_stat": t, "n": n}))
+        for start, stop in car_windows:
+            cars = events.loc[types == name, f"CAR[{start},{stop}]"].dropna().to_numpy()[:, None]
+            mean_car, t_car, n_car = _t_stat(cars)
+            summary_rows.append({"type": name, "window": f"[{start},{stop}]", "events": int(n_car[0]),
+                                 "mean_CAR": mean_car[0], "t_stat": t_car[0], "p_value": _p_value(t_car[0])[0],
+                                 "share_negative": float((cars < 0).mean()) if len(cars) else np.nan})
+    return {
+        "events": events,
+        "aar": pd.concat(aar_frames, ignore_index=True),
+        "summary": pd.DataFrame(summary_rows),
+    }
+
+
+def _params_key(*params):
+    return hashlib.sha1(repr(params).encode()).hexdigest()[:8]
+
+
+def cached_event_study(panel, version, event_types=EVENT_TYPES, event_window=EVENT_WINDOW,
+                       estimation_window=ESTIMATION_WINDOW, car_windows=CAR_WINDOWS):
+    """run_event_study() persisted per (panel version, price file, parameters) under .cache/."""
+    prices = data_fingerprint(DAX_PRICES_FILE.parent, "dax_*prices.csv")
+    key = _params_key(event_types, event_window, estimation_window, car_windows)
+    path = CACHE_DIR / f"events_{version}_{prices}_{key}.pkl"
+    if path.exists():
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    returns = daily_returns()
+    index = index_close()
+    market = market_returns(returns, index.pct_change() if len(index) else None)
+    result = run_event_study(panel, returns, market, event_types, event_window,
+                             estimation_window, car_windows)
+    write_bytes(path, pickle.dumps(result))
+    # other parameters of the same data stay cached, older data versions go
+    for old in CACHE_DIR.glob("events_*.pkl"):
+        if not old.name.startswith(f"events_{version}_{prices}_"):
+            old.unlink(missing_ok=True)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Market-model event study around sentiment shocks")
+    parser.add_argument("--event-window", default=f"{EVENT_WINDOW[0]}:{EVENT_WINDOW[1]}", help="start:stop in sessions")
+    parser.add_argument("--estimation-window", default=f"{ESTIMATION_WINDOW[0]}:{ESTIMATION_WINDOW[1]}")
+    args = parser.parse_args()
+
+    event_window = tuple(int(v) for v in args.event_window.split(":"))
+    estimation_window = tuple(int(v) for v in args.estimation_window.split(":"))
+    car_windows = [w for w in CAR_WINDOWS if event_window[0] <= w[0] and w[1] <= event_window[1]]
+
+    store = PanelStore()
+    store.refresh()
+    version, panel = store.get()
+    result = cached_event_study(panel, version, EVENT_TYPES, event_window, estimation_window, car_windows)
+    print(result["summary"].to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import logging
+import os
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from config import CACHE_DIR
+
+# ---------------- LOGGING ----------------
+logger = logging.getLogger(__name__)
+
+# Rolling OLS of the 1-day return on each sentiment regressor, per window:
+# {stat}_{regressor}_{window}, e.g. beta_lag1_60
+REGRESSORS = {"sentiment": "avg_sentiment", "lag1": "sentiment_lag1", "lag3": "sentiment_lag3"}
+REGRESSION_WINDOWS = [20, 60]
+REGRESSION_STATS = ["beta", "tstat", "r2"]
+# a window needs this share of complete (return, regressor) pairs
+REGRESSION_MIN_SHARE = 0.5
+
+
+def regression_column(stat, regressor, window):
+    return f"{stat}_{regressor}_{window}"
+
+
+REGRESSION_FEATURES = [regression_column(stat, name, window)
+                       for name in REGRESSORS for window in REGRESSION_WINDOWS for stat in REGRESSION_STATS]
+
+# Parameter-free columns shared by all dashboard sessions
+SHARED_FEATURES = ["price_volatility", "sentiment_volatility", "MA_7", "MA_30"] + REGRESSION_FEATURES
+
+
+def _group_rolling(values, position, window, func):
+    """Rolling stat over a (company, date)-sorted column without crossing companies.
+
+    The rolling window runs over the whole column at once; rows whose window
+    would reach into the previous company (position < window - 1) are masked.
+    """
+    rolled = getattr(pd.Series(values).rolling(window), func)().to_numpy(copy=True)
+    rolled[position < window - 1] = np.nan
+    return rolled
+
+
+def _window_sums(values, window):
+    """Trailing `window`-row sums from one cumulative sum: O(n) for any window."""
+    cs = np.concatenate([[0.0], np.cumsum(values)])
+    out = np.full(len(values), np.nan)
+    if len(values) >= window:
+        out[window - 1:] = cs[window:] - cs[:-window]
+    return out
+
+
+def rolling_regression(y, x, position, window, min_obs=None):
+    """Rolling OLS y ~ a + b*x over a (company, date)-sorted column: (beta, tstat, r2).
+
+    The six regression sums (n, Sx, Sy, Sxx, Syy, Sxy) are sliding-window
+    sums of the zero-filled pairs, so every window of every company costs
+    O(1) after one cumulative sum per column. Windows reaching into the
+    previous company or with fewer than `min_obs` complete pairs are NaN.
+    """
+    min_obs = max(3, min_obs or int(np.ceil(window * REGRESSION_MIN_SHARE)))
+    valid = ~(np.isnan(x) | np.isnan(y))
+    # centring each company keeps the one-pass sums well conditioned (levels
+    # can differ widely between companies); slope and R² are shift-invariant
+    group = np.maximum(np.cumsum(np.asarray(position) == 0) - 1, 0)
+    counts = np.maximum(np.bincount(group, weights=valid), 1)
+    xc = np.where(valid, x - (np.bincount(group, weights=np.where(valid, x, 0.0)) / counts)[group], 0.0)
+    yc = np.where(valid, y - (np.bincount(group, weights=np.where(valid, y, 0.0)) / counts)[group], 0.0)
+
+    n = np.rint(_window_sums(valid.astype("float64"), window))
+    sx, sy = _window_sums(xc, window), _window_sums(yc, window)
+    sxx, syy, sxy = _window_sums(xc * xc, window), _window_sums(yc * yc, window), _window_sums(xc * yc, window)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        var_x = sxx - sx * sx / n
+        var_y = syy - sy * sy / n
+        cov = sxy - sx * sy / n
+        ok = (position >= window - 1) & (n >= min_obs) & (var_x > 1e-12 * n) & (var_y > 1e-12 * n)
+        beta = cov / var_x
+        r2 = np.clip(cov * cov / (var_x * var_y), 0.0, 1.0)
+        tstat = beta / np.sqrt(np.clip(var_y - beta * cov, 0.0, None) / (n - 2) / var_x)
+    tstat[~np.isfinite(tstat)] = np.nan
+    return tuple(np.where(ok, stat, np.nan) for stat in (beta, tstat, r2))
+
+
+def compute_panel_features(panel):
+    """Add SHARED_FEATURES to a (company, date)-sorted panel in one vectorized pass."""
+    panel = panel.copy()
+    position = panel.groupby("company", observed=True).cumcount().to_numpy()
+    close = panel["Close"].to_numpy(dtype="float64")
+
+    price_return = np.full_like(close, np.nan)
+    price_return[1:] = close[1:] / close[:-1] - 1
+    price_return[position == 0] = np.nan
+
+    panel["price_volatility"] = _group_rolling(price_return, position - 1, 7, "std")
+    panel["sentiment_volatility"] = _group_rolling(panel["avg_sentiment"].to_numpy(dtype="float64"), position, 7, "std")
+    panel["MA_7"] = _group_rolling(close, position, 7, "mean")
+    panel["MA_30"] = _group_rolling(close, position, 30, "mean")
+
+    for name, column in REGRESSORS.items():
+        if column not in panel.columns:
+            continue
+        x = panel[column].to_numpy(dtype="float64")
+        for window in REGRESSION_WINDOWS:
+            stats = rolling_regression(price_return, x, position, window)
+            for stat, values in zip(REGRESSION_STATS, stats):
+                panel[regression_column(stat, name, window)] = values
+    return panel
+
+
+def arrow_path(version):
+    return CACHE_DIR / f"panel_{version}.arrow"
+
+
+def write_panel_arrow(panel, version):
+    """Write the panel as an uncompressed Arrow IPC file (memory-mappable)."""
+    path = arrow_path(version)
+    if path.exists():
+        return path
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    table = pa.Table.from_pandas(panel, preserve_index=False)
+    tmp = path.with_suffix(f".tmp{os.getpid()}")
+    with pa.OSFile(str(tmp), "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp, path)
+    logger.info(f"💾 Arrow panel written: {path.name} ({path.stat().st_size / 1024:.0f} KB)")
+    return path
+
+
+def open_panel_arrow(path):
+    """Memory-map an Arrow panel; the returned table references the OS page cache."""
+    source = pa.memory_map(str(path), "r")
+    return pa.ipc.open_file(source).read_all()
+
+
+def cleanup_arrow(keep_version):
+    """Drop Arrow files of older data versions."""
+    for path in CACHE_DIR.glob("panel_*.arrow"):
+        if path != arrow_path(keep_version):
+            try:
+                path.unlink()
+            except OSError:
+                pass
@@ -102,95 +102,153 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 import pandas as pd
-import yfinance as yf
 from datetime import datetime, timedelta
-import os
+import argparse
 import logging
-from config import DAX_PRICES_FILE  # from config.py
+from config import DAX_PRICES_FILE, DAX_INDEX_FILE  # from config.py
+from scripts import raw_responses, universe
+from scripts.storage import write_csv
 
 # ---------------- LOGGING ----------------
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
 # ------------- CONFIG --------------------
-DAX_TICKERS = {
-    'Adidas': 'ADS.DE', 'Airbus': 'AIR.DE', 'Allianz': 'ALV.DE', 'BASF': 'BAS.DE',
-    'Bayer': 'BAYN.DE', 'Beiersdorf': 'BEI.DE', 'BMW': 'BMW.DE', 'Brenntag': 'BNR.DE',
-    'Commerzbank': 'CBK.DE', 'Continental': 'CON.DE', 'Covestro': '1COV.DE',
-    'Daimler Truck': 'DTG.DE', 'Delivery Hero': 'DHER.DE', 'Deutsche Bank': 'DBK.DE',
-    'Deutsche Börse': 'DB1.DE', 'Deutsche Post': 'DHL.DE', 'Deutsche Telekom': 'DTE.DE',
-    'Deutsche Wohnen': 'DWNI.DE', 'E.ON': 'EOAN.DE', 'Fresenius': 'FRE.DE',
-    'Fresenius Medical Care': 'FME.DE', 'Hannover Rück': 'HNR1.DE', 'Heidelberg Materials': 'HEI.DE',
-    'Hellofresh': 'HFG.DE', 'Henkel': 'HEN3.DE', 'Infineon': 'IFX.DE', 'Mercedes-Benz': 'MBG.DE',
-    'Merck': 'MRK.DE', 'MTU Aero Engines': 'MTX.DE', 'Münchener Rück': 'MUV2.DE',
-    'Porsche AG': 'P911.DE', 'Porsche SE': 'PAH3.DE', 'Qiagen': 'QIA.DE', 'Rheinmetall': 'RHM.DE',
-    'RWE': 'RWE.DE', 'SAP': 'SAP.DE', 'Sartorius': 'SRT3.DE', 'Siemens': 'SIE.DE',
-    'Siemens Energy': 'ENR.DE', 'Siemens Healthineers': 'SHL.DE', 'Volkswagen': 'VOW3.DE',
-    'Vonovia': 'VNA.DE', 'Zalando': 'ZAL.DE'
-}
+# Companies and tickers come from universes.json (see scripts/universe.py)
 DEFAULT_START_DATE = datetime(2025, 1, 1)
 END_DATE = datetime.today()
+PRICE_KEYS = ["Company", "Date"]
+INDEX_KEYS = ["Index", "Date"]
 # ----------------------------------------
 
-# Step 1: Determine the start date
-if DAX_PRICES_FILE.exists():
-    df_existing = pd.read_csv(DAX_PRICES_FILE, parse_dates=["Date"])
-    latest_date = df_existing["Date"].max()
-    start_date = latest_date + timedelta(days=1)
-    logger.info(f"🔁 Updating from {start_date.date()} to {END_DATE.date()}")
-else:
-    df_existing = pd.DataFrame()
-    start_date = DEFAULT_START_DATE
-    logger.info(f"🆕 Creating new database from {start_date.date()} to {END_DATE.date()}")
-
-# Step 2: Download new data
-new_data = []
 
-for company, ticker in DAX_TICKERS.items():
-    logger.info(f"📈 Fetching {company} ({ticker})...")
-    try:
-        df = yf.download(ticker, start=start_date, end=END_DATE)
-
-        if df.empty:
-            logger.warning(f"⚠️ No new data for {company}")
-            continue
-
-        df = df.reset_index()
-
-        # Handle possible MultiIndex (rare with yfinance but safe to check)
-        if isinstance(df.columns, pd.MultiIndex):
-            df.columns = ['_'.join(col).strip() if col[1] else col[0] for col in df.columns]
-
-        close_col = next((col for col in df.columns if col.lower().startswith("close")), None)
-        if not close_col:
-            logger.warning(f"⚠️ Could not find Close column for {ticker}")
-            continue
-
-        df = df[["Date", close_col]].rename(columns={close_col: "Close"})
-        df["Company"] = company
-        df["Ticker"] = ticker
-
-        new_data.append(df)
-
-    except Exception as e:
-        logger.error(f"❌ Error fetching {company} ({ticker}): {e}")
-
-# Step 3: Combine and save
-if new_data:
-    df_new = pd.concat(new_data, ignore_index=True)
-
-    if not df_existing.empty:
-        df_combined = pd.concat([df_existing, df_new], ignore_index=True)
-        df_combined.drop_duplicates(subset=["Date", "Company"], inplace=True)
+def parse_download(df, ticker):
+    """(Date, Close) rows of a yfinance download, empty if it has none.
+
+    Shared by the live fetch and raw_responses.py replay.
+    """
+    if df.empty:
+        return pd.DataFrame()
+    df = df.reset_index()
+
+    # Handle possible MultiIndex (rare with yfinance but safe to check)
+    if isinstance(df.columns, pd.MultiIndex):
+        df.columns = ['_'.join(col).strip() if col[1] else col[0] for col in df.columns]
+
+    close_col = next((col for col in df.columns if col.lower().startswith("close")), None)
+    if not close_col:
+        logger.warning(f"⚠️ Could not find Close column for {ticker}")
+        return pd.DataFrame()
+    return df[["Date", close_col]].rename(columns={close_col: "Close"})
+
+
+def download_close(member, start_date, end_date=END_DATE, label="Company"):
+    """Daily closes for one member's ticker as (Date, Close), empty if nothing new."""
+    import yfinance as yf
+
+    ticker = member["ticker"]
+    df = yf.download(ticker, start=start_date, end=end_date)
+    # keep the raw frame, so parsing can be re-run offline (raw_responses.py replay)
+    raw_responses.record("prices", df, {"name": member["name"], "ticker": ticker, "label": label,
+                                        "start": str(start_date), "end": str(end_date),
+                                        "header_rows": df.columns.nlevels})
+    return parse_download(df, ticker)
+
+
+def fetch_prices(members, start_dates, label="Company"):
+    """Download every member's new closes; runs inside a shard worker.
+
+    `start_dates` maps member names to their first missing day; members
+    without stored rows start at DEFAULT_START_DATE.
+    """
+    new_data = []
+    for member in members:
+        company, ticker = member["name"], member["ticker"]
+        start_date = start_dates.get(company, DEFAULT_START_DATE)
+        logger.info(f"📈 Fetching {company} ({ticker}) from {start_date.date()}...")
+        try:
+            df = download_close(member, start_date, label=label)
+            if df.empty:
+                logger.warning(f"⚠️ No new data for {company}")
+                continue
+            df[label] = company
+            df["Ticker"] = ticker
+            new_data.append(df)
+        except Exception as e:
+            logger.error(f"❌ Error fetching {company} ({ticker}): {e}")
+    return pd.concat(new_data, ignore_index=True) if new_data else pd.DataFrame()
+
+
+def start_dates_for(path, label="Company"):
+    """{member name: day after its newest stored close}, so members added to
+    the universe later still get their full history from DEFAULT_START_DATE."""
+    if not path.exists():
+        return {}
+    latest = pd.read_csv(path, usecols=["Date", label], parse_dates=["Date"]).groupby(label)["Date"].max()
+    return {name: (day + timedelta(days=1)).to_pydatetime() for name, day in latest.items()}
+
+
+def merge_into(path, frames, keys):
+    """Merge new rows into a price file; shard order never changes the output."""
+    existing = pd.read_csv(path, parse_dates=["Date"]) if path.exists() else None
+    df_new = universe.merge_frames(frames, keys)
+    if df_new.empty:
+        return 0
+    df_combined = universe.merge_frames([existing, df_new], keys)
+    write_csv(df_combined, path, index=False)
+    return len(df_new)
+
+
+def update_index_prices(universe_name):
+    """Index levels (e.g. ^GDAXI), kept out of the constituent file so they never show up as companies."""
+    entries = universe.indices(universe_name)
+    if not entries:
+        return
+    index_data = fetch_prices(entries, start_dates_for(DAX_INDEX_FILE, "Index"), label="Index")
+    if merge_into(DAX_INDEX_FILE, [index_data], INDEX_KEYS):
+        logger.info(f"✅ Index prices updated: {DAX_INDEX_FILE}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental daily closes for a universe")
+    universe.add_arguments(parser)
+    parser.add_argument("--merge", action="store_true", help="merge shard files written by --shard runs")
+    args = parser.parse_args()
+
+    # Step 1: Merge shard outputs from earlier --shard runs (e.g. on other machines)
+    if args.merge:
+        files = universe.shard_files(DAX_PRICES_FILE)
+        added = merge_into(DAX_PRICES_FILE, [pd.read_csv(f, parse_dates=["Date"]) for f in files], PRICE_KEYS)
+        for f in files:
+            f.unlink()
+        logger.info(f"✅ Merged {len(files)} shard files ({added} rows) into {DAX_PRICES_FILE}")
+        update_index_prices(args.universe)
+        return
+
+    # Step 2: Determine the start date per member (new members get their full history)
+    members = [m for m in universe.selected(args) if m.get("ticker")]
+    start_dates = start_dates_for(DAX_PRICES_FILE)
+    new_members = [m["name"] for m in members if m["name"] not in start_dates]
+    logger.info(f"🔁 Updating {len(members)} companies to {END_DATE.date()}"
+                + (f" ({len(new_members)} new, from {DEFAULT_START_DATE.date()})" if new_members else ""))
+
+    # Step 3: Download new data, one shard of the universe per worker
+    frames = universe.run_sharded(fetch_prices, members, args.workers, start_dates)
+
+    # Step 4: A --shard run writes its own file; otherwise merge and save
+    if args.shard is not None:
+        out = universe.shard_path(DAX_PRICES_FILE, args.shard)
+        write_csv(universe.merge_frames(frames, PRICE_KEYS), out, index=False)
+        logger.info(f"✅ Shard {args.shard[0]}/{args.shard[1]}: {len(members)} companies -> {out.name}")
+        return
+
+    added = merge_into(DAX_PRICES_FILE, frames, PRICE_KEYS)
+    if added:
+        logger.info(f"✅ Saved {added} new rows. Updated CSV: {DAX_PRICES_FILE}")
     else:
-        df_combined = df_new
+        logger.info("⛔ No new data found — CSV unchanged.")
+    update_index_prices(args.universe)
 
-    df_combined.sort_values(by=["Company", "Date"], inplace=True)
-    df_combined.reset_index(drop=True, inplace=True)
-
-    os.makedirs(DAX_PRICES_FILE.parent, exist_ok=True)
-    df_combined.to_csv(DAX_PRICES_FILE, index=False)
 
-    logger.info(f"✅ Saved {len(df_new)} new rows. Updated CSV: {DAX_PRICES_FILE}")
-else:
-    logger.info("⛔ No new data found — CSV unchanged.")
+if __name__ == "__main__":
+    main()
@@ -126,112 +126,161 @@ sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 import pandas as pd
 import time
-import os
 import random
+import argparse
 import logging
-from tqdm import tqdm
 from datetime import datetime, timedelta
-from newsapi import NewsApiClient
-from config import DAX_ARTICLES_FILE, FULL_SENTIMENT_FILE, NEWS_API_KEY
+from config import DAX_ARTICLES_FILE, NEWS_API_KEY
+from scripts import raw_responses, universe
+from scripts.storage import write_csv
 
 # ---------------- LOGGING ----------------
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
-# ---------------- DAX Tickers ----------------
-dax_tickers = [
-    "GDAXI", "Adidas", "Airbus", "Allianz", "BASF", "Bayer", "Beiersdorf", "BMW", "Brenntag", "Commerzbank",
-    "Continental", "Covestro", "Daimler Truck", "Delivery Hero", "Deutsche Bank", "Deutsche Börse", "Deutsche Post (DHL Group)",
-    "Deutsche Telekom", "Deutsche Wohnen", "E.ON", "Fresenius", "Fresenius Medical Care", "Hannover Rück",
-    "Heidelberg Materials", "Hellofresh", "Infineon", "Mercedes-Benz Group", "Merck", "MTU Aero Engines",
-    "Münchener Rück", "Porsche AG", "Porsche SE", "Qiagen", "Rheinmetall", "RWE", "SAP", "Sartorius",
-    "Siemens", "Siemens Energy", "Siemens Healthineers", "Symrise", "Volkswagen (VZ)", "Zalando"
-]
-
 # ---------------- Setup ----------------
-newsapi = NewsApiClient(api_key=NEWS_API_KEY)
-article_list = []
-
-today = datetime.now()
-thirty_days_ago = today - timedelta(days=30)
-today_str = today.strftime('%Y-%m-%d')
-thirty_days_ago_str = thirty_days_ago.strftime('%Y-%m-%d')
-
-total_fetched = total_with_date = total_without_date = 0
-
-# ---------------- Fetch Articles ----------------
-for company_name in tqdm(dax_tickers, desc="🔍 Fetching news"):
-    try:
-        all_articles = newsapi.get_everything(
-            q=company_name,
-            sources='handelsblatt,the-economist,business-insider,reuters,forbes,bloomberg,yahoo-finance',
-            domains='handelsblatt.de,businessinsider.de,reuters.com,forbes.com,bloomberg.com,finance.yahoo.com',
-            from_param=thirty_days_ago_str,
-            to=today_str,
-            sort_by='relevancy',
-            language='en'  # or 'de' if you prefer
-        )
-
-        articles = all_articles.get('articles', [])
-        total_fetched += len(articles)
-
-        with_date = 0
-
-        for article in articles:
-            published_at = article.get('publishedAt')
-            if not published_at:
-                total_without_date += 1
-                continue
-
-            article_list.append({
-                'company_name': company_name,
-                'title': article.get('title'),
-                'description': article.get('description'),
-                'url': article.get('url'),
-                'publishedAt': published_at,
-                'source': article.get('source', {}).get('name')
-            })
-            with_date += 1
-
-        total_with_date += with_date
-        logger.info(f"{company_name}: {len(articles)} total | 🟢 {with_date} with date | 🔴 {len(articles)-with_date} without date")
-
-    except Exception as e:
-        logger.error(f"❌ Error fetching articles for {company_name}: {e}")
-
-    time.sleep(random.uniform(2.5, 3.5))  # API rate limiter
-
-# ---------------- Summary ----------------
-logger.info("\n📊 Fetch Summary:")
-logger.info(f"   Total articles fetched: {total_fetched}")
-logger.info(f"   With 'publishedAt':     {total_with_date}")
-logger.info(f"   Without 'publishedAt':  {total_without_date}")
-
-# ---------------- Clean & Combine ----------------
-df_new = pd.DataFrame(article_list)
-df_new.drop_duplicates(subset=["company_name", "title", "publishedAt"], inplace=True)
-df_new.reset_index(drop=True, inplace=True)
-
-# Load previous if exists
-if DAX_ARTICLES_FILE.exists():
-    df_existing = pd.read_csv(DAX_ARTICLES_FILE, parse_dates=["publishedAt"])
-    df_combined = pd.concat([df_existing, df_new], ignore_index=True)
-else:
-    df_combined = df_new
-
-# Final cleanup
-df_combined["company_name"] = df_combined["company_name"].str.strip().str.lower()
-df_combined["publishedAt"] = pd.to_datetime(df_combined["publishedAt"], errors='coerce')
-
-missing_dates = df_combined["publishedAt"].isna().sum()
-if missing_dates > 0:
-    logger.warning(f"⚠️ {missing_dates} rows with invalid date removed.")
-    df_combined = df_combined.dropna(subset=["publishedAt"])
-
-# Sort & save
-df_combined.sort_values(by=["company_name", "publishedAt"], inplace=True)
-df_combined.reset_index(drop=True, inplace=True)
-os.makedirs(DAX_ARTICLES_FILE.parent, exist_ok=True)
-df_combined.to_csv(DAX_ARTICLES_FILE, index=False)
-
-logger.info(f"✅ Final CSV updated: {len(df_combined)} articles saved to {DAX_ARTICLES_FILE}")
+# Companies and their search queries come from universes.json (see scripts/universe.py).
+# Articles are stored under the member name, so a query like "Mercedes-Benz Group"
+# lands on the same company as its prices.
+ARTICLE_KEYS = ["company_name", "publishedAt", "title"]
+LOOKBACK_DAYS = 30
+SOURCES = 'handelsblatt,the-economist,business-insider,reuters,forbes,bloomberg,yahoo-finance'
+DOMAINS = 'handelsblatt.de,businessinsider.de,reuters.com,forbes.com,bloomberg.com,finance.yahoo.com'
+
+
+def parse_newsapi(response, company_name):
+    """Article rows of one NewsAPI response, and the number skipped for having no date.
+
+    Shared by the live fetch and raw_responses.py replay.
+    """
+    rows, without_date = [], 0
+    for article in response.get('articles', []):
+        published_at = article.get('publishedAt')
+        if not published_at:
+            without_date += 1
+            continue
+
+        rows.append({
+            'company_name': company_name,
+            'title': article.get('title'),
+            'description': article.get('description'),
+            'url': article.get('url'),
+            'publishedAt': published_at,
+            'source': article.get('source', {}).get('name')
+        })
+    return rows, without_date
+
+
+def fetch_articles(members):
+    """NewsAPI articles for every member over the lookback window; runs inside a shard worker."""
+    from newsapi import NewsApiClient
+    from tqdm import tqdm
+
+    newsapi = NewsApiClient(api_key=NEWS_API_KEY)
+    article_list = []
+
+    today = datetime.now()
+    today_str = today.strftime('%Y-%m-%d')
+    from_str = (today - timedelta(days=LOOKBACK_DAYS)).strftime('%Y-%m-%d')
+
+    total_fetched = total_with_date = total_without_date = 0
+
+    for member in tqdm(members, desc="🔍 Fetching news"):
+        company_name, query = member["name"], member["query"]
+        try:
+            request = dict(
+                q=query,
+                sources=SOURCES,
+                domains=DOMAINS,
+                from_param=from_str,
+                to=today_str,
+                sort_by='relevancy',
+                language='en'  # or 'de' if you prefer
+            )
+            all_articles = newsapi.get_everything(**request)
+            # keep the raw response, so parsing can be re-run after the 30-day window closes
+            raw_responses.record("newsapi", all_articles, {"company": company_name, **request})
+
+            articles = all_articles.get('articles', [])
+            total_fetched += len(articles)
+
+            rows, without_date = parse_newsapi(all_articles, company_name)
+            article_list += rows
+            with_date = len(rows)
+            total_without_date += without_date
+            total_with_date += with_date
+            logger.info(f"{company_name}: {len(articles)} total | 🟢 {with_date} with date | 🔴 {len(articles)-with_date} without date")
+
+        except Exception as e:
+            logger.error(f"❌ Error fetching articles for {company_name}: {e}")
+
+        time.sleep(random.uniform(2.5, 3.5))  # API rate limiter
+
+    logger.info("\n📊 Fetch Summary:")
+    logger.info(f"   Total articles fetched: {total_fetched}")
+    logger.info(f"   With 'publishedAt':     {total_with_date}")
+    logger.info(f"   Without 'publishedAt':  {total_without_date}")
+    return clean_articles(pd.DataFrame(article_list))
+
+
+def clean_articles(df):
+    """Normalize names and timestamps and drop rows without a valid date."""
+    if df.empty:
+        return df
+    df = df.copy()
+    # rows stored under their old search query move to the member name (universe.aliases)
+    df["company_name"] = df["company_name"].str.strip().str.lower().replace(universe.aliases())
+    df["publishedAt"] = pd.to_datetime(df["publishedAt"], errors='coerce', utc=True, format="ISO8601")
+
+    missing_dates = df["publishedAt"].isna().sum()
+    if missing_dates > 0:
+        logger.warning(f"⚠️ {missing_dates} rows with invalid date removed.")
+        df = df.dropna(subset=["publishedAt"])
+    return df
+
+
+def merge_into(path, frames):
+    """Merge new articles into the article file, sorted by company and time."""
+    existing = clean_articles(pd.read_csv(path)) if path.exists() else None
+    df_combined = universe.merge_frames([existing, *frames], ARTICLE_KEYS)
+    write_csv(df_combined, path, index=False)
+    return len(df_combined)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fetch the last 30 days of news for a universe")
+    universe.add_arguments(parser)
+    parser.add_argument("--merge", action="store_true", help="merge shard files written by --shard runs")
+    args = parser.parse_args()
+
+    # ---------------- Merge Shards ----------------
+    if args.merge:
+        files = universe.shard_files(DAX_ARTICLES_FILE)
+        total = merge_into(DAX_ARTICLES_FILE, [clean_articles(pd.read_csv(f)) for f in files])
+        for f in files:
+            f.unlink()
+        logger.info(f"✅ Merged {len(files)} shard files: {total} articles saved to {DAX_ARTICLES_FILE}")
+        return
+
+    # ---------------- Fetch Articles ----------------
+    members = universe.selected(args)
+    if args.shard is None and args.companies is None:
+        members = universe.indices(args.universe) + members  # index-level news
+    # one process: the NewsAPI rate limit is per key, not per worker
+    if args.workers > 1:
+        logger.info("ℹ️ NewsAPI requests are rate limited per API key, fetching in one process (--workers ignored)")
+    frames = universe.run_sharded(fetch_articles, members, 1)
+
+    # ---------------- Save ----------------
+    if args.shard is not None:
+        out = universe.shard_path(DAX_ARTICLES_FILE, args.shard)
+        write_csv(universe.merge_frames(frames, ARTICLE_KEYS), out, index=False)
+        logger.info(f"✅ Shard {args.shard[0]}/{args.shard[1]}: {len(members)} companies -> {out.name}")
+        return
+
+    total = merge_into(DAX_ARTICLES_FILE, frames)
+    logger.info(f"✅ Final CSV updated: {total} articles saved to {DAX_ARTICLES_FILE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import argparse
+import logging
+import numpy as np
+import pandas as pd
+from config import DAILY_SENTIMENT_FILE, FREE_FLOAT_FILE, INDEX_SENTIMENT_FILE, INDEX_CONTRIBUTIONS_FILE
+from scripts.panel import company_key, price_matrix, index_close
+from scripts.storage import write_csv, write_parquet, read_path
+
+# ---------------- LOGGING ----------------
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+# Composite index sentiment: on each date, the weighted mean of the
+# constituents that have news that day,
+#
+#     composite[t] = sum_c W[t, c] * S[t, c] / sum_c W[t, c] * has_news[t, c]
+#
+# over date x company matrices, so the whole history (or any new tail of it)
+# is a handful of array operations. contribution[t, c] is the c-th term of
+# the numerator over the same denominator; contributions sum to the composite.
+#
+# The pipeline stores every available scheme, so the dashboard reads the
+# stored series and only computes a scheme itself when it is not stored or
+# older than the daily file (e.g. aggregate_sentiment.py was re-run alone).
+WEIGHT_SCHEMES = ["equal", "free_float", "news_volume"]
+DEFAULT_SCHEME = "news_volume"
+INDEX_COLUMNS = ["scheme", "date", "composite", "constituents", "index_close", "index_return"]
+CONTRIBUTION_COLUMNS = ["scheme", "date", "company", "sentiment", "weight", "contribution"]
+
+
+def load_daily(path=DAILY_SENTIMENT_FILE):
+    """(sentiment, article counts) as date x company matrices.
+
+    Spellings of the same company are merged, weighting by article count;
+    counts are NaN if the daily file predates the article_count column.
+    """
+    daily = pd.read_csv(read_path(path), parse_dates=["date"])
+    daily["company"] = daily["company_name"].map(company_key)
+    if "article_count" not in daily.columns:
+        daily["article_count"] = np.nan
+    weight = daily["article_count"].fillna(1)
+    daily["weighted"] = daily["avg_sentiment"] * weight
+    daily["weight"] = weight
+    grouped = daily.groupby(["date", "company"])[["weighted", "weight", "article_count"]].sum(min_count=1)
+    sentiment = (grouped["weighted"] / grouped["weight"]).unstack("company").sort_index()
+    counts = grouped["article_count"].unstack("company").reindex_like(sentiment)
+    sentiment.columns.name = counts.columns.name = None
+    return sentiment, counts
+
+
+def free_float_weights(dates, companies, path=FREE_FLOAT_FILE):
+    """Free-float market cap per (date, company): shares x previous session close."""
+    path = read_path(path)
+    if not path.exists():
+        raise FileNotFoundError(f"Free-float cap weights need {path.name} (Company,free_float_shares)")
+    shares = pd.read_csv(path)
+    shares = shares.set_index(shares["Company"].map(company_key))["free_float_shares"]
+    # previous close, so a day's weights never use that day's price
+    close = price_matrix().shift(1).reindex(pd.DatetimeIndex(dates), method="ffill")
+    return close.reindex(columns=companies) * shares.reindex(companies).to_numpy()
+
+
+def weight_matrix(scheme, sentiment, counts):
+    """date x company weights for a scheme, aligned with `sentiment`."""
+    if scheme == "equal":
+        return pd.DataFrame(1.0, index=sentiment.index, columns=sentiment.columns)
+    if scheme == "news_volume":
+        if counts.isna().all().all():
+            raise ValueError("News-volume weights need article_count, re-run aggregate_sentiment.py")
+        return counts.fillna(0.0)
+    if scheme == "free_float":
+        return free_float_weights(sentiment.index, sentiment.columns)
+    raise ValueError(f"Unknown weight scheme: {scheme}")
+
+
+def available_schemes(sentiment, counts):
+    schemes = ["equal"]
+    if read_path(FREE_FLOAT_FILE).exists():
+        schemes.append("free_float")
+    if not counts.isna().all().all():
+        schemes.append("news_volume")
+    return schemes
+
+
+def composite(sentiment, weights):
+    """(composite frame, contributions, normalized weights) for aligned date x company matrices."""
+    S = sentiment.to_numpy(dtype="float64")
+    W = np.nan_to_num(weights.reindex_like(sentiment).to_numpy(dtype="float64"))
+    has_news = ~np.isnan(S)
+    W = np.where(has_news, W, 0.0)
+    total = W.sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        contrib = np.where(has_news, W * np.nan_to_num(S), np.nan) / total[:, None]
+        norm_weights = W / total[:, None]
+    index = pd.DataFrame({
+        "date": sentiment.index,
+        "composite": np.where(total > 0, np.nansum(contrib, axis=1), np.nan),
+        "constituents": has_news.sum(axis=1),
+    })
+    contributions = pd.DataFrame(contrib, index=sentiment.index, columns=sentiment.columns)
+    weights = pd.DataFrame(norm_weights, index=sentiment.index, columns=sentiment.columns)
+    return index, contributions, weights
+
+
+def join_index_prices(index):
+    """Add the index close and its session return (NaN where no price exists)."""
+    close = index_close()
+    index = index.copy()
+    index["index_close"] = close.reindex(index["date"]).to_numpy()
+    index["index_return"] = close.pct_change().reindex(index["date"]).to_numpy()
+    return index
+
+
+def compute_index(scheme=DEFAULT_SCHEME, since=None, path=DAILY_SENTIMENT_FILE, daily=None):
+    """(index rows, long contributions) for one scheme, optionally only dates >= since.
+
+    `daily` is a (sentiment, counts) pair already loaded by load_daily.
+    """
+    sentiment, counts = daily if daily is not None else load_daily(path)
+    if since is not None:
+        keep = sentiment.index >= pd.Timestamp(since)
+        sentiment, counts = sentiment[keep], counts[keep]
+    index, contrib, weights = composite(sentiment, weight_matrix(scheme, sentiment, counts))
+    index = join_index_prices(index)
+    index.insert(0, "scheme", scheme)
+
+    long = contrib.stack().rename("contribution").to_frame()
+    long["sentiment"] = sentiment.stack()
+    long["weight"] = weights.stack()
+    long = long.reset_index(names=["date", "company"]).dropna(subset=["sentiment"])
+    long.insert(0, "scheme", scheme)
+    return index[INDEX_COLUMNS], long[CONTRIBUTION_COLUMNS]
+
+
+def update_index(schemes=None, full=False):
+    """Recompute only the dates from the last stored one on and append them.
+
+    Covers the given schemes, or every available one. The last stored date
+    is recomputed because late articles can still land on it. Returns
+    {scheme: number of dates (re)written}.
+    """
+    stored = pd.read_csv(INDEX_SENTIMENT_FILE, parse_dates=["date"]) if INDEX_SENTIMENT_FILE.exists() \
+        else pd.DataFrame(columns=INDEX_COLUMNS)
+    stored_contrib = pd.read_parquet(INDEX_CONTRIBUTIONS_FILE) if INDEX_CONTRIBUTIONS_FILE.exists() \
+        else pd.DataFrame(columns=CONTRIBUTION_COLUMNS)
+    daily = load_daily()
+    written = {}
+    for scheme in schemes or available_schemes(*daily):
+        own = stored["scheme"] == scheme
+        since = None if full or not own.any() else stored.loc[own, "date"].max()
+
+        index, contrib = compute_index(scheme, since, daily=daily)
+        own_contrib = stored_contrib["scheme"] == scheme
+        if since is not None:
+            own, own_contrib = own & (stored["date"] >= since), own_contrib & (stored_contrib["date"] >= since)
+        frames = [f for f in (stored[~own], index) if not f.empty]
+        stored = pd.concat(frames, ignore_index=True) if frames else index
+        frames = [f for f in (stored_contrib[~own_contrib], contrib) if not f.empty]
+        stored_contrib = pd.concat(frames, ignore_index=True) if frames else contrib
+        written[scheme] = len(index)
+
+    write_csv(stored.sort_values(["scheme", "date"]), INDEX_SENTIMENT_FILE, index=False)
+    write_parquet(stored_contrib.sort_values(["scheme", "date", "company"]), INDEX_CONTRIBUTIONS_FILE, index=False)
+    return written
+
+
+def load_stored(scheme, latest_date=None):
+    """(index rows, contributions) of one scheme as update_index stored them.
+
+    None if the scheme is not stored, or its last date is before `latest_date`.
+    """
+    index_path, contrib_path = read_path(INDEX_SENTIMENT_FILE), read_path(INDEX_CONTRIBUTIONS_FILE)
+    if not (index_path.exists() and contrib_path.exists()):
+        return None
+    index = pd.read_csv(index_path, parse_dates=["date"])
+    index = index[index["scheme"] == scheme].reset_index(drop=True)
+    if index.empty or (latest_date is not None and index["date"].max() < pd.Timestamp(latest_date)):
+        return None
+    contrib = pd.read_parquet(contrib_path, filters=[("scheme", "==", scheme)])
+    return index[INDEX_COLUMNS], contrib[CONTRIBUTION_COLUMNS]
+
+
+def top_contributors(contrib, date, n=10):
+    """Largest absolute contributions on one date."""
+    day = contrib[contrib["date"] == pd.Timestamp(date)].dropna(subset=["contribution"])
+    return day.reindex(day["contribution"].abs().sort_values(ascending=False).index).head(n)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Composite index sentiment with constituent contributions")
+    parser.add_argument("--scheme", choices=WEIGHT_SCHEMES, help="only this scheme (default: every available one)")
+    parser.add_argument("--full", action="store_true", help="recompute the whole history")
+    args = parser.parse_args()
+
+    written = update_index([args.scheme] if args.scheme else None, args.full)
+    for scheme, dates in written.items():
+        logger.info(f"✅ {dates} dates of '{scheme}' index sentiment written to {INDEX_SENTIMENT_FILE.name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import argparse
+import pickle
+import numpy as np
+from config import CACHE_DIR
+from scripts.panel import PanelStore, to_wide
+from scripts.storage import write_bytes
+
+# Market-wide aggregates for the overview page, computed once per data
+# version from the single all-company panel.
+MIN_OVERLAP = 5
+TOP_MOVES = 20
+
+
+def _order_by_mean(wide):
+    """Stable company order for heatmaps: most positive average sentiment first."""
+    return wide.mean().sort_values(ascending=False).index
+
+
+def latest_moves(panel, top=TOP_MOVES):
+    """Each company's latest observation ranked by |sentiment z-score|."""
+    latest = panel.loc[panel.groupby("company", observed=True)["date"].idxmax()]
+    latest = latest[["company", "date", "avg_sentiment", "sentiment_change", "sentiment_zscore", "stock_price_return"]]
+    latest = latest.dropna(subset=["sentiment_zscore"])
+    latest["company"] = latest["company"].astype(str)
+    latest["stale_days"] = (panel["date"].max() - latest["date"]).dt.days
+    order = latest["sentiment_zscore"].abs().sort_values(ascending=False).index
+    return latest.loc[order].head(top).reset_index(drop=True)
+
+
+def compute_overview(panel, top=TOP_MOVES):
+    sentiment = to_wide(panel, "avg_sentiment")
+    returns = to_wide(panel, "stock_price_return")
+    order = _order_by_mean(sentiment)
+    return {
+        # company x date
+        "sentiment_heatmap": sentiment[order].T,
+        "return_corr": returns.corr(min_periods=MIN_OVERLAP).loc[order, order],
+        "sentiment_corr": sentiment.corr(min_periods=MIN_OVERLAP).loc[order, order],
+        "market_sentiment": sentiment.mean(axis=1).rename("avg_sentiment"),
+        "latest_moves": latest_moves(panel, top),
+    }
+
+
+def cached_overview(panel, version, top=TOP_MOVES):
+    """compute_overview() persisted per data version under .cache/."""
+    path = CACHE_DIR / f"overview_{version}_{top}.pkl"
+    if path.exists():
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    overview = compute_overview(panel, top)
+    write_bytes(path, pickle.dumps(overview))
+    for old in CACHE_DIR.glob("overview_*.pkl"):
+        if not old.name.startswith(f"overview_{version}_"):
+            old.unlink(missing_ok=True)
+    return overview
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cross-company market overview aggregates")
+    parser.add_argument("--top", type=int, default=TOP_MOVES)
+    args = parser.parse_args()
+
+    store = PanelStore()
+    store.refresh()
+    version, panel = store.get()
+    overview = cached_overview(panel, version, args.top)
+    heat = overview["sentiment_heatmap"]
+    print(f"Sentiment heatmap: {heat.shape[0]} companies x {heat.shape[1]} dates")
+    upper = np.triu(np.ones(overview["return_corr"].shape, dtype=bool), 1)
+    print(f"Mean pairwise return correlation: {np.nanmean(overview['return_corr'].to_numpy()[upper]):.3f}")
+    print(overview["latest_moves"].to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+
+
+if __name__ == "__main__":
+    main()
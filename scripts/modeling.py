@@ -0,0 +1,342 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+import numpy as np
+import pandas as pd
+from config import CACHE_DIR, COMPANY_DATA_DIR, DAX_PRICES_FILE, MODELS_DIR
+from scripts import archive
+from scripts.panel import load_panel, data_fingerprint, price_matrix
+from scripts.storage import atomic_path, write_csv, write_parquet, write_text
+
+# ---------------- LOGGING ----------------
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+# Walk-forward models of next-day and next-week returns from the company
+# features (company_csvs.py). The feature matrix (features + forward-return
+# targets for all companies) is built once per data version and cached in
+# .cache/, so re-running with other models or folds does not reload the CSVs.
+#
+# Company files only have rows on days with both news and a price, so their
+# rows skip sessions. Targets are therefore taken from each company's full
+# close series in the raw price file: the return from the row's session to
+# the close 1 (or 5) sessions later.
+#
+# Folds are expanding windows over the panel's sessions: each tests the next
+# `test_days` sessions after everything before them. Training rows whose
+# target window reaches into the test block are dropped (an embargo of
+# `horizon` sessions), so no fold sees a return it is scored on.
+# Every (model, horizon, fold) fit is an independent joblib task.
+#
+# Results go to results/models/<version>/: per-fold metrics, out-of-sample
+# predictions, and per (model, horizon) a model fitted on all data. A run
+# whose version and settings match the stored summary is skipped.
+FEATURES = ["avg_sentiment", "sentiment_7d", "sentiment_change", "sentiment_zscore", "sentiment_lag1",
+            "sentiment_lag3", "stock_price_return", "return_7d", "volatility_7d"]
+HORIZONS = {"1d": 1, "5d": 5}
+MODELS = ["ridge", "gbr"]
+DEFAULT_TEST_DAYS = 21
+DEFAULT_MIN_TRAIN_DAYS = 60
+DEFAULT_FOLDS = 8
+# folds with fewer labelled training rows are skipped (early sessions cover few companies)
+MIN_TRAIN_ROWS = 100
+KEEP_VERSIONS = 3
+# bump when the feature matrix layout changes, so cached matrices are rebuilt
+MATRIX_VERSION = 2
+
+
+def target_column(horizon):
+    return f"target_{horizon}"
+
+
+def target_end_column(horizon):
+    return f"target_{horizon}_end"
+
+
+def make_model(name, seed=0):
+    """Unfitted scikit-learn estimator for a model name."""
+    from sklearn.pipeline import make_pipeline
+    from sklearn.impute import SimpleImputer
+    from sklearn.preprocessing import StandardScaler
+    from sklearn.linear_model import Ridge
+    from sklearn.ensemble import HistGradientBoostingRegressor
+
+    if name == "ridge":
+        return make_pipeline(SimpleImputer(strategy="median"), StandardScaler(), Ridge(alpha=10.0))
+    if name == "gbr":
+        # handles the NaN warm-up rows of the rolling features natively
+        return HistGradientBoostingRegressor(max_iter=200, learning_rate=0.05, max_leaf_nodes=15,
+                                             min_samples_leaf=40, l2_regularization=1.0, random_state=seed)
+    raise ValueError(f"Unknown model: {name} (choose from {', '.join(MODELS)})")
+
+
+# ---------------- FEATURE MATRIX ----------------
+def data_version():
+    """Company files plus archived rows (the dashboard panel's inputs) and the price file of the targets."""
+    return data_fingerprint(COMPANY_DATA_DIR, extra=[archive.version("company_data"), DAX_PRICES_FILE])
+
+
+def matrix_path(version):
+    return CACHE_DIR / f"features_{version}_v{MATRIX_VERSION}.parquet"
+
+
+def forward_returns(close):
+    """(company, date, target_*, target_*_end) per session of a session x company close matrix.
+
+    The return from each session's close to the close h sessions later in
+    the company's own series, and the session it is realized on.
+    """
+    close.columns = close.columns.astype(str)
+    long = close.stack().rename("close").rename_axis(["date", "company"]).reset_index()
+    long = long.sort_values(["company", "date"], kind="stable").reset_index(drop=True)
+    grouped = long.groupby("company", sort=False)
+    for name, h in HORIZONS.items():
+        long[target_column(name)] = grouped["close"].shift(-h) / long["close"] - 1
+        long[target_end_column(name)] = grouped["date"].shift(-h)
+    return long.drop(columns="close")
+
+
+def build_matrix(panel, close=None):
+    """(company, date, FEATURES..., target_*) rows sorted by (date, company).
+
+    `close` is the session x company close matrix of the targets (default:
+    the raw price file); panel rows without a price session get NaN targets.
+    """
+    matrix = panel[["company", "date"]].copy()
+    for column in FEATURES:
+        matrix[column] = panel[column].to_numpy(dtype="float64") if column in panel.columns else np.nan
+    targets = forward_returns(price_matrix() if close is None else close)
+    targets["company"] = pd.Categorical(targets["company"], categories=matrix["company"].cat.categories)
+    targets["date"] = targets["date"].astype(matrix["date"].dtype)
+    matrix = matrix.merge(targets, on=["company", "date"], how="left", validate="many_to_one")
+    return matrix.sort_values(["date", "company"], kind="stable").reset_index(drop=True)
+
+
+def load_matrix(version=None, force=False):
+    """(version, matrix): the cached matrix of this data version, built on a miss."""
+    version = version or data_version()
+    path = matrix_path(version)
+    if path.exists() and not force:
+        return version, pd.read_parquet(path)
+    start = time.perf_counter()
+    matrix = build_matrix(load_panel(COMPANY_DATA_DIR))
+    write_parquet(matrix, path, index=False)
+    for old in CACHE_DIR.glob("features_*.parquet"):
+        if old != path:
+            old.unlink(missing_ok=True)
+    logger.info(f"🧱 Feature matrix built: {len(matrix)} rows in {time.perf_counter() - start:.2f}s (version {version})")
+    return version, matrix
+
+
+# ---------------- WALK-FORWARD ----------------
+def walk_forward_folds(dates, target_end, horizon, folds=DEFAULT_FOLDS, test_days=DEFAULT_TEST_DAYS,
+                       min_train_days=DEFAULT_MIN_TRAIN_DAYS):
+    """[(fold, train_rows, test_rows)] over the sessions in `dates` (oldest fold first).
+
+    A row only trains a fold if its target is realized before the fold's
+    first test day (`target_end` < test start), so gaps in a company's
+    sessions cannot leak test returns into training.
+    """
+    sessions = np.unique(dates)
+    day = np.searchsorted(sessions, dates)
+    out = []
+    for k in range(folds):
+        test_end = len(sessions) - k * test_days
+        test_start = test_end - test_days
+        if test_start - horizon < min_train_days:
+            break
+        train = np.flatnonzero((day < test_start) & (target_end < sessions[test_start]))
+        test = np.flatnonzero((day >= test_start) & (day < test_end))
+        out.append((train, test))
+    return [(i, train, test) for i, (train, test) in enumerate(reversed(out))]
+
+
+def fold_metrics(y, pred):
+    """Out-of-sample metrics of return forecasts."""
+    from scipy.stats import spearmanr
+
+    err = pred - y
+    ss = float(np.sum(y ** 2))
+    return {
+        "n_test": len(y),
+        "mse": float(np.mean(err ** 2)),
+        "mae": float(np.mean(np.abs(err))),
+        # against the zero forecast, the usual benchmark for returns
+        "r2_oos": 1 - float(np.sum(err ** 2)) / ss if ss > 0 else np.nan,
+        "hit_rate": float(np.mean(np.sign(pred) == np.sign(y))),
+        "ic": float(spearmanr(pred, y)[0]) if len(y) > 2 and np.std(pred) > 0 else np.nan,
+    }
+
+
+def _fit_fold(model, horizon, fold, X, y, train, test, seed):
+    start = time.perf_counter()
+    train = train[~np.isnan(y[train])]
+    test = test[~np.isnan(y[test])]
+    if len(train) < MIN_TRAIN_ROWS or len(test) == 0:
+        return None
+    # a feature still in its warm-up over the whole training span is left out of this fold
+    cols = np.isfinite(X[train]).any(axis=0)
+    estimator = make_model(model, seed).fit(X[train][:, cols], y[train])
+    pred = estimator.predict(X[test][:, cols])
+    metrics = {"model": model, "horizon": horizon, "fold": fold, "n_train": len(train),
+               **fold_metrics(y[test], pred), "fit_s": time.perf_counter() - start}
+    return metrics, test, pred
+
+
+def walk_forward(matrix, models=MODELS, horizons=HORIZONS, workers=None, folds=DEFAULT_FOLDS,
+                 test_days=DEFAULT_TEST_DAYS, min_train_days=DEFAULT_MIN_TRAIN_DAYS, seed=0):
+    """(metrics, predictions) frames; every (model, horizon, fold) fit runs as a joblib task."""
+    from joblib import Parallel, delayed
+
+    X = matrix[FEATURES].to_numpy(dtype="float64")
+    dates = matrix["date"].to_numpy()
+    tasks = []
+    for name in horizons:
+        y = matrix[target_column(name)].to_numpy(dtype="float64")
+        ends = matrix[target_end_column(name)].to_numpy()
+        for fold, train, test in walk_forward_folds(dates, ends, HORIZONS[name], folds, test_days, min_train_days):
+            tasks += [(model, name, fold, X, y, train, test, seed) for model in models]
+    if not tasks:
+        return pd.DataFrame(), pd.DataFrame()
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(tasks)))
+    # X and y are memory-mapped into the workers once, not pickled per task
+    results = Parallel(n_jobs=workers, max_nbytes="1M")(delayed(_fit_fold)(*task) for task in tasks)
+
+    rows, predictions = [], []
+    for result in filter(None, results):
+        metrics, test, pred = result
+        rows.append(metrics)
+        predictions.append(pd.DataFrame({
+            "company": matrix["company"].to_numpy()[test], "date": dates[test],
+            "model": metrics["model"], "horizon": metrics["horizon"], "fold": metrics["fold"],
+            "prediction": pred, "actual": matrix[target_column(metrics["horizon"])].to_numpy()[test],
+        }))
+    return pd.DataFrame(rows), pd.concat(predictions, ignore_index=True)
+
+
+def summarize(metrics):
+    """Per (model, horizon): test rows and the test-size-weighted mean of each metric."""
+    if metrics.empty:
+        return metrics
+    weighted = ["mse", "mae", "r2_oos", "hit_rate", "ic"]
+    def combine(group):
+        w = group["n_test"].to_numpy()
+        out = {"folds": len(group), "n_test": int(w.sum())}
+        for column in weighted:
+            values = group[column].to_numpy(dtype="float64")
+            ok = ~np.isnan(values)
+            out[column] = float(np.average(values[ok], weights=w[ok])) if ok.any() else np.nan
+        return pd.Series(out)
+    summary = metrics.groupby(["model", "horizon"]).apply(combine).reset_index()
+    return summary.astype({"folds": int, "n_test": int})
+
+
+# ---------------- PERSISTENCE ----------------
+def run_key(models, horizons, folds, test_days, min_train_days, seed):
+    settings = [sorted(models), sorted(horizons), folds, test_days, min_train_days, seed, FEATURES, MATRIX_VERSION]
+    return hashlib.sha1(json.dumps(settings).encode()).hexdigest()[:12]
+
+
+def version_dir(version, directory=MODELS_DIR):
+    return Path(directory) / version
+
+
+def load_summary(version, directory=MODELS_DIR):
+    path = version_dir(version, directory) / "summary.json"
+    if not path.exists():
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def fit_final(matrix, models, horizons, out_dir, seed=0):
+    """Fit each (model, horizon) on every labelled row and save it with joblib."""
+    import joblib
+
+    X = matrix[FEATURES].to_numpy(dtype="float64")
+    for name in horizons:
+        y = matrix[target_column(name)].to_numpy(dtype="float64")
+        rows = ~np.isnan(y)
+        cols = np.isfinite(X[rows]).any(axis=0)
+        features = [f for f, keep in zip(FEATURES, cols) if keep]
+        for model in models:
+            estimator = make_model(model, seed).fit(X[rows][:, cols], y[rows])
+            with atomic_path(out_dir / f"{model}_{name}.joblib") as tmp:
+                joblib.dump({"estimator": estimator, "features": features, "horizon": name}, tmp)
+
+
+def prune_versions(keep=KEEP_VERSIONS, directory=MODELS_DIR):
+    dirs = sorted((p for p in Path(directory).glob("*") if p.is_dir()), key=lambda p: p.stat().st_mtime)
+    for old in dirs[:-keep or None]:
+        shutil.rmtree(old, ignore_errors=True)
+
+
+def run(models=MODELS, horizons=HORIZONS, workers=None, folds=DEFAULT_FOLDS, test_days=DEFAULT_TEST_DAYS,
+        min_train_days=DEFAULT_MIN_TRAIN_DAYS, seed=0, force=False, directory=MODELS_DIR):
+    """Walk-forward evaluate and persist; returns the summary (stored one if unchanged)."""
+    version = data_version()
+    key = run_key(models, horizons, folds, test_days, min_train_days, seed)
+    stored = load_summary(version, directory)
+    if stored and stored.get("key") == key and not force:
+        logger.info(f"⏩ Models for version {version} are up to date ({directory / version})")
+        return stored
+
+    version, matrix = load_matrix(version)
+    start = time.perf_counter()
+    metrics, predictions = walk_forward(matrix, models, horizons, workers, folds, test_days, min_train_days, seed)
+    if metrics.empty:
+        logger.warning(f"⚠️ Not enough history for a single fold ({matrix['date'].nunique()} sessions, "
+                       f"need {min_train_days} + horizon + {test_days})")
+        return None
+    elapsed = time.perf_counter() - start
+
+    out_dir = version_dir(version, directory)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    fit_final(matrix, models, horizons, out_dir, seed)
+    write_csv(metrics, out_dir / "fold_metrics.csv", index=False)
+    write_parquet(predictions, out_dir / "predictions.parquet", index=False)
+    summary = {
+        "version": version, "key": key, "created_at": pd.Timestamp.now().isoformat(timespec="seconds"),
+        "settings": {"models": list(models), "horizons": list(horizons), "folds": folds, "test_days": test_days,
+                     "min_train_days": min_train_days, "seed": seed, "features": FEATURES},
+        "walk_forward_s": round(elapsed, 2),
+        "results": summarize(metrics).to_dict(orient="records"),
+    }
+    write_text(out_dir / "summary.json", json.dumps(summary, indent=2, default=float))
+    prune_versions(directory=directory)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Walk-forward return models over the company feature panel")
+    parser.add_argument("--models", default=",".join(MODELS))
+    parser.add_argument("--horizons", default=",".join(HORIZONS))
+    parser.add_argument("--workers", type=int, help="parallel fold fits (default: CPU count)")
+    parser.add_argument("--folds", type=int, default=DEFAULT_FOLDS)
+    parser.add_argument("--test-days", type=int, default=DEFAULT_TEST_DAYS, help="sessions per test block")
+    parser.add_argument("--min-train-days", type=int, default=DEFAULT_MIN_TRAIN_DAYS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--force", action="store_true", help="re-run even if this data version was evaluated")
+    args = parser.parse_args()
+
+    horizons = {h: HORIZONS[h] for h in args.horizons.split(",")}
+    start = time.perf_counter()
+    summary = run(args.models.split(","), horizons, args.workers, args.folds, args.test_days,
+                  args.min_train_days, args.seed, args.force)
+    if summary is None:
+        sys.exit(1)
+    print(pd.DataFrame(summary["results"]).to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+    logger.info(f"✅ Version {summary['version']} in {time.perf_counter() - start:.1f}s -> {MODELS_DIR / summary['version']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import hashlib
+import logging
+import threading
+import numpy as np
+import pandas as pd
+from config import COMPANY_DATA_DIR, DAX_PRICES_FILE, DAX_INDEX_FILE
+from scripts import archive
+from scripts.storage import current_snapshot, resolve, read_path, pinned
+
+# ---------------- LOGGING ----------------
+logger = logging.getLogger(__name__)
+
+
+def company_key(name):
+    """Normalize a company name to the key used for company_data file names."""
+    return str(name).strip().lower().replace(" ", "_")
+
+
+def data_fingerprint(directory=COMPANY_DATA_DIR, pattern="*.csv", extra=()):
+    """Cheap data version from file names, mtimes and sizes (no file reads).
+
+    `extra` files (e.g. an archive manifest) are included if they exist.
+    """
+    digest = hashlib.sha1()
+    paths = sorted(read_path(directory).glob(pattern)) + [p for p in map(Path, extra) if p.exists()]
+    for path in paths:
+        stat = path.stat()
+        digest.update(f"{path.name}:{stat.st_mtime_ns}:{stat.st_size};".encode())
+    return digest.hexdigest()[:12]
+
+
+def load_panel(directory=COMPANY_DATA_DIR, archived=True):
+    """Load every company CSV into one long frame sorted by (company, date).
+
+    Rows compacted into the company_data archive are included unless
+    `archived` is False.
+    """
+    frames = []
+    old = archive.read("company_data") if archived else None
+    if old is not None:
+        frames.append(old)
+    for path in sorted(Path(directory).glob("*.csv")):
+        df = pd.read_csv(path, parse_dates=["date"])
+        df.insert(0, "company", path.stem)
+        frames.append(df)
+    if not frames:
+        return pd.DataFrame(columns=["company", "date"])
+
+    panel = pd.concat(frames, ignore_index=True)
+    panel["company"] = panel["company"].astype("category")
+    panel.sort_values(["company", "date"], inplace=True, kind="stable")
+    panel.reset_index(drop=True, inplace=True)
+    return panel
+
+
+def company_offsets(panel):
+    """Row range [start, stop) of each company in a (company, date)-sorted panel."""
+    if panel.empty:
+        return {}
+    codes = panel["company"].cat.codes.to_numpy()
+    starts = np.concatenate([[0], np.flatnonzero(np.diff(codes)) + 1])
+    stops = np.append(starts[1:], len(codes))
+    return {str(panel["company"].iat[s]): (int(s), int(e)) for s, e in zip(starts, stops)}
+
+
+def padded_arrays(panel, columns):
+    """(C, T_max) arrays per column, each company left-aligned by row and NaN-padded."""
+    offsets = company_offsets(panel)
+    companies = list(offsets)
+    t_max = max((stop - start for start, stop in offsets.values()), default=0)
+    lengths = np.array([offsets[c][1] - offsets[c][0] for c in companies])
+    starts = np.array([offsets[c][0] for c in companies])
+    rows = starts[:, None] + np.arange(t_max)[None, :]
+    valid = np.arange(t_max)[None, :] < lengths[:, None]
+    arrays = {}
+    for col in columns:
+        values = panel[col].to_numpy(dtype="float64")
+        out = np.full(rows.shape, np.nan)
+        out[valid] = values[rows[valid]]
+        arrays[col] = out
+    return companies, arrays
+
+
+def price_matrix(path=DAX_PRICES_FILE):
+    """session x company close matrix from the raw price file (company_data keys as columns)."""
+    prices = pd.read_csv(read_path(path), usecols=["Date", "Close", "Company"], parse_dates=["Date"])
+    prices["company"] = prices["Company"].map(company_key)
+    close = prices.pivot_table(index="Date", columns="company", values="Close", aggfunc="last").sort_index()
+    close.index.name = "date"
+    close.columns.name = None
+    return close
+
+
+def index_close(path=DAX_INDEX_FILE, name="DAX"):
+    """Index close by session, empty if the index prices have not been fetched yet."""
+    path = read_path(path)
+    if not path.exists():
+        return pd.Series(dtype="float64", index=pd.DatetimeIndex([], name="date"), name="index_close")
+    prices = pd.read_csv(path, parse_dates=["Date"])
+    prices = prices[prices["Index"] == name].drop_duplicates("Date", keep="last").sort_values("Date")
+    return pd.Series(prices["Close"].to_numpy(), index=pd.DatetimeIndex(prices["Date"], name="date"), name="index_close")
+
+
+def to_wide(panel, column):
+    """date x company matrix of one panel column."""
+    wide = panel.pivot_table(index="date", columns="company", values=column, observed=True, aggfunc="last")
+    wide.columns = wide.columns.astype(str)
+    return wide
+
+
+class PanelStore:
+    """Process-wide holder of the all-company panel.
+
+    The panel is reloaded only when the data fingerprint changes. A daemon
+    thread polls the fingerprint so sessions never pay the reload cost, and
+    the swap is atomic: readers always see one complete (version, panel).
+
+    The panel and its shared feature columns are kept as a memory-mapped
+    Arrow table, so every session (and every server process on the host)
+    reads the same pages; sessions only materialize their company slice.
+
+    Once the pipeline publishes snapshots the panel is loaded from the
+    current snapshot; `snapshot` is the one it came from, for readers that
+    pin the rest of their inputs to the same data.
+    """
+
+    def __init__(self, directory=COMPANY_DATA_DIR, poll_interval=30):
+        self.directory = Path(directory)
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._state = (None, None, {})
+        self._frame = (None, None)
+        self.snapshot = None
+        self._watcher = None
+        self._stop = threading.Event()
+
+    @property
+    def version(self):
+        return self._state[0]
+
+    def refresh(self):
+        """Reload if the files changed, returns True if a new panel was loaded."""
+        # pyarrow is only needed by processes that hold the panel
+        from scripts.feature_store import compute_panel_features, write_panel_arrow, open_panel_arrow, cleanup_arrow
+
+        snapshot = current_snapshot()
+        directory = resolve(self.directory, snapshot)
+        with pinned(snapshot):
+            version = data_fingerprint(directory, extra=[archive.version("company_data")])
+        if version == self._state[0]:
+            self.snapshot = snapshot
+            return False
+        with self._lock:
+            if version == self._state[0]:
+                return False
+            with pinned(snapshot):
+                panel = compute_panel_features(load_panel(directory))
+            offsets = company_offsets(panel)
+            table = open_panel_arrow(write_panel_arrow(panel, version))
+            self._state = (version, table, offsets)
+            self.snapshot = snapshot
+            cleanup_arrow(version)
+        logger.info(f"🔄 Panel loaded: {len(self._state[2])} companies, {len(panel)} rows (version {version})")
+        return True
+
+    def get(self):
+        """Current (version, panel) pair, the pandas panel is built once per version."""
+        version, table, _ = self._state
+        if table is None:
+            return version, pd.DataFrame(columns=["company", "date"])
+        cached_version, frame = self._frame
+        if cached_version != version:
+            frame = table.to_pandas()
+            self._frame = (version, frame)
+        return version, frame
+
+    def table(self):
+        """Current (version, Arrow table) pair."""
+        version, table, _ = self._state
+        return version, table
+
+    def companies(self):
+        return list(self._state[2])
+
+    def offsets(self):
+        """{company: (start, stop)} row ranges of the current Arrow table."""
+        return dict(self._state[2])
+
+    def company_table(self, company):
+        """Zero-copy Arrow slice of one company's rows, or None before the first load."""
+        _, table, offsets = self._state
+        if table is None:
+            return None
+        start, stop = offsets.get(company, (0, 0))
+        return table.slice(start, stop - start).drop_columns(["company"])
+
+    def company_frame(self, company):
+        """The company's Arrow slice materialized (sessions may add columns)."""
+        table = self.company_table(company)
+        if table is None:
+            return pd.DataFrame(columns=["date"])
+        return table.to_pandas()
+
+    def start_watcher(self):
+        if self._watcher is not None:
+            return
+        self._watcher = threading.Thread(target=self._watch, name="panel-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watcher(self):
+        self._stop.set()
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                # A file caught mid-write: keep serving the previous panel
+                logger.warning(f"⚠️ Panel refresh failed, keeping version {self.version}: {e}")
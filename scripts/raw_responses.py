@@ -0,0 +1,294 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import argparse
+import gzip
+import hashlib
+import io
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from config import RAW_RESPONSES_DIR, DAX_ARTICLES_FILE, DAX_PRICES_FILE, DAX_INDEX_FILE
+from scripts.storage import write_bytes
+
+# ---------------- LOGGING ----------------
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+# Every payload the fetch stages receive (NewsAPI JSON, Google News RSS XML,
+# yfinance price frames) is kept so parsing can be re-run over history
+# without the network, e.g. after a change to the source extraction or to
+# the NewsAPI fields kept.
+#
+# Layout under RAW_RESPONSES_DIR:
+#   objects/<ab>/<sha256>.<ext>.gz   payload bytes, content-addressed
+#   requests/<YYYY-MM-DD>.jsonl      one line per fetch: kind, sha256,
+#                                    fetched_at, request parameters, sizes
+# Identical payloads (an unchanged feed fetched twice) are stored once.
+# Request lines are appended with a single write, so shard processes can
+# record concurrently.
+#
+# `replay` parses the archived payloads with the same parse functions the
+# fetch stages use, with sockets disabled while parsing, and merges the
+# results exactly like the live runs: NewsAPI articles and prices on their
+# keys (later fetches win), RSS articles on their url (first fetch wins),
+# with RSS applied after NewsAPI.
+KINDS = {"newsapi": "json", "rss": "xml", "prices": "csv"}
+REPLAY_DIR = RAW_RESPONSES_DIR / "replay"
+
+
+def _object_path(digest, kind, root=RAW_RESPONSES_DIR):
+    return Path(root) / "objects" / digest[:2] / f"{digest}.{KINDS[kind]}.gz"
+
+
+def _requests_path(day, root=RAW_RESPONSES_DIR):
+    return Path(root) / "requests" / f"{day}.jsonl"
+
+
+def encode(kind, payload):
+    """Bytes to archive: NewsAPI dicts as canonical JSON, price frames as CSV, RSS as received."""
+    if kind == "newsapi" and not isinstance(payload, bytes):
+        return json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    if kind == "prices" and not isinstance(payload, bytes):
+        return payload.to_csv().encode("utf-8")
+    return payload
+
+
+def record(kind, payload, request, root=RAW_RESPONSES_DIR):
+    """Archive one fetched payload with its request parameters; returns the request line.
+
+    Never raises: a full disk must not fail the fetch it is recording.
+    """
+    try:
+        data = encode(kind, payload)
+        digest = hashlib.sha256(data).hexdigest()
+        obj = _object_path(digest, kind, root)
+        if not obj.exists():
+            write_bytes(obj, gzip.compress(data, compresslevel=6))
+        now = datetime.now()
+        entry = {"kind": kind, "sha256": digest, "fetched_at": now.isoformat(timespec="seconds"),
+                 "request": request, "bytes": len(data), "stored_bytes": obj.stat().st_size}
+        path = _requests_path(now.date().isoformat(), root)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+        return entry
+    except Exception as e:
+        logger.warning(f"⚠️ Could not archive {kind} response: {e}")
+        return None
+
+
+def load(entry, root=RAW_RESPONSES_DIR):
+    """Payload bytes of a request line."""
+    with gzip.open(_object_path(entry["sha256"], entry["kind"], root), "rb") as f:
+        return f.read()
+
+
+def entries(kinds=None, since=None, until=None, root=RAW_RESPONSES_DIR):
+    """Request lines (oldest first), optionally of some kinds and a fetch-day range."""
+    out = []
+    for path in sorted((Path(root) / "requests").glob("*.jsonl")):
+        day = path.stem
+        if (since and day < since) or (until and day > until):
+            continue
+        with open(path, encoding="utf-8") as f:
+            out += [e for e in map(json.loads, filter(str.strip, f)) if not kinds or e["kind"] in kinds]
+    out.sort(key=lambda e: (e["fetched_at"], e["sha256"]))
+    return out
+
+
+# ---------------- REPLAY ----------------
+def _offline():
+    """Disable sockets in this process, so replay can never touch the network.
+
+    Returns a function that restores them (pool workers never call it).
+    """
+    import socket
+
+    def blocked(*args, **kwargs):
+        raise RuntimeError("network access is disabled during replay")
+
+    # patch methods, not the class: ssl and friends subclass socket.socket on import
+    saved = [(socket.socket, "connect"), (socket.socket, "connect_ex"),
+             (socket, "create_connection"), (socket, "getaddrinfo")]
+    saved = [(owner, name, getattr(owner, name)) for owner, name in saved]
+    for owner, name, _ in saved:
+        setattr(owner, name, blocked)
+
+    def restore():
+        for owner, name, original in saved:
+            setattr(owner, name, original)
+
+    return restore
+
+
+def parse_entry(entry, root=RAW_RESPONSES_DIR):
+    """(kind, DataFrame) for one archived payload, parsed like the live fetch."""
+    import pandas as pd
+
+    request, data = entry["request"], load(entry, root)
+    if entry["kind"] == "newsapi":
+        from scripts.get_news_data_daily import parse_newsapi
+
+        rows, _ = parse_newsapi(json.loads(data), request["company"])
+        return "articles", pd.DataFrame(rows)
+    if entry["kind"] == "rss":
+        from news_google_rss_scraper_corrected import parse_google_news
+
+        return "rss", pd.DataFrame(parse_google_news(data, request["company"]))
+    from scripts.get_daily_stock_price import parse_download
+
+    raw = pd.read_csv(io.BytesIO(data), header=list(range(request.get("header_rows", 1))), index_col=0,
+                      parse_dates=True)
+    df = parse_download(raw, request["ticker"])
+    if not df.empty:
+        df[request.get("label", "Company")] = request["name"]
+        df["Ticker"] = request["ticker"]
+    return "index" if request.get("label") == "Index" else "prices", df
+
+
+def _parse_chunk(chunk, root):
+    return [parse_entry(entry, root) for entry in chunk]
+
+
+def replay(kinds=None, since=None, until=None, workers=None, root=RAW_RESPONSES_DIR):
+    """{output: merged DataFrame} re-parsed from the archive, no network access.
+
+    NewsAPI and RSS articles come back separately ("articles", "rss"), as
+    each is merged on its own keys; merge_articles combines them.
+    """
+    from scripts import universe
+    from news_google_rss_scraper_corrected import merge_google_news
+    from scripts.get_news_data_daily import clean_articles, ARTICLE_KEYS
+    from scripts.get_daily_stock_price import PRICE_KEYS, INDEX_KEYS
+
+    todo = entries(kinds, since, until, root)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(todo) or 1))
+    # contiguous chunks keep fetch order, so the merge below sees later fetches last
+    size = max(1, -(-len(todo) // (workers * 4)))
+    chunks = [todo[i:i + size] for i in range(0, len(todo), size)]
+    if workers == 1:
+        restore = _offline()
+        try:
+            parsed = [_parse_chunk(chunk, root) for chunk in chunks]
+        finally:
+            restore()
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_offline) as pool:
+            parsed = list(pool.map(_parse_chunk, chunks, [root] * len(chunks)))
+
+    frames = {"articles": [], "rss": [], "prices": [], "index": []}
+    for kind, df in (item for chunk in parsed for item in chunk):
+        frames[kind].append(df)
+    out = {}
+    if frames["articles"]:
+        out["articles"] = universe.merge_frames([clean_articles(df) for df in frames["articles"]], ARTICLE_KEYS)
+    if frames["rss"]:
+        out["rss"] = merge_google_news(frames["rss"])
+    if frames["prices"]:
+        out["prices"] = universe.merge_frames(frames["prices"], PRICE_KEYS)
+    if frames["index"]:
+        out["index"] = universe.merge_frames(frames["index"], INDEX_KEYS)
+    logger.info(f"🔁 Replayed {len(todo)} archived responses with {workers} workers: "
+                + ", ".join(f"{k} {len(v)} rows" for k, v in out.items()))
+    return out
+
+
+LIVE_FILES = {"articles": DAX_ARTICLES_FILE, "prices": DAX_PRICES_FILE, "index": DAX_INDEX_FILE}
+
+
+def merge_articles(existing, out):
+    """Replayed articles merged into `existing` as the live runs would:
+    NewsAPI rows win on ARTICLE_KEYS, then RSS rows are added where their url is new."""
+    from scripts import universe
+    from scripts.get_news_data_daily import ARTICLE_KEYS
+    from news_google_rss_scraper_corrected import merge_google_news
+
+    df = existing
+    if "articles" in out:
+        df = universe.merge_frames([df, out["articles"]], ARTICLE_KEYS)
+    if "rss" in out:
+        df = merge_google_news([df, out["rss"]])
+    return df
+
+
+def write_replay(out, apply=False, directory=REPLAY_DIR):
+    """Write replayed frames next to each other, or merge them into the live raw files."""
+    from scripts import universe
+    from scripts.storage import write_csv
+    from scripts.get_news_data_daily import clean_articles
+    from scripts.get_daily_stock_price import PRICE_KEYS, INDEX_KEYS
+    import pandas as pd
+
+    keys = {"prices": PRICE_KEYS, "index": INDEX_KEYS}
+    outputs = {name: df for name, df in out.items() if name in keys}
+    if "articles" in out or "rss" in out:
+        outputs["articles"] = None
+    written = {}
+    for name, df in outputs.items():
+        if apply:
+            path = LIVE_FILES[name]
+            existing = None
+            if path.exists():
+                existing = pd.read_csv(path)
+                existing = clean_articles(existing) if name == "articles" else existing.assign(
+                    Date=pd.to_datetime(existing["Date"]))
+            # replayed rows win over stored ones with the same keys (RSS: as merge_articles says)
+            df = merge_articles(existing, out) if name == "articles" else \
+                universe.merge_frames([existing, df], keys[name])
+        else:
+            df = merge_articles(None, out) if name == "articles" else df
+            path = Path(directory) / LIVE_FILES[name].name
+        write_csv(df, path, index=False)
+        written[name] = path
+    return written
+
+
+def stats(root=RAW_RESPONSES_DIR):
+    lines = entries(root=root)
+    objects = list((Path(root) / "objects").glob("*/*.gz"))
+    by_kind = {}
+    for e in lines:
+        by_kind[e["kind"]] = by_kind.get(e["kind"], 0) + 1
+    return {"requests": len(lines), "by_kind": by_kind, "objects": len(objects),
+            "raw_bytes": sum(e["bytes"] for e in {e["sha256"]: e for e in lines}.values()),
+            "stored_bytes": sum(p.stat().st_size for p in objects)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive of raw fetch responses, offline replay of the parsers")
+    parser.add_argument("command", choices=["replay", "stats"])
+    parser.add_argument("--kinds", type=lambda s: s.split(","), help=f"subset of {','.join(KINDS)}")
+    parser.add_argument("--since", help="first fetch day (YYYY-MM-DD)")
+    parser.add_argument("--until", help="last fetch day (YYYY-MM-DD)")
+    parser.add_argument("--workers", type=int, help="parser processes (default: CPU count)")
+    parser.add_argument("--apply", action="store_true",
+                        help="merge into the live raw_data files (under the pipeline lock) instead of replay/")
+    args = parser.parse_args()
+
+    if args.command == "stats":
+        print(json.dumps(stats(), indent=2))
+        return
+
+    start = time.perf_counter()
+    if args.apply:
+        from scripts.storage import pipeline_lock, PipelineLocked
+
+        try:
+            with pipeline_lock():
+                written = write_replay(replay(args.kinds, args.since, args.until, args.workers), apply=True)
+        except PipelineLocked as e:
+            logger.error(f"⛔ {e}")
+            sys.exit(75)
+    else:
+        written = write_replay(replay(args.kinds, args.since, args.until, args.workers))
+    logger.info(f"✅ Replay done in {time.perf_counter() - start:.1f}s -> "
+                + ", ".join(str(p) for p in written.values()))
+
+
+if __name__ == "__main__":
+    main()
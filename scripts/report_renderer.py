@@ -0,0 +1,237 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import argparse
+import hashlib
+import io
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from config import REPORTS_DIR
+from scripts import analytics
+from scripts.analytics import DEFAULT_ALERT_THRESHOLD
+from scripts.storage import write_bytes, write_text
+
+# ---------------- LOGGING ----------------
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+# Per-company reports (price vs. sentiment, alert days, backtest) built
+# from the same analytics functions as the dashboard and drawn with
+# matplotlib's Agg backend, which needs no browser or image server.
+#
+# Each pool worker sets up one Renderer (matplotlib import, one reusable
+# A4 figure) and memory-maps the shared panel Arrow file once; every report
+# after that is only the drawing. A report is skipped when the hash of its
+# input rows and render parameters matches the manifest entry of the last
+# render.
+REPORT_FORMATS = ["pdf", "png"]
+MANIFEST_FILE = REPORTS_DIR / "manifest.json"
+# bump when the report layout changes, so every report is rendered again
+RENDERER_VERSION = 1
+PAGE_SIZE = (8.27, 11.69)  # A4, inches
+PNG_DPI = 110
+MAX_ALERT_ROWS = 30
+
+
+class Renderer:
+    """One matplotlib figure reused for every report drawn in this process.
+
+    render() holds a lock while it draws, so threads sharing one Renderer
+    (dashboard sessions) never draw over each other's figure.
+    """
+
+    def __init__(self):
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.backends.backend_pdf import PdfPages
+
+        self.PdfPages = PdfPages
+        self.lock = threading.Lock()
+        self.figure = Figure(figsize=PAGE_SIZE)
+        FigureCanvasAgg(self.figure)
+
+    def _summary_page(self, company, view, alerts, bt, threshold):
+        fig = self.figure
+        fig.clf()
+        ax_price, ax_z, ax_bt = fig.subplots(3, 1, sharex=True)
+        fig.suptitle(f"{company.replace('_', ' ').title()} — sentiment report", fontsize=14)
+
+        ax_price.plot(view["date"], view["Close"], color="tab:blue", lw=1.2, label="Close")
+        ax_price.set_ylabel("Stock Price")
+        ax_sent = ax_price.twinx()
+        ax_sent.plot(view["date"], view["avg_sentiment"], color="tab:orange", lw=0.9, alpha=0.8, label="Avg Sentiment")
+        ax_sent.set_ylim(-1, 1)
+        ax_sent.set_ylabel("Avg Sentiment")
+        ax_price.set_title("Stock Price vs. Sentiment", fontsize=10)
+
+        ax_z.plot(view["date"], view["sentiment_change"], color="tab:purple", lw=1, label="Sentiment Δ")
+        ax_z.scatter(alerts["date"], alerts["sentiment_change"], color="tab:red", marker="v", zorder=3, label="Alerts")
+        ax_z.axhline(threshold, color="tab:red", lw=0.8, ls="--", label=f"Threshold ({threshold})")
+        ax_z.set_ylabel("Sentiment Δ")
+        ax_z.set_title("Daily Sentiment Change and Alert Days", fontsize=10)
+        ax_z.legend(loc="lower left", fontsize=8)
+
+        ax_bt.plot(bt["date"], bt["cumulative_stock"], lw=1.1, label="cumulative_stock")
+        ax_bt.plot(bt["date"], bt["cumulative_strategy"], lw=1.1, label="cumulative_strategy")
+        ax_bt.set_ylabel("Cumulative Return")
+        ax_bt.set_title("Cumulative Strategy vs. Stock", fontsize=10)
+        ax_bt.legend(loc="upper left", fontsize=8)
+        for ax in (ax_price, ax_z, ax_bt):
+            ax.grid(alpha=0.3)
+        fig.autofmt_xdate()
+
+    def _alerts_page(self, company, alerts, bt, threshold):
+        fig = self.figure
+        fig.clf()
+        fig.suptitle(f"{company.replace('_', ' ').title()} — alerts (Δ ≤ {threshold})", fontsize=14)
+        final = bt[["cumulative_stock", "cumulative_strategy"]].ffill().iloc[-1] if len(bt) else None
+        lines = [f"Alert days: {len(alerts)}"]
+        if final is not None:
+            lines += [f"Buy & hold: {final['cumulative_stock'] - 1:+.1%}",
+                      f"Strategy (long the day after an alert): {final['cumulative_strategy'] - 1:+.1%}"]
+        fig.text(0.08, 0.9, "\n".join(lines), va="top", fontsize=10)
+        ax = fig.add_axes([0.08, 0.05, 0.84, 0.75])
+        ax.axis("off")
+        rows = alerts.tail(MAX_ALERT_ROWS)
+        if len(rows):
+            cells = [[f"{r.date:%Y-%m-%d}", f"{r.avg_sentiment:.3f}", f"{r.sentiment_change:.3f}",
+                      f"{r.Close:.2f}", f"{r.stock_price_return:+.2%}"] for r in rows.itertuples()]
+            table = ax.table(cellText=cells, colLabels=["date", "sentiment", "Δ sentiment", "close", "return"],
+                             loc="upper center", cellLoc="right")
+            table.auto_set_font_size(False)
+            table.set_fontsize(8)
+        if len(alerts) > MAX_ALERT_ROWS:
+            ax.set_title(f"latest {MAX_ALERT_ROWS} of {len(alerts)} alerts", fontsize=8)
+
+    def render(self, company, frame, date_range="All", threshold=DEFAULT_ALERT_THRESHOLD, formats=REPORT_FORMATS):
+        """{format: bytes} for one company frame (panel rows with features)."""
+        view = analytics.filter_date_range(frame, date_range)
+        alerts = analytics.alert_rows(view, threshold)
+        bt = analytics.backtest(view, threshold)
+        out = {}
+        with self.lock:
+            # the summary page is drawn once: it is the PNG and the PDF's first page
+            self._summary_page(company, view, alerts, bt, threshold)
+            if "png" in formats:
+                buf = io.BytesIO()
+                self.figure.savefig(buf, format="png", dpi=PNG_DPI)
+                out["png"] = buf.getvalue()
+            if "pdf" in formats:
+                buf = io.BytesIO()
+                with self.PdfPages(buf) as pdf:
+                    pdf.savefig(self.figure)
+                    self._alerts_page(company, alerts, bt, threshold)
+                    pdf.savefig(self.figure)
+                out["pdf"] = buf.getvalue()
+        return out
+
+
+def input_key(frame, date_range, threshold, formats):
+    """Hash of a company's rows plus everything else that changes its report."""
+    digest = hashlib.sha1(pd.util.hash_pandas_object(frame, index=False).to_numpy().tobytes())
+    digest.update(repr((RENDERER_VERSION, date_range, float(threshold), sorted(formats))).encode())
+    return digest.hexdigest()[:16]
+
+
+def report_path(company, fmt, directory=REPORTS_DIR):
+    return Path(directory) / f"{company}.{fmt}"
+
+
+def load_manifest(path=MANIFEST_FILE):
+    if not Path(path).exists():
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+# ---------------- WORKERS ----------------
+_worker = {}
+
+
+def _init_worker(arrow_file, offsets):
+    from scripts.feature_store import open_panel_arrow
+
+    _worker["renderer"] = Renderer()
+    _worker["table"] = open_panel_arrow(arrow_file)
+    _worker["offsets"] = offsets
+
+
+def _company_frame(company):
+    start, stop = _worker["offsets"][company]
+    return _worker["table"].slice(start, stop - start).drop_columns(["company"]).to_pandas()
+
+
+def _render_one(company, previous_key, date_range, threshold, formats, directory, force):
+    start = time.perf_counter()
+    frame = _company_frame(company)
+    key = input_key(frame, date_range, threshold, formats)
+    if not force and key == previous_key and all(report_path(company, f, directory).exists() for f in formats):
+        return company, key, "skipped", 0.0
+    for fmt, data in _worker["renderer"].render(company, frame, date_range, threshold, formats).items():
+        write_bytes(report_path(company, fmt, directory), data)
+    return company, key, "rendered", (time.perf_counter() - start) * 1000
+
+
+def render_all(companies=None, workers=None, date_range="All", threshold=DEFAULT_ALERT_THRESHOLD,
+               formats=REPORT_FORMATS, directory=REPORTS_DIR, force=False):
+    """Render every (or the given) company's report in a process pool; returns a summary frame."""
+    from scripts.panel import PanelStore
+    from scripts.feature_store import arrow_path
+
+    store = PanelStore()
+    store.refresh()
+    offsets = store.offsets()
+    companies = [c for c in (companies or list(offsets)) if c in offsets]
+    manifest_file = Path(directory) / MANIFEST_FILE.name
+    manifest = load_manifest(manifest_file)
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(companies) or 1))
+    args = [(c, manifest.get(c, {}).get("key"), date_range, threshold, formats, directory, force) for c in companies]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(str(arrow_path(store.version)), offsets)) as pool:
+        results = list(pool.map(_render_one, *zip(*args))) if args else []
+
+    for company, key, status, ms in results:
+        if status == "rendered":
+            manifest[company] = {"key": key, "formats": sorted(formats), "panel_version": store.version,
+                                 "rendered_at": pd.Timestamp.now().isoformat(timespec="seconds")}
+    write_text(manifest_file, json.dumps(manifest, indent=2, sort_keys=True))
+    return pd.DataFrame(results, columns=["company", "key", "status", "ms"])
+
+
+def report_bytes(company, frame, fmt, date_range="All", threshold=DEFAULT_ALERT_THRESHOLD, renderer=None):
+    """One report for the dashboard: the batch output if it is current, else rendered here."""
+    key = input_key(frame, date_range, threshold, REPORT_FORMATS)
+    path = report_path(company, fmt)
+    if load_manifest().get(company, {}).get("key") == key and path.exists():
+        return path.read_bytes()
+    return (renderer or Renderer()).render(company, frame, date_range, threshold, [fmt])[fmt]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch PDF/PNG reports for all companies")
+    parser.add_argument("--companies", type=lambda s: [c.strip() for c in s.split(",")], help="company keys (default: all)")
+    parser.add_argument("--workers", type=int, help="worker processes (default: CPU count)")
+    parser.add_argument("--formats", default=",".join(REPORT_FORMATS))
+    parser.add_argument("--date-range", default="All", choices=analytics.DATE_RANGES)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_ALERT_THRESHOLD)
+    parser.add_argument("--force", action="store_true", help="render even if the inputs did not change")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    result = render_all(args.companies, args.workers, args.date_range, args.threshold,
+                        args.formats.split(","), force=args.force)
+    rendered = result[result["status"] == "rendered"]
+    logger.info(f"✅ {len(rendered)} reports rendered, {len(result) - len(rendered)} unchanged, "
+                f"in {time.perf_counter() - start:.1f}s (median {rendered['ms'].median() if len(rendered) else 0:.0f} ms "
+                f"per report) -> {REPORTS_DIR}")
+
+
+if __name__ == "__main__":
+    main()
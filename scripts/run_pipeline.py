@@ -0,0 +1,73 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import argparse
+import logging
+import subprocess
+import time
+from scripts.storage import pipeline_lock, publish_snapshot, PipelineLocked
+
+# ---------------- LOGGING ----------------
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+# One pipeline run: every stage in order under the pipeline lock, then a new
+# snapshot for the dashboard. A failing stage stops the run before
+# publishing, so readers keep the previous snapshot. Post-publish stages
+# derive caches from the new snapshot (e.g. the dashboard's precomputed
+# charts); when one fails the dashboard just builds those itself.
+SCRIPTS_DIR = Path(__file__).resolve().parent
+STAGES = [
+    ("news", "get_news_data_daily.py", True),
+    ("prices", "get_daily_stock_price.py", True),
+    ("sentiment", "sentiment_pipeline.py", False),
+    ("aggregate", "aggregate_sentiment.py", False),
+    ("validate", "data_quality.py", False),
+    ("companies", "company_csvs.py", True),
+    ("alerts", "alert_engine.py", False),
+    ("index", "index_sentiment.py", False),
+]
+FETCH_STAGES = {"news", "prices"}
+POST_PUBLISH_STAGES = [
+    ("charts", "chart_specs.py"),
+]
+
+
+def run_stage(name, script, args):
+    start = time.perf_counter()
+    logger.info(f"▶️ {name}: {script} {' '.join(args)}")
+    subprocess.run([sys.executable, str(SCRIPTS_DIR / script), *args], check=True)
+    logger.info(f"✅ {name} done in {time.perf_counter() - start:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the pipeline stages under the lock and publish a snapshot")
+    parser.add_argument("--wait", action="store_true", help="wait for a running pipeline instead of failing fast")
+    parser.add_argument("--timeout", type=float, help="give up waiting after this many seconds")
+    parser.add_argument("--skip-fetch", action="store_true", help="skip the news/price download stages")
+    parser.add_argument("--universe", help="passed to the universe-aware stages")
+    args = parser.parse_args()
+
+    try:
+        with pipeline_lock(wait=args.wait, timeout=args.timeout):
+            for name, script, universe_aware in STAGES:
+                if args.skip_fetch and name in FETCH_STAGES:
+                    continue
+                run_stage(name, script, ["--universe", args.universe] if universe_aware and args.universe else [])
+            publish_snapshot()
+            for name, script in POST_PUBLISH_STAGES:
+                try:
+                    run_stage(name, script, [])
+                except subprocess.CalledProcessError:
+                    logger.warning(f"⚠️ {name} failed after the snapshot was published, the dashboard builds it on demand")
+    except PipelineLocked as e:
+        logger.error(f"⛔ {e}")
+        sys.exit(75)  # EX_TEMPFAIL: cron can simply retry later
+    except subprocess.CalledProcessError as e:
+        logger.error(f"❌ Stage failed ({e.cmd[1]}), snapshot not published")
+        sys.exit(e.returncode)
+
+
+if __name__ == "__main__":
+    main()
@@ -65,59 +65,95 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 import pandas as pd
-import os
-import nltk
-from nltk.sentiment.vader import SentimentIntensityAnalyzer
-from config import DAX_ARTICLES_FILE, FULL_SENTIMENT_FILE
-
-# Ensure VADER lexicon is available
-nltk.download('vader_lexicon', quiet=True)
-
-# ---------- Step 1: Load article data ----------
-df_new = pd.read_csv(str(DAX_ARTICLES_FILE))
-df_new['publishedAt'] = pd.to_datetime(df_new['publishedAt'], errors='coerce')
-df_new.dropna(subset=['publishedAt'], inplace=True)
-df_new['date'] = df_new['publishedAt'].dt.normalize()
-df_new['text'] = df_new['title'].fillna('') + '. ' + df_new['description'].fillna('')
+from config import DAX_ARTICLES_FILE, SCORES_FILE
+from scripts import universe
+from scripts.sentiment_store import load_scores, append_articles
+from scripts.article_index import index_exists, index_articles, build_index
+from scripts.article_bodies import body_scores
+
+# Share of the score taken from the article body when its paragraphs are cached
+BODY_WEIGHT = 0.5
+
+
+def get_label(compound):
+    if compound > 0.1:
+        return "positive"
+    elif compound < -0.1:
+        return "negative"
+    return "neutral"
+
+
+def load_new_articles():
+    # ---------- Step 1: Load article data ----------
+    df_new = pd.read_csv(str(DAX_ARTICLES_FILE))
+    # rows still under an old search query name score under the member name
+    df_new['company_name'] = df_new['company_name'].replace(universe.aliases())
+    df_new['publishedAt'] = pd.to_datetime(df_new['publishedAt'], errors='coerce')
+    df_new.dropna(subset=['publishedAt'], inplace=True)
+    df_new['date'] = df_new['publishedAt'].dt.normalize()
+    df_new['text'] = df_new['title'].fillna('') + '. ' + df_new['description'].fillna('')
+
+    # ---------- Step 2: Load previous sentiment data ----------
+    # Only the publish timestamps are needed to detect already scored articles,
+    # and archived years older than the fetched articles are not read at all
+    df_old = load_scores(columns=['publishedAt'], since=df_new['date'].min())
+    if not df_old.empty:
+        known_dates = set(pd.to_datetime(df_old['publishedAt'], utc=True))
+        df_new = df_new[~pd.to_datetime(df_new['publishedAt'], utc=True).isin(known_dates)]
+    return df_new
+
+
+def score_articles(df_new):
+    # ---------- Step 3: Run sentiment analysis ----------
+    # nltk is imported here, only when there is something to score
+    from scripts.vader_lexicon import sentiment_analyzer
 
-# ---------- Step 2: Load previous sentiment data ----------
-if FULL_SENTIMENT_FILE.exists():
-    df_old = pd.read_csv(str(FULL_SENTIMENT_FILE), parse_dates=['publishedAt'])
-    df_old['publishedAt'] = pd.to_datetime(df_old['publishedAt'], errors='coerce')
-    df_old['date'] = df_old['publishedAt'].dt.normalize()
-    known_dates = set(df_old['publishedAt'])
-    df_new = df_new[~df_new['publishedAt'].isin(known_dates)]
-else:
-    df_old = pd.DataFrame()
-
-# ---------- Step 3: Run sentiment analysis ----------
-if not df_new.empty:
     print("⚙️ Running VADER sentiment analysis...")
-    sia = SentimentIntensityAnalyzer()
+    sia = sentiment_analyzer()
 
     def get_sentiment(text):
-        scores = sia.polarity_scores(text)
-        compound = scores["compound"]
-        if compound > 0.1:
-            label = "positive"
-        elif compound < -0.1:
-            label = "negative"
-        else:
-            label = "neutral"
-        return pd.Series([compound, label])
+        compound = sia.polarity_scores(text)["compound"]
+        return pd.Series([compound, get_label(compound)])
+
+    df_new[['sentiment_score', 'sentiment_label']] = df_new['text'].apply(lambda x: get_sentiment(str(x)))
+
+    # Blend in paragraph scores of article bodies fetched by article_bodies.py (cache only, no network)
+    bodies = df_new['url'].map(body_scores(df_new['url'], sia))
+    if bodies.notna().any():
+        blended = (1 - BODY_WEIGHT) * df_new['sentiment_score'] + BODY_WEIGHT * bodies
+        df_new['sentiment_score'] = blended.where(bodies.notna(), df_new['sentiment_score']).round(4)
+        df_new['sentiment_label'] = df_new['sentiment_score'].map(get_label)
+        print(f"📄 {int(bodies.notna().sum())} articles scored with their full body")
+    df_new['analyzed_at'] = pd.Timestamp.now()
+    return df_new
+
+
+def main():
+    df_new = load_new_articles()
+    if df_new.empty:
+        print("🔁 No new articles to analyze.")
+        # the store may predate the index (e.g. migrated from full_sentiment.csv)
+        if not index_exists():
+            print(f"🔎 Indexed {build_index()} stored articles for full-text search")
+        return
 
     try:
-        df_new[['sentiment_score', 'sentiment_label']] = df_new['text'].apply(lambda x: get_sentiment(str(x)))
-        df_new['analyzed_at'] = pd.Timestamp.now()
+        df_new = score_articles(df_new)
     except Exception as e:
         print("❌ Sentiment analysis failed:", e)
         sys.exit(1)
 
-    # ---------- Step 4: Combine and save ----------
-    df_combined = pd.concat([df_old, df_new], ignore_index=True)
-    FULL_SENTIMENT_FILE.parent.mkdir(parents=True, exist_ok=True)
-    df_combined.to_csv(str(FULL_SENTIMENT_FILE), index=False)
+    # ---------- Step 4: Append to compact store ----------
+    added = append_articles(df_new.drop(columns=['text']))
 
-    print(f"✅ {len(df_new)} new articles analyzed and saved to '{FULL_SENTIMENT_FILE.name}'")
-else:
-    print("🔁 No new articles to analyze.")
+    # Keep the full-text index in step with the store (only new articles are indexed)
+    if index_exists():
+        index_articles(df_new.drop(columns=['text']))
+    else:
+        build_index()
+
+    print(f"✅ {added} new articles analyzed and saved to '{SCORES_FILE.name}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import argparse
+import logging
+import numpy as np
+import pandas as pd
+from config import FULL_SENTIMENT_FILE, SCORES_FILE, ARTICLE_CONTENT_FILE
+from scripts import archive
+from scripts.storage import write_parquet, read_path
+
+# ---------------- LOGGING ----------------
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+# ---------------- SCHEMA ----------------
+# Scores: one row per scored article, numeric/categorical only.
+# Content: article text, referenced by article_id. `text` is never stored,
+# it is rebuilt from title + description on demand.
+SCORE_COLUMNS = ["article_id", "company_name", "source", "publishedAt", "date",
+                 "sentiment_score", "sentiment_label", "analyzed_at"]
+CONTENT_COLUMNS = ["article_id", "title", "description", "url"]
+SENTIMENT_LABELS = ["negative", "neutral", "positive"]
+ID_KEYS = ["company_name", "url", "publishedAt"]
+
+
+def make_article_ids(df):
+    """Stable int64 id per (company, url, publishedAt), computed vectorized."""
+    keys = df[ID_KEYS].astype(str)
+    return pd.util.hash_pandas_object(keys, index=False).to_numpy().view("int64")
+
+
+def article_text(content):
+    """Rebuild the scored text exactly as the sentiment stage builds it."""
+    return content["title"].fillna("") + ". " + content["description"].fillna("")
+
+
+def to_compact(df):
+    """Split a wide article frame into (scores, content) frames with compact dtypes."""
+    df = df.copy()
+    df["publishedAt"] = pd.to_datetime(df["publishedAt"], errors="coerce", utc=True)
+    if "article_id" not in df.columns:
+        df["article_id"] = make_article_ids(df)
+    if "date" not in df.columns:
+        df["date"] = df["publishedAt"]
+    date = pd.to_datetime(df["date"], errors="coerce", utc=True)
+    if "analyzed_at" not in df.columns:
+        df["analyzed_at"] = pd.NaT
+
+    scores = pd.DataFrame({
+        "article_id": df["article_id"].astype("int64"),
+        "company_name": df["company_name"].astype("category"),
+        "source": df["source"].astype("category"),
+        "publishedAt": df["publishedAt"],
+        "date": date.dt.tz_localize(None).dt.normalize(),
+        "sentiment_score": df["sentiment_score"].astype("float32"),
+        "sentiment_label": pd.Categorical(df["sentiment_label"], categories=SENTIMENT_LABELS),
+        "analyzed_at": pd.to_datetime(df["analyzed_at"], errors="coerce"),
+    })
+    content = df[CONTENT_COLUMNS].drop_duplicates(subset=["article_id"]).reset_index(drop=True)
+    return scores.reset_index(drop=True), content
+
+
+def rename_companies(scores, content, aliases):
+    """Move rows stored under an old name (universe.aliases) to the member name.
+
+    Ids are recomputed from the new name; a renamed row whose article was
+    already fetched under the member name is dropped in favour of that copy.
+    Returns (scores, content, rows renamed).
+    """
+    names = scores["company_name"].astype(str)
+    renamed = names.map(aliases)
+    hit = renamed.notna().to_numpy()
+    if not hit.any():
+        return scores, content, 0
+    urls = scores.loc[hit, "article_id"].map(content.drop_duplicates("article_id").set_index("article_id")["url"])
+    keys = pd.DataFrame({"company_name": renamed[hit], "url": urls, "publishedAt": scores.loc[hit, "publishedAt"]})
+    new_ids = pd.Series(make_article_ids(keys), index=keys.index).where(urls.notna(), scores.loc[hit, "article_id"])
+    id_map = pd.Series(new_ids.to_numpy(), index=scores.loc[hit, "article_id"].to_numpy())
+    id_map = id_map[~id_map.index.duplicated()]
+
+    scores = scores.copy()
+    scores["company_name"] = names.where(~hit, renamed).astype("category")
+    scores.loc[hit, "article_id"] = new_ids.astype("int64")
+    taken = scores.loc[~hit, "article_id"]
+    drop = hit & (scores["article_id"].isin(taken) | scores["article_id"].where(hit).duplicated()).to_numpy()
+    scores = scores[~drop].reset_index(drop=True)
+    content = content.copy()
+    moved = content["article_id"].isin(id_map.index).to_numpy()
+    ids = content["article_id"].to_numpy(dtype="int64")
+    position = id_map.index.get_indexer(ids)
+    # positional lookup: Series.map would round the int64 ids through float64
+    content["article_id"] = np.where(position >= 0, id_map.to_numpy(dtype="int64")[position], ids)
+    clash = moved & (content["article_id"].isin(content.loc[~moved, "article_id"])
+                     | content["article_id"].where(moved).duplicated()).to_numpy()
+    content = content[~clash].reset_index(drop=True)
+    return scores, content, int(hit.sum())
+
+
+def migrate_company_names(aliases=None):
+    """One-off: rename old company names in the hot store and the archive; returns rows renamed."""
+    from scripts import universe
+
+    aliases = universe.aliases() if aliases is None else aliases
+    renamed = archive.rename_companies(aliases)
+    if store_exists():
+        scores, content, n = rename_companies(pd.read_parquet(SCORES_FILE), pd.read_parquet(ARTICLE_CONTENT_FILE), aliases)
+        if n:
+            save_store(scores, content)
+        renamed += n
+    return renamed
+
+
+def _migrate_legacy():
+    """Build the compact store once from the legacy full_sentiment.csv."""
+    from scripts import universe
+
+    logger.info(f"🔄 Migrating {FULL_SENTIMENT_FILE.name} to compact store...")
+    legacy = pd.read_csv(FULL_SENTIMENT_FILE)
+    scores, content, _ = rename_companies(*to_compact(legacy), universe.aliases())
+    save_store(scores, content)
+    return scores, content
+
+
+def store_exists():
+    return read_path(SCORES_FILE).exists() and read_path(ARTICLE_CONTENT_FILE).exists()
+
+
+def save_store(scores, content):
+    SCORES_FILE.parent.mkdir(parents=True, exist_ok=True)
+    write_parquet(scores[SCORE_COLUMNS], SCORES_FILE, index=False)
+    write_parquet(content[CONTENT_COLUMNS], ARTICLE_CONTENT_FILE, index=False)
+
+
+def load_scores(columns=None, since=None, archived=True):
+    """Load the numeric score table, optionally only a subset of columns.
+
+    Archived years are included unless `archived` is False; with `since`,
+    archived rows before that date are skipped (hot rows are always returned).
+    """
+    if not store_exists():
+        if not FULL_SENTIMENT_FILE.exists():
+            return pd.DataFrame(columns=columns or SCORE_COLUMNS)
+        scores, _ = _migrate_legacy()
+        return scores[columns] if columns else scores
+    hot = pd.read_parquet(read_path(SCORES_FILE), columns=columns)
+    old = archive.read("scores", columns=columns, start=since) if archived else None
+    return hot if old is None else _concat_categorical([old, hot])
+
+
+def load_content(article_ids=None, columns=None, archived=True):
+    """Load article text for the given ids (all articles if None), hot and archived."""
+    if not store_exists():
+        load_scores(columns=["article_id"])
+    if not read_path(ARTICLE_CONTENT_FILE).exists():
+        return pd.DataFrame(columns=columns or CONTENT_COLUMNS)
+    if columns and "article_id" not in columns:
+        columns = ["article_id"] + list(columns)
+    filters = None
+    if article_ids is not None:
+        filters = [("article_id", "in", list(map(int, article_ids)))]
+    hot = pd.read_parquet(read_path(ARTICLE_CONTENT_FILE), columns=columns, filters=filters)
+    old = archive.read("content", columns=columns, filters=filters) if archived else None
+    return hot if old is None else pd.concat([old, hot], ignore_index=True)
+
+
+def load_full_sentiment():
+    """Wide legacy view (scores joined with text) for consumers that need text."""
+    scores = load_scores()
+    content = load_content(scores["article_id"].unique())
+    df = scores.merge(content, on="article_id", how="left")
+    df["text"] = article_text(df)
+    return df
+
+
+def append_articles(df_new):
+    """Append newly scored articles to the store, returns the number of rows added."""
+    new_scores, new_content = to_compact(df_new)
+    # the same article can come twice in one batch (e.g. two fetches of one feed)
+    new_scores = new_scores.drop_duplicates("article_id")
+    if store_exists() or FULL_SENTIMENT_FILE.exists():
+        # only the hot tier is rewritten; archived ids are checked back to the oldest new row
+        old_scores = load_scores(archived=False)
+        old_content = load_content(archived=False)
+        archived = archive.read("scores", columns=["article_id"], start=new_scores["date"].min())
+        known = old_scores["article_id"] if archived is None else pd.concat([archived["article_id"], old_scores["article_id"]])
+        new_scores = new_scores[~new_scores["article_id"].isin(known)]
+        scores = _concat_categorical([old_scores, new_scores])
+        content = pd.concat([old_content, new_content], ignore_index=True)
+        content.drop_duplicates(subset=["article_id"], inplace=True)
+    else:
+        scores, content = new_scores, new_content
+    save_store(scores, content)
+    return len(new_scores)
+
+
+def _concat_categorical(frames):
+    """Concat frames while keeping category dtypes (union of categories)."""
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return pd.DataFrame(columns=SCORE_COLUMNS)
+    out = pd.concat(frames, ignore_index=True)
+    for col in ["company_name", "source"]:
+        if col in out.columns:
+            out[col] = out[col].astype(str).astype("category")
+    if "sentiment_label" in out.columns:
+        out["sentiment_label"] = pd.Categorical(out["sentiment_label"], categories=SENTIMENT_LABELS)
+    return out
+
+
+# ---------------- MEMORY REPORT ----------------
+def _scaled(df, factor):
+    """Repeat a frame `factor` times with distinct article ids."""
+    if factor == 1:
+        return df
+    parts = []
+    for i in range(factor):
+        part = df.copy()
+        if "article_id" in part.columns:
+            part["article_id"] = part["article_id"] + i
+        parts.append(part)
+    out = pd.concat(parts, ignore_index=True)
+    for col in out.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            out[col] = out[col].astype(df[col].dtype)
+    return out
+
+
+def _mb(df):
+    return df.memory_usage(deep=True).sum() / 1024 ** 2
+
+
+def memory_report(scales=(1, 100)):
+    """Memory of the compact store (hot and archived) vs. the same rows in the legacy wide layout."""
+    scores, content = load_scores(), load_content()
+    # the legacy layout: one wide frame of plain strings, as read_csv gave it
+    legacy = scores.merge(content, on="article_id", how="left").drop(columns="article_id")
+    legacy["text"] = article_text(legacy)
+    legacy = legacy.astype({c: object for c in legacy.columns if not pd.api.types.is_numeric_dtype(legacy[c])})
+    numeric = ["company_name", "date", "sentiment_score"]
+
+    rows = []
+    for factor in scales:
+        legacy_x = _scaled(legacy, factor)
+        scores_x = _scaled(scores, factor)
+        content_x = _scaled(content, factor)
+        rows.append({
+            "scale": f"{factor}x",
+            "rows": len(legacy_x),
+            "legacy_full_mb": _mb(legacy_x),
+            "scores_mb": _mb(scores_x),
+            "content_mb": _mb(content_x),
+            "aggregation_load_mb": _mb(scores_x[numeric]),
+        })
+    report = pd.DataFrame(rows)
+    report["reduction_scores"] = report["legacy_full_mb"] / report["scores_mb"]
+    report["reduction_aggregation"] = report["legacy_full_mb"] / report["aggregation_load_mb"]
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact sentiment store utilities")
+    parser.add_argument("command", choices=["migrate", "migrate-names", "report"])
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        scores, content = _migrate_legacy()
+        logger.info(f"✅ {len(scores)} scores / {len(content)} articles written to {SCORES_FILE.parent}")
+    elif args.command == "migrate-names":
+        logger.info(f"✅ {migrate_company_names()} score rows moved to their member names")
+    else:
+        report = memory_report()
+        print(report.to_string(index=False, float_format=lambda v: f"{v:,.2f}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import argparse
+import contextvars
+import logging
+import os
+import shutil
+import stat
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from config import BASE_DIR, SNAPSHOT_DIR, PIPELINE_LOCK_FILE
+
+# ---------------- LOGGING ----------------
+logger = logging.getLogger(__name__)
+
+# Storage layer shared by the pipeline and the dashboard.
+#
+# Writes: every output is written to a temp file in the target directory and
+# renamed over the old file, so readers see the old or the new file, never a
+# truncated one.
+#
+# Snapshots: after a successful run the data files are hard-linked into
+# snapshots/<id>/ (same relative layout as the project) and CURRENT is
+# switched to <id> with the same rename. Because writers never modify a file
+# in place, a snapshot's links keep pointing at the old contents while the
+# next run writes. Readers pin one snapshot (pin()/read_path()) for the
+# length of a query; the last KEEP_SNAPSHOTS are kept so a pinned snapshot
+# outlives the next publish.
+#
+# Locking: one run at a time holds an flock on PIPELINE_LOCK_FILE; a second
+# run fails fast (or waits with wait=True).
+SNAPSHOT_PATTERNS = ["company_data/*.csv", "sentiment/*.csv", "sentiment/*.parquet", "raw_data/*.csv",
+                     "archive/*/*"]
+KEEP_SNAPSHOTS = 3
+CURRENT_FILE = SNAPSHOT_DIR / "CURRENT"
+
+_pinned = contextvars.ContextVar("pinned_snapshot", default=None)
+
+
+class PipelineLocked(RuntimeError):
+    """Another pipeline run holds the lock."""
+
+
+# ---------------- ATOMIC WRITES ----------------
+# read once at import (os.umask can only be read by setting it)
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def _file_mode(path):
+    """Mode for a replacement of `path`: the existing file's, else what open() would give."""
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        return 0o666 & ~_UMASK
+
+
+@contextmanager
+def atomic_path(path):
+    """Yield a temp path next to `path`; it replaces `path` only if the block succeeds.
+
+    The result keeps the target's mode (mkstemp creates 0600 files), so other
+    users that could read the data before can still read it.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    os.close(fd)
+    try:
+        yield Path(tmp)
+        os.chmod(tmp, _file_mode(path))
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def write_csv(df, path, **kwargs):
+    with atomic_path(path) as tmp:
+        df.to_csv(tmp, **kwargs)
+
+
+def write_parquet(df, path, **kwargs):
+    with atomic_path(path) as tmp:
+        df.to_parquet(tmp, **kwargs)
+
+
+def write_bytes(path, data):
+    with atomic_path(path) as tmp:
+        tmp.write_bytes(data)
+
+
+def write_text(path, text):
+    write_bytes(path, text.encode("utf-8"))
+
+
+# ---------------- LOCK ----------------
+@contextmanager
+def pipeline_lock(wait=False, timeout=None, path=PIPELINE_LOCK_FILE):
+    """Inter-process lock for a pipeline run; raises PipelineLocked unless `wait`."""
+    import fcntl
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a+") as f:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if not wait or (deadline is not None and time.monotonic() >= deadline):
+                    f.seek(0)
+                    raise PipelineLocked(f"Pipeline is locked by another run ({f.read().strip() or 'unknown'})")
+                time.sleep(1)
+        f.seek(0)
+        f.truncate()
+        f.write(f"pid {os.getpid()} since {datetime.now().isoformat(timespec='seconds')}")
+        f.flush()
+        try:
+            yield
+        finally:
+            f.truncate(0)
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+# ---------------- SNAPSHOTS ----------------
+def current_snapshot():
+    """Id of the published snapshot, or None before the first publish."""
+    try:
+        snapshot = CURRENT_FILE.read_text(encoding="utf-8").strip()
+    except FileNotFoundError:
+        return None
+    return snapshot if (SNAPSHOT_DIR / snapshot).is_dir() else None
+
+
+def list_snapshots():
+    return sorted(p.name for p in SNAPSHOT_DIR.glob("*") if p.is_dir())
+
+
+def _link(src, dst):
+    try:
+        os.link(src, dst)
+    except OSError:
+        # different filesystem / no hard links: fall back to a copy
+        shutil.copy2(src, dst)
+
+
+def publish_snapshot(keep=KEEP_SNAPSHOTS):
+    """Hard-link the current data files into a new snapshot and point CURRENT at it.
+
+    Call with the pipeline lock held, after every stage has finished.
+    """
+    # microseconds (and a counter, just in case) so two publishes within one
+    # second get distinct ids; ids still sort chronologically
+    stamp = datetime.now().strftime("%Y%m%dT%H%M%S-%f")
+    snapshot, n = stamp, 0
+    while (SNAPSHOT_DIR / snapshot).exists():
+        n += 1
+        snapshot = f"{stamp}-{n}"
+    target = SNAPSHOT_DIR / snapshot
+    staging = SNAPSHOT_DIR / f".{snapshot}.tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    files = 0
+    for pattern in SNAPSHOT_PATTERNS:
+        for src in BASE_DIR.glob(pattern):
+            dst = staging / src.relative_to(BASE_DIR)
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            _link(src, dst)
+            files += 1
+    staging.mkdir(parents=True, exist_ok=True)
+    os.replace(staging, target)
+    write_text(CURRENT_FILE, snapshot)
+    logger.info(f"📸 Snapshot {snapshot} published ({files} files)")
+    prune_snapshots(keep)
+    return snapshot
+
+
+def prune_snapshots(keep=KEEP_SNAPSHOTS):
+    """Delete all but the newest `keep` snapshots (never the current one)."""
+    current = current_snapshot()
+    for snapshot in list_snapshots()[:-keep or None]:
+        if snapshot != current:
+            shutil.rmtree(SNAPSHOT_DIR / snapshot, ignore_errors=True)
+
+
+# ---------------- READERS ----------------
+def resolve(path, snapshot):
+    """`path` inside `snapshot` if the snapshot has it, else the live path."""
+    path = Path(path)
+    if snapshot is None:
+        return path
+    try:
+        relative = path.resolve().relative_to(BASE_DIR)
+    except ValueError:
+        return path
+    if relative.parts and relative.parts[0] == SNAPSHOT_DIR.name:
+        return path
+    candidate = SNAPSHOT_DIR / snapshot / relative
+    return candidate if candidate.exists() else path
+
+
+def pin(snapshot):
+    """Pin `snapshot` for read_path() in the current thread/context; returns it."""
+    _pinned.set(snapshot)
+    return snapshot
+
+
+@contextmanager
+def pinned(snapshot=None):
+    """Read from one snapshot (default: the current one) for the length of the block."""
+    token = _pinned.set(snapshot if snapshot is not None else current_snapshot())
+    try:
+        yield _pinned.get()
+    finally:
+        _pinned.reset(token)
+
+
+def read_path(path):
+    """Where to read `path` from: the pinned snapshot's copy, or the live file."""
+    return resolve(path, _pinned.get())
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Data snapshots and the pipeline lock")
+    sub = parser.add_subparsers(dest="command", required=True)
+    publish = sub.add_parser("publish", help="snapshot the current data files and make it current")
+    publish.add_argument("--wait", action="store_true", help="wait for a running pipeline instead of failing")
+    sub.add_parser("status", help="current snapshot, retained snapshots and lock holder")
+    args = parser.parse_args()
+
+    if args.command == "publish":
+        with pipeline_lock(wait=args.wait):
+            publish_snapshot()
+        return
+    print(f"Current:   {current_snapshot() or '(none, readers use the live files)'}")
+    print(f"Snapshots: {', '.join(list_snapshots()) or '-'}")
+    try:
+        with pipeline_lock():
+            print("Lock:      free")
+    except PipelineLocked as e:
+        print(f"Lock:      {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import argparse
+import numpy as np
+import pandas as pd
+from config import DAX_PRICES_FILE
+
+# XETRA trading calendar. News is attributed to the first session whose
+# close comes after its publication time: weekend and holiday news, and
+# news published at or after the 17:30 Berlin close, count towards the
+# next trading session.
+EXCHANGE_TZ = "Europe/Berlin"
+CLOSE_TIME = pd.Timedelta(hours=17, minutes=30)
+# Fixed-date XETRA holidays (month, day); Good Friday and Easter Monday are added per year
+FIXED_HOLIDAYS = [(1, 1), (5, 1), (12, 24), (12, 25), (12, 26), (12, 31)]
+# Sessions generated past the newest article, so late news maps to an upcoming session
+LOOKAHEAD_DAYS = 14
+
+
+def easter_sunday(year):
+    """Gregorian Easter Sunday (anonymous Gregorian algorithm)."""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = b // 4, b % 4
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return pd.Timestamp(year, month, day + 1)
+
+
+def xetra_holidays(years):
+    days = []
+    for year in years:
+        easter = easter_sunday(year)
+        days += [pd.Timestamp(year, m, d) for m, d in FIXED_HOLIDAYS]
+        days += [easter - pd.Timedelta(days=2), easter + pd.Timedelta(days=1)]
+    return pd.DatetimeIndex(sorted(days))
+
+
+def trading_sessions(start, end):
+    """XETRA session dates (tz-naive midnight) in [start, end]."""
+    start, end = pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize()
+    days = pd.bdate_range(start, end)
+    return days[~days.isin(xetra_holidays(range(start.year, end.year + 1)))]
+
+
+def session_closes(sessions):
+    """Close of each session as UTC int64 nanoseconds, the searchsorted keys."""
+    closes = (pd.DatetimeIndex(sessions) + CLOSE_TIME).tz_localize(EXCHANGE_TZ).tz_convert("UTC")
+    return closes.as_unit("ns").asi8
+
+
+def _as_utc(timestamps):
+    ts = pd.to_datetime(pd.Series(timestamps), errors="coerce", utc=True, format="ISO8601")
+    return pd.DatetimeIndex(ts)
+
+
+def align_to_sessions(published_at, sessions=None):
+    """Effective trading session for every timestamp, in one vectorized pass.
+
+    Naive timestamps are taken as UTC. Returns tz-naive session dates aligned
+    with the input; NaT where the time is unknown or past the calendar.
+    """
+    published = _as_utc(published_at)
+    if sessions is None:
+        valid = published.dropna()
+        if valid.empty:
+            return pd.Series(pd.NaT, index=range(len(published)), dtype="datetime64[ns]")
+        sessions = trading_sessions(valid.min().tz_convert(EXCHANGE_TZ).tz_localize(None),
+                                    valid.max().tz_localize(None) + pd.Timedelta(days=LOOKAHEAD_DAYS))
+    sessions = pd.DatetimeIndex(sessions)
+    closes = session_closes(sessions)
+    # first close strictly after the publication time
+    idx = np.searchsorted(closes, published.as_unit("ns").asi8, side="right")
+    valid = ~published.isna() & (idx < len(sessions))
+    out = np.full(len(published), np.datetime64("NaT"), dtype="datetime64[ns]")
+    out[valid] = sessions.as_unit("ns").to_numpy()[idx[valid]]
+    return pd.Series(out)
+
+
+def assign_sessions(df, column="publishedAt", fallback="date"):
+    """Copy of `df` with a `session` column; rows without a publish time use `fallback`."""
+    out = df.copy()
+    published = _as_utc(out[column])
+    if fallback in out.columns:
+        missing = published.isna()
+        # a bare calendar date: treat it as published at midnight UTC
+        published = published.where(~missing, _as_utc(out[fallback]))
+    out["session"] = align_to_sessions(published).to_numpy()
+    return out
+
+
+def alignment_report(scores):
+    """How many articles move off their calendar date, and why."""
+    aligned = assign_sessions(scores)
+    published = _as_utc(aligned["publishedAt"]).tz_convert(EXCHANGE_TZ)
+    local_day = pd.Series(published.tz_localize(None).normalize(), index=aligned.index)
+    moved = aligned["session"] != local_day
+    non_trading = ~local_day.isin(trading_sessions(local_day.min(), local_day.max()))
+    after_close = moved & ~non_trading
+    return pd.Series({
+        "articles": len(aligned),
+        "same_day_session": int((~moved).sum()),
+        "weekend_or_holiday": int((moved & non_trading).sum()),
+        "after_close": int(after_close.sum()),
+        "unaligned": int(aligned["session"].isna().sum()),
+    })
+
+
+def check_against_prices(path=DAX_PRICES_FILE):
+    """Price dates that the calendar does not consider sessions, and vice versa."""
+    dates = pd.DatetimeIndex(pd.read_csv(path, usecols=["Date"], parse_dates=["Date"])["Date"].unique())
+    sessions = trading_sessions(dates.min(), dates.max())
+    return dates.difference(sessions), sessions.difference(dates)
+
+
+def main():
+    from scripts.sentiment_store import load_scores
+
+    parser = argparse.ArgumentParser(description="XETRA trading calendar and news-to-session alignment")
+    parser.add_argument("command", choices=["report", "check"], nargs="?", default="report")
+    args = parser.parse_args()
+
+    if args.command == "check":
+        extra, missing = check_against_prices()
+        print(f"Price dates outside the calendar: {[d.date().isoformat() for d in extra]}")
+        print(f"Calendar sessions without prices: {[d.date().isoformat() for d in missing]}")
+        return
+    print(alignment_report(load_scores(columns=["publishedAt", "date"])).to_string())
+
+
+if __name__ == "__main__":
+    main()
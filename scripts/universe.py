@@ -0,0 +1,167 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import argparse
+import hashlib
+import json
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from config import UNIVERSES_FILE, DEFAULT_UNIVERSE
+from scripts.panel import company_key
+
+# ---------------- LOGGING ----------------
+logger = logging.getLogger(__name__)
+
+# Universes live in universes.json. A universe is a list of members
+# {"name", "ticker", "query"?} plus an optional index entry; a member given
+# as a bare name refers to that company in another universe (watchlists).
+# `name` is the company name used throughout the pipeline, `query` (default:
+# name) is what the news fetchers search for.
+#
+# Sharding: a shard is either shard k of n by a stable hash of the company
+# key (independent of process, machine and universe order) or an explicit
+# list of companies. Stages process one shard per worker and merge the shard
+# outputs sorted on their key columns, so the result never depends on which
+# worker finished first.
+
+
+def load_universes(path=UNIVERSES_FILE):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _member(entry):
+    member = dict(entry)
+    member.setdefault("query", member["name"])
+    member["key"] = company_key(member["name"])
+    return member
+
+
+def members(universe=DEFAULT_UNIVERSE, path=UNIVERSES_FILE):
+    """Members of one or more comma-separated universes, deduplicated by company key."""
+    universes = load_universes(path)
+    known = {company_key(m["name"]): m for spec in universes.values() for m in spec["members"] if isinstance(m, dict)}
+    out = {}
+    for name in universe.split(","):
+        if name not in universes:
+            raise ValueError(f"Unknown universe: {name} (defined: {', '.join(universes)})")
+        for entry in universes[name]["members"]:
+            if isinstance(entry, str):
+                if company_key(entry) not in known:
+                    raise ValueError(f"{name}: '{entry}' is not defined in any universe")
+                entry = known[company_key(entry)]
+            out.setdefault(company_key(entry["name"]), _member(entry))
+    return list(out.values())
+
+
+def indices(universe=DEFAULT_UNIVERSE, path=UNIVERSES_FILE):
+    """Index entries of the selected universes (watchlists have none)."""
+    universes = load_universes(path)
+    return [_member(universes[name]["index"]) for name in universe.split(",") if "index" in universes[name]]
+
+
+def aliases(path=UNIVERSES_FILE):
+    """{old article name: member name}, both lowercased, for every entry whose query differs from its name.
+
+    Articles used to be stored under the search query ('mercedes-benz group',
+    'gdaxi'); these map such rows onto the member name they are stored under now.
+    """
+    out = {}
+    for spec in load_universes(path).values():
+        entries = [m for m in spec["members"] if isinstance(m, dict)] + ([spec["index"]] if "index" in spec else [])
+        for entry in entries:
+            query, name = entry.get("query", entry["name"]).strip().lower(), entry["name"].strip().lower()
+            if query != name:
+                out[query] = name
+    return out
+
+
+def shard_of(key, shard_count):
+    """Stable shard number of a company key (sha1, not the per-process hash())."""
+    return int(hashlib.sha1(key.encode("utf-8")).hexdigest(), 16) % shard_count
+
+
+def select(members_, shard=None, companies=None):
+    """Members in one shard: `shard` = (k, n) by hash, or an explicit company list."""
+    if companies:
+        wanted = {company_key(c) for c in companies}
+        return [m for m in members_ if m["key"] in wanted]
+    if shard is None:
+        return list(members_)
+    k, n = shard
+    return [m for m in members_ if shard_of(m["key"], n) == k]
+
+
+def run_sharded(worker, members_, workers, *args):
+    """worker(chunk, *args) over `workers` round-robin chunks of members, one process each.
+
+    Chunks are dealt by position rather than hash so a single hash shard
+    still spreads evenly; results come back in chunk order.
+    """
+    shards = [s for s in (members_[i::max(workers, 1)] for i in range(max(workers, 1))) if s]
+    if workers <= 1 or len(shards) <= 1:
+        return [worker(s, *args) for s in shards]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(worker, shards, *[[a] * len(shards) for a in args]))
+
+
+def merge_frames(frames, keys):
+    """Deterministic merge of shard outputs: concat, last duplicate wins, sorted by keys."""
+    import pandas as pd
+
+    frames = [f for f in frames if f is not None and not f.empty]
+    if not frames:
+        return pd.DataFrame()
+    merged = pd.concat(frames, ignore_index=True)
+    merged = merged.drop_duplicates(subset=keys, keep="last")
+    return merged.sort_values(keys, kind="stable").reset_index(drop=True)
+
+
+def shard_path(path, shard):
+    """Per-shard output file next to `path`, e.g. prices.shard2-of-4.csv."""
+    k, n = shard
+    path = Path(path)
+    return path.with_name(f"{path.stem}.shard{k}-of-{n}{path.suffix}")
+
+
+def shard_files(path):
+    path = Path(path)
+    return sorted(path.parent.glob(f"{path.stem}.shard*-of-*{path.suffix}"))
+
+
+# ---------------- CLI HELPERS ----------------
+def add_arguments(parser):
+    """--universe / --shard k/n / --companies / --workers, shared by all stages."""
+    parser.add_argument("--universe", default=DEFAULT_UNIVERSE, help="universe name(s), comma-separated")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--shard", type=_parse_shard, help="process only hash shard k of n, e.g. 2/4")
+    group.add_argument("--companies", type=lambda s: [c.strip() for c in s.split(",")],
+                       help="process only these companies (comma-separated)")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes within this run")
+    return parser
+
+
+def _parse_shard(text):
+    k, n = (int(v) for v in text.split("/"))
+    if not 0 <= k < n:
+        raise argparse.ArgumentTypeError(f"shard must be k/n with 0 <= k < n, got {text}")
+    return k, n
+
+
+def selected(args):
+    """Members selected by the shared CLI arguments."""
+    return select(members(args.universe), args.shard, args.companies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List universe members and their shards")
+    add_arguments(parser)
+    parser.add_argument("--shards", type=int, default=4, help="shard count to display")
+    args = parser.parse_args()
+    for m in selected(args):
+        print(f"{shard_of(m['key'], args.shards)}/{args.shards}  {m.get('ticker', '-'):10s} {m['name']}  (query: {m['query']})")
+
+
+if __name__ == "__main__":
+    main()
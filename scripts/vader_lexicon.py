@@ -0,0 +1,99 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import argparse
+import logging
+import pickle
+import time
+from config import VADER_LEXICON_FILE
+from scripts.storage import write_bytes
+
+# ---------------- LOGGING ----------------
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+# The VADER lexicon as a pickled {token: valence} dict, built once at setup:
+#
+#     python scripts/vader_lexicon.py build --download   # fetch via nltk, then cache
+#     python scripts/vader_lexicon.py build --from vader_lexicon.txt
+#
+# At runtime the analyzer is created from this cache: no nltk.download(),
+# no nltk.data search path probe and no parse of the lexicon text, and
+# nltk itself is only imported by runs that actually score articles. Only
+# `build --download` ever touches the network; a missing cache is an error
+# that says how to build it.
+NLTK_RESOURCE = "sentiment/vader_lexicon.zip/vader_lexicon/vader_lexicon.txt"
+
+
+def parse_lexicon(text):
+    """token -> mean valence, exactly as nltk's make_lex_dict parses the file."""
+    lexicon = {}
+    for line in text.split("\n"):
+        if line.strip():
+            word, measure = line.strip().split("\t")[0:2]
+            lexicon[word] = float(measure)
+    return lexicon
+
+
+def build_cache(source=None, download=False, path=VADER_LEXICON_FILE):
+    """Parse the lexicon (a local file, or nltk's data) and write the cache."""
+    if source is not None:
+        text = Path(source).read_text(encoding="utf-8")
+    else:
+        import nltk
+
+        if download:
+            nltk.download("vader_lexicon", quiet=True)
+        text = nltk.data.load(NLTK_RESOURCE)
+    lexicon = parse_lexicon(text)
+    write_bytes(path, pickle.dumps(lexicon, protocol=pickle.HIGHEST_PROTOCOL))
+    return lexicon
+
+
+def load_lexicon(path=VADER_LEXICON_FILE):
+    """The cached lexicon; FileNotFoundError with the build command if it is missing."""
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        raise FileNotFoundError(
+            f"VADER lexicon cache missing ({path}); run "
+            "`python scripts/vader_lexicon.py build --download` once") from None
+
+
+def sentiment_analyzer(path=VADER_LEXICON_FILE):
+    """nltk SentimentIntensityAnalyzer backed by the cached lexicon."""
+    from nltk.sentiment.vader import SentimentIntensityAnalyzer, VaderConstants
+
+    class CachedSentimentIntensityAnalyzer(SentimentIntensityAnalyzer):
+        # nltk's __init__ would load and parse the lexicon text; the cache replaces both
+        def __init__(self, lexicon):
+            self.lexicon_file = str(path)
+            self.lexicon = lexicon
+            self.constants = VaderConstants()
+
+    return CachedSentimentIntensityAnalyzer(load_lexicon(path))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the pre-parsed VADER lexicon cache")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="parse the lexicon into the cache")
+    source = build.add_mutually_exclusive_group()
+    source.add_argument("--from", dest="source", help="a vader_lexicon.txt file")
+    source.add_argument("--download", action="store_true", help="download nltk's vader_lexicon first")
+    sub.add_parser("check", help="time loading the analyzer from the cache")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        lexicon = build_cache(args.source, args.download)
+        logger.info(f"✅ {len(lexicon)} lexicon entries cached to {VADER_LEXICON_FILE}")
+        return
+    start = time.perf_counter()
+    sia = sentiment_analyzer()
+    logger.info(f"✅ Analyzer with {len(sia.lexicon)} entries ready in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
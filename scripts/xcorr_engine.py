@@ -0,0 +1,113 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import argparse
+import logging
+import numpy as np
+import pandas as pd
+from config import CACHE_DIR
+from scripts.panel import PanelStore, padded_arrays
+from scripts.storage import write_parquet
+
+# ---------------- LOGGING ----------------
+logger = logging.getLogger(__name__)
+
+# corr(return[t], sentiment[t - lag]) for every lag in [-max_lag, max_lag] and
+# every company at once. lag > 0: sentiment leads returns.
+#
+# With NaN masks m and zero-filled values, each of the six Pearson sums
+# (n, Sx, Sy, Sxy, Sxx, Syy) is a cross-correlation sum_t a[t] * b[t - lag],
+# so all lags of all companies come out of a handful of batched FFTs.
+DEFAULT_MAX_LAG = 7
+Z_95 = 1.96
+
+
+def _xcorr(a, b, max_lag):
+    """sum_t a[:, t] * b[:, t - lag] for lag in [-max_lag, max_lag], batched over rows."""
+    T = a.shape[1]
+    size = 1 << int(np.ceil(np.log2(max(2 * T, 2))))
+    full = np.fft.irfft(np.fft.rfft(a, size) * np.conj(np.fft.rfft(b, size)), size)
+    lags = np.arange(-max_lag, max_lag + 1)
+    out = full[:, lags % size]
+    out[:, np.abs(lags) >= T] = 0.0
+    return out
+
+
+def lagged_correlations(returns, sentiment, max_lag=DEFAULT_MAX_LAG):
+    """NaN-aware Pearson correlation per (row, lag). Inputs are (C, T) arrays.
+
+    Returns (corr, n) as (C, 2 * max_lag + 1) arrays; n is the pair count.
+    """
+    mx = (~np.isnan(returns)).astype("float64")
+    my = (~np.isnan(sentiment)).astype("float64")
+    x = np.nan_to_num(returns)
+    y = np.nan_to_num(sentiment)
+
+    n = np.rint(_xcorr(mx, my, max_lag))
+    sx = _xcorr(x, my, max_lag)
+    sy = _xcorr(mx, y, max_lag)
+    sxy = _xcorr(x, y, max_lag)
+    sxx = _xcorr(x * x, my, max_lag)
+    syy = _xcorr(mx, y * y, max_lag)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = n * sxy - sx * sy
+        var = (n * sxx - sx ** 2) * (n * syy - sy ** 2)
+        corr = np.where((n > 2) & (var > 0), cov / np.sqrt(np.clip(var, 0, None)), np.nan)
+    return np.clip(corr, -1, 1), n
+
+
+def panel_lagged_correlations(panel, max_lag=DEFAULT_MAX_LAG):
+    """Long frame (company, lag, correlation, n, band) for the whole panel."""
+    companies, arrays = padded_arrays(panel, ["stock_price_return", "avg_sentiment"])
+    corr, n = lagged_correlations(arrays["stock_price_return"], arrays["avg_sentiment"], max_lag)
+    lags = np.arange(-max_lag, max_lag + 1)
+    with np.errstate(divide="ignore"):
+        band = Z_95 / np.sqrt(n)
+    return pd.DataFrame({
+        "company": np.repeat(companies, len(lags)),
+        "lag": np.tile(lags, len(companies)),
+        "correlation": corr.reshape(-1),
+        "n": n.reshape(-1).astype(int),
+        "band": band.reshape(-1),
+    })
+
+
+def lead_lag_summary(xcorr):
+    """Per company: lag with the largest |correlation| and whether it clears the 95% band."""
+    valid = xcorr.dropna(subset=["correlation"])
+    peak = valid.loc[valid["correlation"].abs().groupby(valid["company"]).idxmax()]
+    peak = peak.rename(columns={"lag": "peak_lag", "correlation": "peak_correlation"})
+    peak["significant"] = peak["peak_correlation"].abs() > peak["band"]
+    peak["leader"] = np.select([peak["peak_lag"] > 0, peak["peak_lag"] < 0], ["sentiment", "returns"], "same day")
+    return peak.sort_values("peak_correlation", key=np.abs, ascending=False).reset_index(drop=True)
+
+
+def cached_panel_lagged_correlations(panel, version, max_lag=DEFAULT_MAX_LAG):
+    """panel_lagged_correlations() persisted per data version under .cache/."""
+    path = CACHE_DIR / f"xcorr_{version}_{max_lag}.parquet"
+    if path.exists():
+        return pd.read_parquet(path)
+    result = panel_lagged_correlations(panel, max_lag)
+    write_parquet(result, path, index=False)
+    for old in CACHE_DIR.glob("xcorr_*.parquet"):
+        if not old.name.startswith(f"xcorr_{version}_"):
+            old.unlink(missing_ok=True)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="All-lags, all-companies sentiment/return cross-correlation")
+    parser.add_argument("--max-lag", type=int, default=DEFAULT_MAX_LAG)
+    args = parser.parse_args()
+
+    store = PanelStore()
+    store.refresh()
+    version, panel = store.get()
+    xcorr = cached_panel_lagged_correlations(panel, version, args.max_lag)
+    print(lead_lag_summary(xcorr).to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+
+
+if __name__ == "__main__":
+    main()